@@ -0,0 +1,67 @@
+# benchmarks/bench_bbox_extraction.py
+"""
+Vergleicht die BBox-Extraktion der Referenzfunktion get_element_bbox_details
+(neue Settings pro Element, Vertex-Kopie) mit dem schnellen Pfad get_element_bbox
+(gemeinsame Settings, Puffer-View) auf einem echten IFC-Modell.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_bbox_extraction pfad/zum/modell.ifc [--limit 5000]
+"""
+import argparse
+import time
+
+from src.ifc_detectors.bbox_xyz_detector import (
+    load_model_from_path,
+    get_element_bbox_details,
+    get_element_bbox,
+    create_bbox_settings,
+)
+
+COMPARED_KEYS = ('min_x', 'max_x', 'min_y', 'max_y', 'min_z', 'max_z')
+
+
+def _time_run(label: str, func, elements: list) -> tuple[dict, float]:
+    start = time.perf_counter()
+    results = {}
+    for element in elements:
+        details = func(element)
+        if details:
+            results[details['guid']] = details
+    elapsed = time.perf_counter() - start
+    rate = len(elements) / elapsed if elapsed > 0 else float('inf')
+    print(f"{label:<32} {elapsed:8.2f} s   {rate:10.1f} Elemente/s   ({len(results)} BBoxen)")
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ifc_path")
+    parser.add_argument("--ifc-class", default="IfcBuildingElementProxy")
+    parser.add_argument("--limit", type=int, default=0, help="Nur die ersten N Elemente messen (0 = alle)")
+    args = parser.parse_args()
+
+    model = load_model_from_path(args.ifc_path, message_callback=print)
+    if model is None:
+        raise SystemExit(1)
+
+    elements = list(model.by_type(args.ifc_class))
+    if args.limit:
+        elements = elements[:args.limit]
+    print(f"{len(elements)} Elemente vom Typ {args.ifc_class}\n")
+
+    reference, t_ref = _time_run("get_element_bbox_details (alt)", get_element_bbox_details, elements)
+    settings = create_bbox_settings()
+    fast, t_fast = _time_run("get_element_bbox (neu)", lambda e: get_element_bbox(e, settings), elements)
+
+    max_diff = 0.0
+    missing = set(reference) ^ set(fast)
+    for guid in set(reference) & set(fast):
+        for key in COMPARED_KEYS:
+            max_diff = max(max_diff, abs(float(reference[guid][key]) - float(fast[guid][key])))
+
+    print(f"\nBeschleunigung: {t_ref / t_fast:.2f}x" if t_fast > 0 else "")
+    print(f"Max. Koordinatenabweichung: {max_diff:.6f} m, abweichende Elementmengen: {len(missing)}")
+
+
+if __name__ == "__main__":
+    main()
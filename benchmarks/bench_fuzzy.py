@@ -0,0 +1,85 @@
+# benchmarks/bench_fuzzy.py
+"""
+Vergleicht die Fuzzy-Suche vorher (fuzzy_search: Suchtext und SequenceMatcher pro EPD und Anfrage,
+Sortierung aller Treffer) und nachher (FuzzyIndex: vorberechnete Texte, Trigramm-Obergrenze,
+begrenzter Heap mit Abbruch) auf synthetischen Korpora mit 1k, 10k und 100k EPDs.
+Die Treffer beider Varianten werden verglichen, Abweichungen als Fehler gemeldet.
+Zusätzlich wird die Wortmengen-Bewertung (TokenIndex) gemessen; sie bewertet anders,
+ihre Treffer werden daher nur gezählt.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_fuzzy [--sizes 1000 10000 100000] [--top-n 70] [--cutoff 0.4]
+"""
+import argparse
+import random
+import time
+
+from src.services.fuzzy_service import FuzzyIndex, TokenIndex, fuzzy_search
+
+WORDS = (
+    "asphalt binder schicht trag deck beton stahl bewehrung ziegel mauerwerk dämmung mineralwolle "
+    "holz brettschichtholz glas fenster dach abdichtung bitumen bahn estrich zement kalk gips putz "
+    "mörtel fliese naturstein granit kies sand schotter recycling pflaster stein rohr polyethylen "
+    "kupfer aluminium blech fassade platte gipskarton spanplatte lack farbe kleber transportbeton"
+).split()
+COLUMNS = ["name", "classification_path", "tech_desc_de"]
+QUERIES = [
+    "Asphalttragschicht AC 16 TS",
+    "Beton C25/30",
+    "Stahlbeton mit Bewehrung",
+    "Mineralwolle Dämmung WLG 035",
+    "Gipskartonplatte 12,5 mm",
+]
+
+
+def make_corpus(size: int, seed: int = 1) -> list:
+    rnd = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        name = " ".join(rnd.choice(WORDS).capitalize() for _ in range(rnd.randint(1, 4)))
+        corpus.append({
+            "uuid": f"epd-{i}",
+            "name": f"{name} {rnd.choice(['AC 16', 'C25/30', 'TS', 'WLG 035', ''])}".strip(),
+            "classification_path": "Baustoffe / " + rnd.choice(WORDS),
+            "tech_desc_de": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 25))),
+        })
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--top-n", type=int, default=70)
+    parser.add_argument("--cutoff", type=float, default=0.4)
+    args = parser.parse_args()
+
+    print(f"{'EPDs':>7} {'Anfrage':<30} {'Referenz [ms]':>14} {'Index [ms]':>11} {'Faktor':>7} {'gleich':>7} "
+          f"{'Token [ms]':>11} {'Treffer':>8}")
+    for size in args.sizes:
+        corpus = make_corpus(size)
+        start = time.perf_counter()
+        index = FuzzyIndex(corpus, COLUMNS)
+        t_build = time.perf_counter() - start
+        start = time.perf_counter()
+        token_index = TokenIndex(corpus, COLUMNS)
+        t_token_build = time.perf_counter() - start
+        print(f"{size:>7} {'(Indexaufbau)':<30} {'':>14} {t_build * 1000:>11.1f} {'':>7} {'':>7} "
+              f"{t_token_build * 1000:>11.1f}")
+        for query in QUERIES:
+            start = time.perf_counter()
+            reference = fuzzy_search(query, corpus, COLUMNS, args.top_n, args.cutoff)
+            t_reference = time.perf_counter() - start
+            start = time.perf_counter()
+            result = index.search(query, args.top_n, args.cutoff)
+            t_index = time.perf_counter() - start
+            start = time.perf_counter()
+            token_result = token_index.search(query, args.top_n, args.cutoff)
+            t_token = time.perf_counter() - start
+            same = [e["uuid"] for e in reference] == [e["uuid"] for e in result]
+            print(f"{size:>7} {query[:30]:<30} {t_reference * 1000:>14.1f} {t_index * 1000:>11.1f} "
+                  f"{t_reference / t_index if t_index else float('inf'):>7.1f} {'ja' if same else 'NEIN':>7} "
+                  f"{t_token * 1000:>11.1f} {len(token_result):>8}")
+
+
+if __name__ == "__main__":
+    main()
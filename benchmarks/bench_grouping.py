@@ -0,0 +1,121 @@
+# benchmarks/bench_grouping.py
+"""
+Vergleicht die Gruppierungsverfahren von group_stacks_by_xy_midpoint ("grid" und "cluster")
+in Genauigkeit und Laufzeit.
+
+Standardmäßig wird ein synthetisches Modell erzeugt: Schichtenstapel entlang einer Trasse,
+ein Teil davon liegt absichtlich wenige Millimeter neben einer Rastergrenze. Gemessen wird,
+wie viele Stapel exakt wiedergefunden, zerteilt oder mit anderen verschmolzen werden.
+Optional kann stattdessen ein echtes IFC-Modell gruppiert werden (nur Laufzeit und Stapelanzahl).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_grouping [--sizes 10000 100000] [--ifc modell.ifc]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.ifc_detectors.bbox_xyz_detector import (
+    BBOX_TABLE_DTYPE,
+    GROUPING_METHODS,
+    DEFAULT_XY_TOLERANCE,
+    group_stacks_by_xy_midpoint,
+)
+
+
+def make_synthetic_table(n_elements: int, tolerance: float, boundary_share: float, seed: int = 0):
+    """Erzeugt eine BBox-Tabelle mit bekannter Stapelzugehörigkeit (stack_of[guid])."""
+    rng = np.random.default_rng(seed)
+    layers_per_stack = rng.integers(4, 7, size=n_elements // 4 + 1)
+    n_stacks = int(np.searchsorted(np.cumsum(layers_per_stack), n_elements)) + 1
+    layers_per_stack = layers_per_stack[:n_stacks]
+
+    # Stapel im Abstand von 4 Toleranzen entlang einer Trasse, leicht seitlich versetzt
+    station = np.arange(n_stacks) * 4 * tolerance
+    centre_x = station + rng.uniform(-0.3, 0.3, n_stacks) * tolerance
+    centre_y = rng.integers(-3, 4, n_stacks) * 4 * tolerance + rng.uniform(-0.3, 0.3, n_stacks) * tolerance
+    on_boundary = rng.random(n_stacks) < boundary_share
+    centre_x[on_boundary] = (np.round(station[on_boundary] / tolerance) + 0.5) * tolerance
+
+    rows = []
+    stack_of = {}
+    for stack_id in range(n_stacks):
+        z = 0.0
+        for layer in range(layers_per_stack[stack_id]):
+            # Schichten desselben Stapels streuen um wenige Millimeter um den Stapelmittelpunkt
+            mx = centre_x[stack_id] + rng.normal(0, 0.004)
+            my = centre_y[stack_id] + rng.normal(0, 0.004)
+            half = rng.uniform(0.5, 2.0)
+            thickness = rng.uniform(0.02, 0.3)
+            guid = f"S{stack_id}L{layer}"
+            rows.append((guid, f"Schicht {layer}", "IfcBuildingElementProxy",
+                         mx - half, mx + half, my - half, my + half, z, z + thickness))
+            stack_of[guid] = stack_id
+            z += thickness
+    return np.array(rows, dtype=BBOX_TABLE_DTYPE), stack_of
+
+
+def score_stacks(stacks: list, stack_of: dict) -> dict:
+    """Zählt exakt gefundene, zerteilte und verschmolzene Stapel."""
+    true_sizes = {}
+    for stack_id in stack_of.values():
+        true_sizes[stack_id] = true_sizes.get(stack_id, 0) + 1
+    exact, merged = 0, 0
+    covered = {}
+    for stack in stacks:
+        ids = {stack_of[e['guid']] for e in stack['elements']}
+        if len(ids) > 1:
+            merged += 1
+        for stack_id in ids:
+            covered[stack_id] = covered.get(stack_id, 0) + 1
+        if len(ids) == 1 and stack['count'] == true_sizes[next(iter(ids))]:
+            exact += 1
+    split = sum(1 for n in covered.values() if n > 1)
+    return {'true': len(true_sizes), 'exact': exact, 'split': split, 'merged': merged}
+
+
+def run_synthetic(sizes, tolerance, boundary_share):
+    print(f"Synthetisch, Toleranz {tolerance} m, {boundary_share:.0%} der Stapel auf Rastergrenzen\n")
+    print(f"{'Elemente':>9} {'Verfahren':<8} {'Zeit [s]':>9} {'Stapel':>7} {'exakt':>7} {'zerteilt':>9} {'verschm.':>9}")
+    for n in sizes:
+        table, stack_of = make_synthetic_table(n, tolerance, boundary_share)
+        for method in GROUPING_METHODS:
+            start = time.perf_counter()
+            stacks = group_stacks_by_xy_midpoint(table, 0.01, tolerance, 1, grouping_method=method)
+            elapsed = time.perf_counter() - start
+            score = score_stacks(stacks, stack_of)
+            print(f"{len(table):>9} {method:<8} {elapsed:>9.3f} {score['true']:>7} "
+                  f"{score['exact']:>7} {score['split']:>9} {score['merged']:>9}")
+
+
+def run_ifc(ifc_path, tolerance, min_elements):
+    from src.ifc_detectors.bbox_xyz_detector import load_model_from_path, collect_element_bbox_details
+    model = load_model_from_path(ifc_path, message_callback=print)
+    if model is None:
+        raise SystemExit(1)
+    table = collect_element_bbox_details(model)
+    print(f"\n{len(table)} Elemente, Toleranz {tolerance} m, mind. {min_elements} Elemente pro Stapel")
+    for method in GROUPING_METHODS:
+        start = time.perf_counter()
+        stacks = group_stacks_by_xy_midpoint(table, 0.01, tolerance, min_elements, grouping_method=method)
+        print(f"  {method:<8} {time.perf_counter() - start:8.3f} s   {len(stacks)} Stapel")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_XY_TOLERANCE)
+    parser.add_argument("--boundary-share", type=float, default=0.2)
+    parser.add_argument("--ifc", help="Statt synthetischer Daten ein IFC-Modell gruppieren")
+    parser.add_argument("--min-elements", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.ifc:
+        run_ifc(args.ifc, args.tolerance, args.min_elements)
+    else:
+        run_synthetic(args.sizes, args.tolerance, args.boundary_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_label_filter.py
+"""
+Vergleicht die Label-Filterung von fetch_by_labels vorher (application_labels LIKE '%LABEL%',
+Full Table Scan) und nachher (Index-Lookup über die Zuordnungstabelle epd_labels).
+
+Gemessen wird auf einer Kopie der Datenbank, die echte Datenbank bleibt unverändert.
+Zusätzlich werden die Treffermengen verglichen: Abweichungen entstehen, wenn LIKE bei
+Labels mit gemeinsamem Präfix (z.B. HOCHBAU_*) falsch zuordnet. Abschließend wird geprüft,
+dass eine neu geschriebene EPD mit bisher unbekanntem Label sofort gefunden wird
+(Exit-Code 1, falls nicht).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bench_label_filter [--db pfad/zur/oekobaudat_epds.db] [--repeat 20]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from src.core.db_setup import get_connection, migrate
+from src.services.epd_service import EPDService
+from src.utils.constants import CONFIG_DIR, DB_FILE, LABELS_COLUMN_NAME, POSSIBLE_LABELS
+
+DISPLAY_COLUMNS = ['ref_year', 'valid_until', 'owner']
+LABEL_SETS = [
+    ["STRASSENBAU"],
+    ["HOCHBAU_TRAGWERK", "HOCHBAU_FASSADE"],
+    ["TIEFBAU", "BRUECKENBAU", "STRASSENBAU", "LANDSCHAFTSBAU_AUSSENANLAGEN"],
+    POSSIBLE_LABELS,
+]
+
+
+def fetch_by_labels_like(db_path: str, labels: list, columns: list) -> list:
+    """Bisherige Implementierung von EPDService.fetch_by_labels (Referenz)."""
+    with get_connection(db_path) as conn:
+        cols_sql = ", ".join(f'"{c}"' for c in ["uuid", "name"] + columns)
+        where = " OR ".join(f'"{LABELS_COLUMN_NAME}" LIKE ?' for _ in labels)
+        rows = conn.execute(f"SELECT {cols_sql} FROM epds WHERE {where}", [f"%{lbl}%" for lbl in labels]).fetchall()
+        return [dict(r) for r in rows]
+
+
+def _time(func, repeat: int) -> tuple[float, list]:
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(CONFIG_DIR, DB_FILE))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = os.path.join(tmp, "bench.db")
+        shutil.copyfile(args.db, db_copy)
+        service = EPDService(db_copy)
+
+        start = time.perf_counter()
+        conn = get_connection(db_copy)
+        version = migrate(conn)
+        conn.close()
+        print(f"Migration auf Schema {version} (inkl. Backfill epd_labels): {time.perf_counter() - start:.3f} s\n")
+
+        print(f"{'Labels':<58} {'LIKE [ms]':>10} {'Index [ms]':>11} {'Treffer':>8} {'nur LIKE':>9}")
+        for labels in LABEL_SETS:
+            t_like, like_rows = _time(lambda: fetch_by_labels_like(db_copy, labels, DISPLAY_COLUMNS), args.repeat)
+            t_index, index_rows = _time(lambda: service.fetch_by_labels(labels, DISPLAY_COLUMNS), args.repeat)
+            only_like = {r['uuid'] for r in like_rows} - {r['uuid'] for r in index_rows}
+            label_text = ", ".join(labels) if len(labels) < 5 else f"alle {len(labels)} Labels"
+            print(f"{label_text[:58]:<58} {t_like:>10.2f} {t_index:>11.2f} {len(index_rows):>8} {len(only_like):>9}")
+
+        # Unbekanntes Label: die Trigger müssen es beim Schreiben in epd_labels übernehmen
+        service.upsert_epds([{"uuid": "bench-neues-label", "name": "Bench", LABELS_COLUMN_NAME: "BENCH_NEUES_LABEL"}])
+        found = [r["uuid"] for r in service.fetch_by_labels(["BENCH_NEUES_LABEL"], [])]
+        print(f"\nNeues Label nach upsert_epds gefunden: {'ja' if found == ['bench-neues-label'] else 'NEIN'}")
+        service.close()
+        if found != ["bench-neues-label"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# src/core/bbox_cache.py
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from src.core.db_setup import get_connection
+
+# Spaltenreihenfolge der gespeicherten Zeilen (entspricht BBOX_TABLE_COLUMNS im Detektor)
+BBOX_COLUMNS = ("guid", "name", "ifc_class", "min_x", "max_x", "min_y", "max_y", "min_z", "max_z")
+
+
+class BBoxCache:
+    """
+    Persistenter Cache für die BBox-Tabellen einzelner IFC-Dateien (SQLite im CONFIG_DIR).
+
+    Ein Eintrag ist über den Inhalts-Hash der Datei, ihre Größe und die Geometrie-Settings
+    adressiert. Größe und mtime dienen zusätzlich als Schnellprüfung: solange beide unverändert
+    sind, wird der Hash nicht neu berechnet. Der Cache ist über die Gesamtzahl gespeicherter
+    Elemente begrenzt; bei Überschreitung werden die am längsten nicht genutzten Dateien verworfen.
+    """
+
+    def __init__(self, db_path: str, max_elements: int = 2_000_000):
+        self.db_path = str(db_path)
+        self.max_elements = max_elements
+        self._init_db()
+
+    def _init_db(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = get_connection(self.db_path)
+        try:
+            # WAL: parallele Batch-Worker lesen ohne Sperre, Schreiber warten bis zum Busy-Timeout
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                file_size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_key TEXT PRIMARY KEY,
+                element_count INTEGER,
+                last_access REAL
+            );
+            CREATE TABLE IF NOT EXISTS bboxes (
+                cache_key TEXT NOT NULL REFERENCES cache_entries(cache_key) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                guid TEXT,
+                name TEXT,
+                ifc_class TEXT,
+                min_x REAL, max_x REAL,
+                min_y REAL, max_y REAL,
+                min_z REAL, max_z REAL,
+                PRIMARY KEY (cache_key, seq)
+            ) WITHOUT ROWID;
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key_for_file(self, ifc_path: str, settings_key: str) -> str | None:
+        """
+        Liefert den Cache-Schlüssel für eine IFC-Datei oder None, wenn sie nicht lesbar ist.
+        Der Inhalts-Hash wird nur neu berechnet, wenn sich Größe oder mtime geändert haben.
+        """
+        try:
+            stat = os.stat(ifc_path)
+        except OSError:
+            return None
+        path = os.path.abspath(ifc_path)
+
+        conn = get_connection(self.db_path)
+        try:
+            row = conn.execute(
+                "SELECT content_hash FROM file_hashes WHERE path = ? AND file_size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+            if row:
+                content_hash = row["content_hash"]
+            else:
+                content_hash = self._hash_file(path)
+                conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes (path, file_size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, content_hash)
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+        return hashlib.sha256(f"{content_hash}|{stat.st_size}|{settings_key}".encode("utf-8")).hexdigest()
+
+    def load(self, cache_key: str | None) -> list | None:
+        """
+        Lädt die BBox-Zeilen (Tupel in BBOX_COLUMNS-Reihenfolge) eines Eintrags
+        in der ursprünglichen Reihenfolge oder None bei Cache-Miss.
+        """
+        if not cache_key:
+            return None
+        conn = get_connection(self.db_path)
+        try:
+            if conn.execute("SELECT 1 FROM cache_entries WHERE cache_key = ?", (cache_key,)).fetchone() is None:
+                return None
+            rows = conn.execute(
+                f"SELECT {', '.join(BBOX_COLUMNS)} FROM bboxes WHERE cache_key = ? ORDER BY seq",
+                (cache_key,)
+            ).fetchall()
+            conn.execute("UPDATE cache_entries SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key))
+            conn.commit()
+        finally:
+            conn.close()
+        return [tuple(row) for row in rows]
+
+    def store(self, cache_key: str | None, rows: list):
+        """
+        Speichert die BBox-Zeilen einer Datei (Tupel in BBOX_COLUMNS-Reihenfolge),
+        ersetzt einen vorhandenen Eintrag und räumt danach auf.
+        """
+        if not cache_key:
+            return
+        conn = get_connection(self.db_path)
+        try:
+            with conn:
+                conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,))
+                conn.execute(
+                    "INSERT INTO cache_entries (cache_key, element_count, last_access) VALUES (?, ?, ?)",
+                    (cache_key, len(rows), time.time())
+                )
+                conn.executemany(
+                    f"INSERT INTO bboxes (cache_key, seq, {', '.join(BBOX_COLUMNS)}) "
+                    f"VALUES (?, ?, {', '.join('?' for _ in BBOX_COLUMNS)})",
+                    ((cache_key, seq, *row) for seq, row in enumerate(rows))
+                )
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        """Verwirft die am längsten nicht genutzten Einträge, bis max_elements eingehalten ist."""
+        entries = conn.execute(
+            "SELECT cache_key, element_count FROM cache_entries ORDER BY last_access DESC"
+        ).fetchall()
+        total = 0
+        stale = []
+        for row in entries:
+            total += row["element_count"] or 0
+            # Der zuletzt genutzte Eintrag bleibt immer erhalten, auch wenn er allein zu groß ist
+            if total > self.max_elements and row is not entries[0]:
+                stale.append((row["cache_key"],))
+        if stale:
+            with conn:
+                conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", stale)
+
+    def clear(self):
+        conn = get_connection(self.db_path)
+        try:
+            with conn:
+                conn.execute("DELETE FROM cache_entries")
+                conn.execute("DELETE FROM file_hashes")
+        finally:
+            conn.close()
@@ -6,9 +6,18 @@ from src.utils.constants import (
     DEFAULT_TOP_N,
     DEFAULT_IFC_MIN_PROXY_THICKNESS,
     DEFAULT_IFC_XY_TOLERANCE,
-    DEFAULT_IFC_MIN_ELEMENTS_IN_STACK
+    DEFAULT_IFC_MIN_ELEMENTS_IN_STACK,
+    DEFAULT_IFC_NUM_WORKERS,
+    DEFAULT_IFC_GROUPING_METHOD,
+    DEFAULT_IFC_STREAMING_THRESHOLD_MB,
+    DEFAULT_IFC_ELEMENT_CLASSES,
+    DEFAULT_FUZZY_PARALLEL_THRESHOLD,
+    DEFAULT_FUZZY_NUM_WORKERS,
+    DEFAULT_FUZZY_SCORING
 )
 
+from src.utils.ifc_classes import parse_element_classes, format_element_classes
+
 DEFAULT_OPENAI_MODEL = "gpt-3.5-turbo" # Standardmodell
 
 class ConfigManager:
@@ -22,6 +31,13 @@ class ConfigManager:
             ("ifc_settings", "min_proxy_thickness"): str(DEFAULT_IFC_MIN_PROXY_THICKNESS),
             ("ifc_settings", "xy_tolerance"): str(DEFAULT_IFC_XY_TOLERANCE),
             ("ifc_settings", "min_elements_in_stack"): str(DEFAULT_IFC_MIN_ELEMENTS_IN_STACK),
+            ("ifc_settings", "num_workers"): str(DEFAULT_IFC_NUM_WORKERS),
+            ("ifc_settings", "grouping_method"): DEFAULT_IFC_GROUPING_METHOD,
+            ("ifc_settings", "streaming_threshold_mb"): str(DEFAULT_IFC_STREAMING_THRESHOLD_MB),
+            ("ifc_settings", "element_classes"): DEFAULT_IFC_ELEMENT_CLASSES,
+            ("search", "fuzzy_parallel_threshold"): str(DEFAULT_FUZZY_PARALLEL_THRESHOLD),
+            ("search", "fuzzy_num_workers"): str(DEFAULT_FUZZY_NUM_WORKERS),
+            ("search", "fuzzy_scoring"): DEFAULT_FUZZY_SCORING,
         }
         self._ensure_file()
 
@@ -107,4 +123,99 @@ class ConfigManager:
     @ifc_min_elements_in_stack.setter
     def ifc_min_elements_in_stack(self, v: int):
         self.cfg.set("ifc_settings", "min_elements_in_stack", str(v))
-        self.save()
\ No newline at end of file
+        self.save()
+
+    @property
+    def ifc_num_workers(self) -> int:
+        try:
+            return self.cfg.getint("ifc_settings", "num_workers")
+        except ValueError:
+            return int(self.defaults[("ifc_settings","num_workers")])
+
+    @ifc_num_workers.setter
+    def ifc_num_workers(self, v: int):
+        self.cfg.set("ifc_settings", "num_workers", str(v))
+        self.save()
+
+    @property
+    def ifc_grouping_method(self) -> str:
+        return self.cfg.get("ifc_settings", "grouping_method",
+                            fallback=self.defaults[("ifc_settings","grouping_method")])
+
+    @ifc_grouping_method.setter
+    def ifc_grouping_method(self, v: str):
+        self.cfg.set("ifc_settings", "grouping_method", v)
+        self.save()
+
+    @property
+    def ifc_streaming_threshold_mb(self) -> int:
+        try:
+            return self.cfg.getint("ifc_settings", "streaming_threshold_mb")
+        except ValueError:
+            return int(self.defaults[("ifc_settings","streaming_threshold_mb")])
+
+    @ifc_streaming_threshold_mb.setter
+    def ifc_streaming_threshold_mb(self, v: int):
+        self.cfg.set("ifc_settings", "streaming_threshold_mb", str(v))
+        self.save()
+
+    @property
+    def ifc_element_classes(self) -> dict:
+        """
+        Analysierte IFC-Klassen als {Klasse: Mindestdicke oder None}.
+        Format in der INI: "IfcBuildingElementProxy, IfcCourse:0.02, IfcSlab:0.05".
+        """
+        raw = self.cfg.get("ifc_settings", "element_classes",
+                           fallback=self.defaults[("ifc_settings","element_classes")])
+        return parse_element_classes(raw)
+
+    @ifc_element_classes.setter
+    def ifc_element_classes(self, classes: dict):
+        self.cfg.set("ifc_settings", "element_classes", format_element_classes(classes))
+        self.save()
+
+    @property
+    def fuzzy_parallel_threshold(self) -> int:
+        """
+        Ab dieser Anzahl EPDs läuft die Fuzzy-Suche parallel in Worker-Prozessen (0 = nie).
+        Gilt nur für fuzzy_scoring = "substring"; die Wortmengen-Bewertung ist vektorisiert
+        und läuft immer seriell.
+        """
+        try:
+            return self.cfg.getint("search", "fuzzy_parallel_threshold")
+        except ValueError:
+            return int(self.defaults[("search","fuzzy_parallel_threshold")])
+
+    @fuzzy_parallel_threshold.setter
+    def fuzzy_parallel_threshold(self, v: int):
+        self.cfg.set("search", "fuzzy_parallel_threshold", str(v))
+        self.save()
+
+    @property
+    def fuzzy_num_workers(self) -> int:
+        """Worker-Prozesse der parallelen Teilstring-Suche (0 = CPU-Kerne - 1), siehe fuzzy_parallel_threshold."""
+        try:
+            return self.cfg.getint("search", "fuzzy_num_workers")
+        except ValueError:
+            return int(self.defaults[("search","fuzzy_num_workers")])
+
+    @fuzzy_num_workers.setter
+    def fuzzy_num_workers(self, v: int):
+        self.cfg.set("search", "fuzzy_num_workers", str(v))
+        self.save()
+
+    @property
+    def fuzzy_scoring(self) -> str:
+        """
+        Bewertung der Stichwortsuche im EPD-Tab: "token" (normalisierte Wortmengen mit
+        Kompositazerlegung) oder "substring" (längster gemeinsamer Teilstring). Bestimmt die
+        Rangfolge jeder Stichwortsuche; die FTS5-Volltextsuche dient nur als Rückfall ohne Treffer.
+        """
+        value = self.cfg.get("search", "fuzzy_scoring", fallback=self.defaults[("search","fuzzy_scoring")])
+        value = value.strip().lower()
+        return value if value in ("token", "substring") else self.defaults[("search","fuzzy_scoring")]
+
+    @fuzzy_scoring.setter
+    def fuzzy_scoring(self, v: str):
+        self.cfg.set("search", "fuzzy_scoring", v)
+        self.save()
@@ -1,30 +1,131 @@
 # core/db_setup.py
+import json
+import re
 import sqlite3
+import threading
 from pathlib import Path
 
-def get_connection(db_path: str) -> sqlite3.Connection:
+from src.utils.constants import (
+    FTS_TABLE_NAME,
+    INDICATORS_TABLE_NAME,
+    INDICATOR_VALUES_TABLE_NAME,
+    DATA_VERSION_TABLE_NAME,
+    RELEVANT_COLUMNS_FOR_LLM_CONTEXT,
+    LABELS_COLUMN_NAME,
+    LABELS_TABLE_NAME,
+    POSSIBLE_LABELS
+)
+
+# Volltext-indizierte Spalten der Tabelle epds
+FTS_COLUMNS = tuple(RELEVANT_COLUMNS_FOR_LLM_CONTEXT)
+
+# Wartezeit auf Schreibsperren anderer Verbindungen, bevor "database is locked" gemeldet wird
+BUSY_TIMEOUT_MS = 10_000
+
+
+def get_connection(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
     """
     Öffnet eine SQLite-Verbindung mit Foreign-Keys und Row-Factory.
     """
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
+    # Damit INSERT OR REPLACE die DELETE-Trigger (z.B. des Volltextindex) auslöst
+    conn.execute("PRAGMA recursive_triggers = ON;")
     return conn
 
+
+class ConnectionPool:
+    """
+    Langlebige SQLite-Verbindungen, eine pro Thread und Datenbank, statt connect() pro Abfrage.
+
+    Die Verbindungen laufen im WAL-Modus: Leser (z.B. GUI-Thread) und ein Schreiber
+    (z.B. Import- oder Analyse-Worker) blockieren sich nicht gegenseitig, konkurrierende
+    Schreiber warten bis BUSY_TIMEOUT_MS statt sofort "database is locked" zu melden.
+    Nutzung wie bisher: `with pool.connection() as conn:` committet bzw. rollt zurück,
+    schließt die Verbindung aber nicht.
+    """
+
+    PRAGMAS = (
+        "PRAGMA synchronous = NORMAL",   # im WAL-Modus sicher, spart fsync pro Commit
+        "PRAGMA mmap_size = 268435456",  # 256 MB Memory-Mapped I/O
+        "PRAGMA cache_size = -65536",    # 64 MB Seiten-Cache pro Verbindung
+        "PRAGMA temp_store = MEMORY",
+        f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    )
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []  # (thread, conn) – für close_all und das Aufräumen beendeter Threads
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False nur, damit close_all() aus einem anderen Thread schließen darf;
+        # genutzt wird jede Verbindung ausschließlich von ihrem Thread
+        conn = get_connection(self.db_path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")  # persistent in der Datei
+        except sqlite3.OperationalError:
+            pass  # z.B. schreibgeschützte Datenbank: im bisherigen Journal-Modus weiterarbeiten
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            alive = []
+            for thread, other in self._connections:
+                if thread.is_alive():
+                    alive.append((thread, other))
+                else:
+                    other.close()
+            alive.append((threading.current_thread(), conn))
+            self._connections = alive
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
 def init_db(db_path: str):
     """
-    Legt nötige Tabellen an (falls noch nicht vorhanden):
+    Bringt die Datenbank auf den aktuellen Schemastand (siehe MIGRATIONS):
       - epds
       - epd_environmental_indicators
+      - Indizes für owner, ref_year, valid_until, classification_path
+      - epds_fts (FTS5-Volltextindex)
+      - epd_labels (Label-Zuordnung)
+      - epd_indicator_values (LCIA-Werte spaltenweise)
+      - epds.content_hash / source_version (Delta-Abgleich des Offline-Imports)
+      - epd_data_version (Änderungszähler für epds, siehe bump_data_version)
     """
     # sicherstellen, dass der Pfad existiert
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
     conn = get_connection(db_path)
-    cur = conn.cursor()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
 
+# ———————— Migrationen ————————
+# Jede Migration läuft in einer eigenen Transaktion und setzt danach PRAGMA user_version auf ihre
+# Nummer. Bereits ausgelieferte Migrationen nie ändern, sondern neue hinten anhängen.
+# Die Schritte sind idempotent geschrieben, da Datenbanken aus Versionen vor der
+# Versionierung (user_version 0) Tabellen wie epds_fts oder epd_labels schon haben können.
+
+def _m001_base_schema(conn: sqlite3.Connection):
     # --- Tabelle epds (Grundschema, bitte ggf. anpassen) ---
-    cur.execute("""
+    conn.execute("""
     CREATE TABLE IF NOT EXISTS epds (
         uuid TEXT PRIMARY KEY,
         name TEXT,
@@ -44,7 +145,7 @@ def init_db(db_path: str):
     """)
 
     # --- Tabelle für die JSON-Umweltdaten ---
-    cur.execute("""
+    conn.execute("""
     CREATE TABLE IF NOT EXISTS epd_environmental_indicators (
         uuid TEXT PRIMARY KEY,
         lcia_results_json TEXT,
@@ -55,5 +156,397 @@ def init_db(db_path: str):
     )
     """)
 
-    conn.commit()
-    conn.close()
+
+def _m002_performance_indexes(conn: sqlite3.Connection):
+    for column in ("owner", "ref_year", "valid_until", "classification_path"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_epds_{column} ON epds({column})")
+
+
+def _m003_fts_index(conn: sqlite3.Connection):
+    # Ohne FTS5 gilt die Migration trotzdem als erledigt, damit die folgenden laufen;
+    # EPDService._ensure_schema legt den Index an, sobald FTS5 verfügbar ist
+    if not create_fts_index(conn):
+        print("WARNUNG: SQLite ohne FTS5 – Volltextsuche nicht verfügbar, Fuzzy-Suche wird genutzt.")
+
+
+def _m004_labels_table(conn: sqlite3.Connection):
+    create_labels_table(conn)
+
+
+def _m005_indicator_values(conn: sqlite3.Connection):
+    create_indicator_values_table(conn)
+
+
+def _m006_content_hash(conn: sqlite3.Connection):
+    # Inhalts-Hash und Datensatzversion je EPD für den Delta-Abgleich des Offline-Imports
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(epds)")}
+    for column in ("content_hash", "source_version"):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE epds ADD COLUMN {column} TEXT")
+    # Volltext-Trigger auf die indizierten Spalten einschränken (Hash-Updates nicht neu indizieren)
+    if table_exists(conn, FTS_TABLE_NAME):
+        conn.execute("DROP TRIGGER IF EXISTS epds_fts_au")
+        _create_fts_update_trigger(conn)
+
+
+def _m007_data_version(conn: sqlite3.Connection):
+    # Änderungszähler: EPDService.upsert_epds/delete_epds erhöhen version einmal pro Aufruf
+    # (bump_data_version); database_id unterscheidet Datenbanken, deren Zähler gleich stehen.
+    # Bewusst ohne Zeilen-Trigger, die Bulk-Importe spürbar verlangsamen würden
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE_NAME} (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        database_id TEXT NOT NULL,
+        version INTEGER NOT NULL
+    )""")
+    conn.execute(
+        f"INSERT OR IGNORE INTO {DATA_VERSION_TABLE_NAME} (id, database_id, version) "
+        f"VALUES (1, lower(hex(randomblob(8))), 0)"
+    )
+
+
+def _m008_label_triggers(conn: sqlite3.Connection):
+    # Die Label-Trigger aus Migration 4 ordneten nur bereits in epd_label_names bekannte Labels zu;
+    # neu anlegen und dabei verlorene Zuordnungen aus application_labels nachholen
+    if table_exists(conn, LABELS_TABLE_NAME):
+        conn.execute("DROP TRIGGER IF EXISTS epd_labels_ai")
+        conn.execute("DROP TRIGGER IF EXISTS epd_labels_au")
+        _create_labels_triggers(conn)
+        rebuild_labels_table(conn)
+
+
+def bump_data_version(conn: sqlite3.Connection):
+    """Erhöht den Änderungszähler von epds (in der Transaktion des Schreibvorgangs aufrufen)."""
+    if table_exists(conn, DATA_VERSION_TABLE_NAME):
+        conn.execute(f"UPDATE {DATA_VERSION_TABLE_NAME} SET version = version + 1 WHERE id = 1")
+
+
+MIGRATIONS = [
+    (1, "Grundschema epds / epd_environmental_indicators", _m001_base_schema),
+    (2, "Indizes owner, ref_year, valid_until, classification_path", _m002_performance_indexes),
+    (3, "FTS5-Volltextindex epds_fts", _m003_fts_index),
+    (4, "Label-Zuordnung epd_labels", _m004_labels_table),
+    (5, "LCIA-Werte spaltenweise epd_indicator_values", _m005_indicator_values),
+    (6, "content_hash / source_version in epds", _m006_content_hash),
+    (7, "Änderungszähler epd_data_version", _m007_data_version),
+    (8, "Label-Trigger registrieren unbekannte Labels", _m008_label_triggers),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, message_callback=None) -> int:
+    """
+    Wendet alle ausstehenden Migrationen der Reihe nach transaktional an und aktualisiert
+    anschließend die Statistiken des Query-Planers (ANALYZE). Schlägt eine Migration fehl,
+    wird nur sie zurückgerollt; die Datenbank bleibt auf dem Stand der letzten erfolgreichen.
+    Gibt die erreichte Schemaversion zurück.
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return schema_version(conn)
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # Transaktionen explizit steuern, auch für DDL
+    try:
+        for number, description, apply in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            # Erst innerhalb der Schreibsperre prüfen, falls ein anderer Prozess parallel migriert
+            if schema_version(conn) >= number:
+                conn.execute("COMMIT")
+                continue
+            try:
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if message_callback:
+                message_callback(f"DB-Migration {number}: {description}")
+        conn.execute("ANALYZE")
+    finally:
+        conn.isolation_level = previous_isolation
+    return schema_version(conn)
+
+
+def fts_tokenizer(conn: sqlite3.Connection) -> str:
+    """
+    Bevorzugt den trigram-Tokenizer (SQLite >= 3.34, Teilwort-Treffer wie bei der Fuzzy-Suche),
+    sonst unicode61 ohne Diakritika; dort wird mit Präfix-Abfragen gesucht.
+    """
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts_probe")
+        return "trigram"
+    except sqlite3.OperationalError:
+        return "unicode61 remove_diacritics 2"
+
+
+def create_fts_index(conn: sqlite3.Connection) -> bool:
+    """
+    Legt den FTS5-Index über FTS_COLUMNS samt Triggern an, die ihn bei INSERT/UPDATE/DELETE
+    auf epds synchron halten, und befüllt ihn beim ersten Anlegen aus dem Bestand.
+    Die uuid wird (nicht indiziert) mitgespeichert, damit Treffer auch nach einem VACUUM,
+    das implizite rowids neu vergeben kann, eindeutig zugeordnet bleiben.
+    Gibt False zurück, wenn FTS5 in dieser SQLite-Version nicht verfügbar ist.
+    """
+    if table_exists(conn, FTS_TABLE_NAME):
+        return True
+
+    tokenizer = fts_tokenizer(conn)
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    prefix = "" if tokenizer == "trigram" else ", prefix='2 3'"
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE_NAME} USING fts5("
+            f"uuid UNINDEXED, {cols}, tokenize='{tokenizer}'{prefix})"
+        )
+    except sqlite3.OperationalError:
+        return False  # z.B. SQLite ohne FTS5
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS epds_fts_ai AFTER INSERT ON epds BEGIN
+        INSERT INTO {FTS_TABLE_NAME} (rowid, uuid, {cols}) VALUES (new.rowid, new.uuid, {new_cols});
+    END""")
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS epds_fts_ad AFTER DELETE ON epds BEGIN
+        DELETE FROM {FTS_TABLE_NAME} WHERE rowid = old.rowid;
+    END""")
+    _create_fts_update_trigger(conn)
+    rebuild_fts_index(conn)
+    return True
+
+
+def _create_fts_update_trigger(conn: sqlite3.Connection):
+    """
+    Aktualisiert den Volltextindex nur, wenn sich eine indizierte Spalte (oder die uuid) ändert,
+    nicht bei reinen Verwaltungsupdates wie content_hash.
+    """
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS epds_fts_au AFTER UPDATE OF uuid, {cols} ON epds BEGIN
+        DELETE FROM {FTS_TABLE_NAME} WHERE rowid = old.rowid;
+        INSERT INTO {FTS_TABLE_NAME} (rowid, uuid, {cols}) VALUES (new.rowid, new.uuid, {new_cols});
+    END""")
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def rebuild_fts_index(conn: sqlite3.Connection):
+    """Befüllt den Volltextindex komplett neu aus epds (z.B. nach VACUUM oder Massenimport)."""
+    cols = ", ".join(FTS_COLUMNS)
+    conn.execute(f"DELETE FROM {FTS_TABLE_NAME}")
+    conn.execute(f"INSERT INTO {FTS_TABLE_NAME} (rowid, uuid, {cols}) SELECT rowid, uuid, {cols} FROM epds")
+
+
+
+# Trennzeichen in application_labels ("A,B", "A; B", '["A", "B"]' ...); in SQL identisch nachgebildet
+_LABEL_SEPARATORS = "[]\"';|, \t\n"
+_LABEL_SPLIT = re.compile("[" + re.escape(_LABEL_SEPARATORS) + "]+")
+
+
+def split_labels(raw) -> list:
+    """Zerlegt einen application_labels-Wert in einzelne Labels (Großschreibung, ohne Duplikate)."""
+    if not raw:
+        return []
+    return list(dict.fromkeys(part.upper() for part in _LABEL_SPLIT.split(str(raw)) if part))
+
+
+def _sql_normalized_labels(expr: str) -> str:
+    """SQL-Ausdruck: expr in Großbuchstaben mit allen Trennzeichen als Komma, umrahmt von Kommas."""
+    for sep in _LABEL_SEPARATORS:
+        if sep != ",":
+            expr = f"replace({expr}, char({ord(sep)}), ',')"
+    return f"',' || upper({expr}) || ','"
+
+
+def create_labels_table(conn: sqlite3.Connection) -> bool:
+    """
+    Legt die Zuordnungstabelle epd_labels (uuid, label) an, deren Primärschlüssel (label, uuid)
+    die Label-Filterung per Index erlaubt, und befüllt sie beim ersten Anlegen aus application_labels.
+    Trigger halten sie bei INSERT/UPDATE von epds synchron (siehe _create_labels_triggers).
+    Gibt False zurück, wenn die Tabelle bereits existierte.
+    """
+    if table_exists(conn, LABELS_TABLE_NAME):
+        return False
+
+    conn.execute(f"""
+    CREATE TABLE {LABELS_TABLE_NAME} (
+        uuid TEXT NOT NULL REFERENCES epds(uuid) ON DELETE CASCADE,
+        label TEXT NOT NULL,
+        PRIMARY KEY (label, uuid)
+    ) WITHOUT ROWID""")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{LABELS_TABLE_NAME}_uuid ON {LABELS_TABLE_NAME}(uuid)")
+    conn.execute("CREATE TABLE IF NOT EXISTS epd_label_names (label TEXT PRIMARY KEY) WITHOUT ROWID")
+    _create_labels_triggers(conn)
+    rebuild_labels_table(conn)
+    return True
+
+
+def _sql_labels_json(expr: str) -> str:
+    """
+    SQL-Ausdruck: die Labels aus expr als JSON-Array für json_each (mit leeren Einträgen).
+    Ungültiges JSON (z.B. Steuerzeichen im Label) ergibt ein leeres Array statt eines Fehlers.
+    """
+    normalized = _sql_normalized_labels(f"replace({expr}, '\\', '\\\\')")
+    array = f"""'["' || replace({normalized}, ',', '","') || '"]'"""
+    return f"(CASE WHEN json_valid({array}) THEN {array} ELSE '[]' END)"
+
+
+def _create_labels_triggers(conn: sqlite3.Connection):
+    """
+    Trigger, die epd_labels bei INSERT/UPDATE von epds nachführen. Die Labels werden wie in
+    split_labels als ganze Wörter zerlegt (kein Präfix-Fehltreffer wie bei LIKE); bisher
+    unbekannte Labels kommen dabei auch in das Label-Verzeichnis epd_label_names.
+    """
+    labels_json = _sql_labels_json(f'new."{LABELS_COLUMN_NAME}"')
+    insert_labels = f"""
+        INSERT OR IGNORE INTO epd_label_names (label)
+        SELECT value FROM json_each({labels_json}) WHERE value <> '';
+        INSERT OR IGNORE INTO {LABELS_TABLE_NAME} (uuid, label)
+        SELECT new.uuid, value FROM json_each({labels_json}) WHERE value <> '';"""
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS epd_labels_ai AFTER INSERT ON epds BEGIN{insert_labels}
+    END""")
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS epd_labels_au AFTER UPDATE OF uuid, "{LABELS_COLUMN_NAME}" ON epds BEGIN
+        DELETE FROM {LABELS_TABLE_NAME} WHERE uuid = old.uuid;{insert_labels}
+    END""")
+
+
+def rebuild_labels_table(conn: sqlite3.Connection):
+    """
+    Befüllt epd_labels (und das Label-Verzeichnis epd_label_names) komplett neu aus application_labels,
+    z.B. nach einem Import mit bisher unbekannten Labels.
+    """
+    rows = conn.execute(f'SELECT uuid, "{LABELS_COLUMN_NAME}" FROM epds').fetchall()
+    pairs = [(row[0], label) for row in rows for label in split_labels(row[1])]
+    conn.execute(f"DELETE FROM {LABELS_TABLE_NAME}")
+    conn.executemany(f"INSERT OR IGNORE INTO {LABELS_TABLE_NAME} (uuid, label) VALUES (?, ?)", pairs)
+    conn.executemany(
+        "INSERT OR IGNORE INTO epd_label_names (label) VALUES (?)",
+        [(label,) for label in {*POSSIBLE_LABELS, *(label for _, label in pairs)}]
+    )
+
+
+# Schlüssel innerhalb eines LCIA-Indikators, die kein Modul, sondern die Einheit angeben
+_UNIT_KEYS = ("unit", "Unit", "einheit", "Einheit")
+
+
+def _to_float(value) -> float | None:
+    """Zahl aus LCIA-Werten wie 1.2, "1.2E-3" oder "1,2"; None für leere/nicht numerische Werte."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def flatten_lcia(lcia) -> list:
+    """
+    Zerlegt LCIA-Ergebnisse {Indikator: {Modul: Wert, "unit": ...}} in Zeilen
+    (indicator, module, value, unit). Nicht numerische Werte werden übersprungen.
+    """
+    if not isinstance(lcia, dict):
+        return []
+    rows = []
+    for indicator, modules in lcia.items():
+        if not isinstance(modules, dict):
+            continue
+        unit = next((str(modules[k]) for k in _UNIT_KEYS if modules.get(k)), None)
+        for module, raw in modules.items():
+            if module in _UNIT_KEYS:
+                continue
+            value = _to_float(raw)
+            if value is not None:
+                rows.append((str(indicator), str(module), value, unit))
+    return rows
+
+
+def create_indicator_values_table(conn: sqlite3.Connection) -> bool:
+    """
+    Legt epd_indicator_values (uuid, indicator, module, value, unit) an und befüllt sie aus den
+    vorhandenen lcia_results_json. Der Primärschlüssel (uuid, indicator, module) liefert die Werte
+    vieler EPDs per Index, der Index (indicator, module, value, uuid) deckt Aggregationen und
+    Rangfolgen je Indikator/Modul ab, ohne die Tabelle selbst zu lesen.
+    Gibt False zurück, wenn die Tabelle bereits existierte.
+    """
+    if table_exists(conn, INDICATOR_VALUES_TABLE_NAME):
+        return False
+
+    conn.execute(f"""
+    CREATE TABLE {INDICATOR_VALUES_TABLE_NAME} (
+        uuid TEXT NOT NULL REFERENCES {INDICATORS_TABLE_NAME}(uuid) ON DELETE CASCADE,
+        indicator TEXT NOT NULL,
+        module TEXT NOT NULL,
+        value REAL,
+        unit TEXT,
+        PRIMARY KEY (uuid, indicator, module)
+    ) WITHOUT ROWID""")
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{INDICATOR_VALUES_TABLE_NAME}_indicator "
+        f"ON {INDICATOR_VALUES_TABLE_NAME}(indicator, module, value, uuid)"
+    )
+    rebuild_indicator_values(conn)
+    return True
+
+
+def replace_indicator_values(conn: sqlite3.Connection, uuid: str, lcia) -> int:
+    """Ersetzt die Indikatorwerte einer EPD (innerhalb der Transaktion des Aufrufers)."""
+    return replace_indicator_values_many(conn, [(uuid, lcia)])
+
+
+def replace_indicator_values_many(conn: sqlite3.Connection, items) -> int:
+    """
+    Ersetzt die Indikatorwerte vieler EPDs, items = [(uuid, lcia), ...], mit je einem
+    executemany für DELETE und INSERT (innerhalb der Transaktion des Aufrufers).
+    Gibt die Anzahl geschriebener Werte zurück.
+    """
+    items = list(items)
+    conn.executemany(f"DELETE FROM {INDICATOR_VALUES_TABLE_NAME} WHERE uuid = ?", [(uuid,) for uuid, _ in items])
+    rows = [(uuid, *row) for uuid, lcia in items for row in flatten_lcia(lcia)]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {INDICATOR_VALUES_TABLE_NAME} (uuid, indicator, module, value, unit) "
+        f"VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    return len(rows)
+
+
+def rebuild_indicator_values(conn: sqlite3.Connection) -> int:
+    """
+    Befüllt epd_indicator_values komplett neu aus lcia_results_json (Backfill, z.B. nach einem
+    Import, der nur die JSON-Spalten geschrieben hat). Gibt die Anzahl geschriebener Werte zurück.
+    """
+    conn.execute(f"DELETE FROM {INDICATOR_VALUES_TABLE_NAME}")
+    count = 0
+    cur = conn.execute(f"SELECT uuid, lcia_results_json FROM {INDICATORS_TABLE_NAME}")
+    while True:
+        batch = cur.fetchmany(500)
+        if not batch:
+            break
+        rows = []
+        for uuid, raw in batch:
+            try:
+                lcia = json.loads(raw) if raw else None
+            except ValueError:
+                continue  # defektes JSON: EPD bleibt ohne spaltenweise Werte
+            rows.extend((uuid, *row) for row in flatten_lcia(lcia))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {INDICATOR_VALUES_TABLE_NAME} (uuid, indicator, module, value, unit) "
+            f"VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        count += len(rows)
+    return count
@@ -0,0 +1,61 @@
+# src/epd_import.py
+"""
+Kommandozeilen-Import der ÖKOBAUDAT aus einem lokalen ILCD-Export (Zip oder Verzeichnis)
+in die EPD-Datenbank. Prozessdatensätze werden parallel geparst; unveränderte Datensätze
+(gleicher Inhalts-Hash wie beim letzten Import) werden übersprungen, ein abgebrochener
+Import kann daher einfach erneut gestartet werden. Mit --delete-missing wird die Datenbank
+vollständig mit dem Export abgeglichen, --changes schreibt die Änderungsliste als JSON.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m src.epd_import OEKOBAUDAT_export.zip [--db pfad/zur/oekobaudat_epds.db] [--jobs 4]
+                             [--force] [--delete-missing] [--changes aenderungen.json]
+"""
+import argparse
+import json
+import os
+import sys
+
+from src.core.db_setup import init_db
+from src.services.epd_import_service import EPDImportService, IMPORT_BATCH_SIZE
+from src.services.epd_service import EPDService
+from src.utils.constants import CONFIG_DIR, DB_FILE
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="ILCD-Export als Zip-Datei oder Verzeichnis")
+    parser.add_argument("--db", default=os.path.join(CONFIG_DIR, DB_FILE), help="Ziel-Datenbank")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parse-Prozesse")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="EPDs pro Transaktion")
+    parser.add_argument("--force", action="store_true", help="Auch unveränderte Datensätze neu importieren")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="Importierte EPDs löschen, die im Export nicht mehr enthalten sind")
+    parser.add_argument("--changes", help="Änderungsliste (inserted/updated/deleted) als JSON-Datei schreiben")
+    args = parser.parse_args(argv)
+
+    init_db(args.db)
+    epd_service = EPDService(args.db)
+    try:
+        importer = EPDImportService(epd_service, jobs=args.jobs, batch_size=args.batch_size)
+        stats = importer.import_export(
+            args.source,
+            force=args.force,
+            delete_missing=args.delete_missing,
+            message_callback=lambda msg: print(msg, file=sys.stderr)
+        )
+    except FileNotFoundError as e:
+        print(f"FEHLER: {e}", file=sys.stderr)
+        return 1
+    finally:
+        epd_service.close()
+
+    if args.changes:
+        with open(args.changes, "w", encoding="utf-8") as f:
+            json.dump(stats["changes"], f, ensure_ascii=False, indent=2)
+    for error in stats["errors"]:
+        print(f"FEHLER  {error}", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
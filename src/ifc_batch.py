@@ -0,0 +1,227 @@
+# src/ifc_batch.py
+"""
+Kommandozeilen-Batchanalyse: Stapelerkennung für viele IFC-Dateien ohne GUI (z.B. nächtlich auf
+einem Linux-Server ohne Display). Jede Datei wird in einem eigenen Prozess des Pools analysiert.
+
+Ausgabe:
+  *.jsonl    – eine Zeile pro Stapel (Datei, Stapelnummer, Mittelpunkt, Elemente)
+  *.parquet  – spaltenweise, eine Zeile pro Element (benötigt pyarrow)
+Laufzeit und Stapelanzahl je Datei werden auf stderr ausgegeben.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m src.ifc_batch modelle/ weitere.ifc -o stapel.jsonl [--jobs 4] [--cache]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from src.utils.constants import (
+    CONFIG_DIR,
+    BBOX_CACHE_FILE,
+    BBOX_CACHE_MAX_ELEMENTS,
+    DEFAULT_IFC_MIN_PROXY_THICKNESS,
+    DEFAULT_IFC_XY_TOLERANCE,
+    DEFAULT_IFC_MIN_ELEMENTS_IN_STACK,
+    DEFAULT_IFC_NUM_WORKERS,
+    DEFAULT_IFC_GROUPING_METHOD,
+    DEFAULT_IFC_STREAMING_THRESHOLD_MB,
+    DEFAULT_IFC_ELEMENT_CLASSES
+)
+from src.utils.ifc_classes import parse_element_classes
+
+OUTPUT_FORMATS = ("jsonl", "parquet")
+
+
+def find_ifc_files(inputs) -> list:
+    """Dateien direkt übernehmen, Verzeichnisse rekursiv nach *.ifc durchsuchen (sortiert, ohne Duplikate)."""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() == ".ifc"))
+        else:
+            files.append(path)
+    seen = set()
+    unique = []
+    for path in files:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(str(path))
+    return unique
+
+
+def analyse_file(ifc_path: str, service_kwargs: dict, cache_path: str | None, verbose: bool) -> dict:
+    """
+    Analysiert eine Datei (läuft im Worker-Prozess). Fehler werden nicht ausgelöst,
+    sondern im Ergebnis gemeldet, damit ein defektes Modell den Batch nicht abbricht.
+    """
+    from src.core.bbox_cache import BBoxCache
+    from src.services.ifc_service import IFCService
+
+    name = os.path.basename(ifc_path)
+    messages = []
+
+    def message_cb(msg):
+        messages.append(msg)
+        if verbose:
+            print(f"[{name}] {msg.strip()}", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    try:
+        bbox_cache = None
+        if cache_path:
+            try:
+                bbox_cache = BBoxCache(cache_path, max_elements=BBOX_CACHE_MAX_ELEMENTS)
+            except Exception as e:  # Cache-Fehler betreffen nur den Cache, nicht die Analyse
+                message_cb(f"Warnung: BBox-Cache nicht verfügbar, extrahiere ohne Cache: {e}")
+        service = IFCService(bbox_cache=bbox_cache, **service_kwargs)
+        stacks = service.analyse(ifc_path, message_cb=message_cb)
+        element_count = len(service.last_bbox_table) if service.has_element_table else 0
+        # analyse() liefert bei nicht ladbarem Modell eine leere Liste ohne Exception
+        error = None if service.has_element_table else next(
+            (m for m in messages if m.startswith("FEHLER")), "IFC-Modell konnte nicht geladen werden.")
+    except Exception as e:
+        stacks, element_count, error = [], 0, f"{type(e).__name__}: {e}"
+    return {
+        'file': ifc_path,
+        'stacks': stacks,
+        'element_count': element_count,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+class JsonlStackWriter:
+    """Schreibt eine JSON-Zeile pro Stapel; '-' schreibt auf stdout."""
+
+    def __init__(self, path: str):
+        self.f = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, ifc_path: str, stacks: list):
+        for stack_index, stack in enumerate(stacks):
+            record = {'file': ifc_path, 'stack_index': stack_index, **stack}
+            self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class ParquetStackWriter:
+    """Schreibt eine Zeile pro Element (flach, spaltenweise) als Parquet; eine Row-Group pro Datei."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet-Ausgabe benötigt pyarrow (pip install pyarrow) – alternativ .jsonl verwenden.")
+        self.pa = pa
+        self.schema = pa.schema([
+            ('file', pa.string()), ('stack_index', pa.int32()),
+            ('approx_mid_x', pa.float64()), ('approx_mid_y', pa.float64()), ('stack_count', pa.int32()),
+            ('guid', pa.string()), ('name', pa.string()), ('ifc_class', pa.string()),
+            ('min_z', pa.float64()), ('max_z', pa.float64()), ('thickness_global_bbox', pa.float64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, ifc_path: str, stacks: list):
+        columns = {field.name: [] for field in self.schema}
+        for stack_index, stack in enumerate(stacks):
+            for element in stack['elements']:
+                columns['file'].append(ifc_path)
+                columns['stack_index'].append(stack_index)
+                columns['approx_mid_x'].append(stack['approx_mid_x'])
+                columns['approx_mid_y'].append(stack['approx_mid_y'])
+                columns['stack_count'].append(stack['count'])
+                for key in ('guid', 'name', 'ifc_class', 'min_z', 'max_z', 'thickness_global_bbox'):
+                    columns[key].append(element[key])
+        if columns['file']:
+            self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _make_writer(output: str, output_format: str | None):
+    if output_format is None:
+        output_format = "parquet" if output.lower().endswith(".parquet") else "jsonl"
+    return ParquetStackWriter(output) if output_format == "parquet" else JsonlStackWriter(output)
+
+
+def _element_classes_arg(raw: str) -> dict:
+    """argparse-Typ für --classes: streng geparst wie im Einstellungsdialog (Tippfehler = Abbruch)."""
+    try:
+        return parse_element_classes(raw, strict=True)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="IFC-Dateien und/oder Verzeichnisse")
+    parser.add_argument("-o", "--output", default="-", help="Ausgabedatei (.jsonl oder .parquet, '-' = stdout)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Ausgabeformat (Standard: aus Dateiendung)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel analysierte Dateien")
+    parser.add_argument("--threads", type=int, default=DEFAULT_IFC_NUM_WORKERS,
+                        help="Geometrie-Threads pro Datei (ifcopenshell.geom.iterator)")
+    parser.add_argument("--min-thickness", type=float, default=DEFAULT_IFC_MIN_PROXY_THICKNESS)
+    parser.add_argument("--xy-tolerance", type=float, default=DEFAULT_IFC_XY_TOLERANCE)
+    parser.add_argument("--min-elements", type=int, default=DEFAULT_IFC_MIN_ELEMENTS_IN_STACK)
+    parser.add_argument("--grouping", choices=("grid", "cluster"), default=DEFAULT_IFC_GROUPING_METHOD)
+    parser.add_argument("--classes", type=_element_classes_arg, default=DEFAULT_IFC_ELEMENT_CLASSES,
+                        help='IFC-Klassen, z.B. "IfcBuildingElementProxy, IfcCourse:0.02"')
+    parser.add_argument("--streaming-threshold-mb", type=int, default=DEFAULT_IFC_STREAMING_THRESHOLD_MB)
+    parser.add_argument("--cache", nargs="?", const=str(CONFIG_DIR / BBOX_CACHE_FILE), default=None,
+                        help="BBox-Cache verwenden (optional mit Pfad zur Cache-Datenbank)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Analyse-Meldungen je Datei ausgeben")
+    args = parser.parse_args(argv)
+
+    files = find_ifc_files(args.inputs)
+    if not files:
+        print("Keine IFC-Dateien gefunden.", file=sys.stderr)
+        return 1
+
+    service_kwargs = {
+        'min_proxy_thickness': args.min_thickness,
+        'xy_tolerance': args.xy_tolerance,
+        'min_elements_in_stack': args.min_elements,
+        'num_workers': args.threads,
+        'grouping_method': args.grouping,
+        'streaming_threshold_mb': args.streaming_threshold_mb,
+        'element_classes': args.classes,
+    }
+    jobs = max(1, min(args.jobs, len(files)))
+    print(f"{len(files)} IFC-Dateien, {jobs} Prozesse", file=sys.stderr)
+
+    writer = _make_writer(args.output, args.format)
+    failed = 0
+    total_start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(analyse_file, f, service_kwargs, args.cache, args.verbose) for f in files]
+            for future in as_completed(futures):
+                result = future.result()
+                if result['error']:
+                    failed += 1
+                    print(f"FEHLER  {result['seconds']:8.2f} s  {result['file']}: {result['error']}", file=sys.stderr)
+                    continue
+                writer.write(result['file'], result['stacks'])
+                print(f"OK      {result['seconds']:8.2f} s  {result['element_count']:>8} Elemente "
+                      f"{len(result['stacks']):>6} Stapel  {result['file']}", file=sys.stderr)
+    finally:
+        writer.close()
+
+    print(f"Fertig in {time.perf_counter() - total_start:.2f} s, {len(files) - failed} erfolgreich, {failed} fehlgeschlagen.",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,17 @@
 # src/bbox_xyz_detector.py
 import os
 import sys
-from collections import defaultdict
+import tempfile
+from functools import lru_cache
 # Counter ist hier nicht mehr direkt für Top-N verwendet, kann ggf. entfernt werden, wenn nirgends sonst genutzt
 # import math # Wird nicht verwendet, kann entfernt werden
-import json  # Nur wenn Speichern noch eine Option sein soll (für GUI-Integration meist nicht hier)
 
 import ifcopenshell
 import ifcopenshell.geom
 import numpy as np
 
+from src.ifc_detectors.step_prefilter import write_filtered_step, peak_memory_mb
+
 # --- PythonOCC Imports ---
 # Diese bleiben, falls ifcopenshell.geom.create_shape sie implizit für bestimmte Geometrien benötigt.
 # Wenn nicht, könnten sie theoretisch auch entfernt werden, aber sicherheitshalber hier belassen.
@@ -34,14 +36,48 @@ except Exception as e_general:
 DEFAULT_MIN_PROXY_THICKNESS = 0.01
 DEFAULT_XY_TOLERANCE = 0.5
 DEFAULT_MIN_ELEMENTS_IN_STACK_COLUMN = 4
-
+# Analysierte IFC-Klassen (inkl. Unterklassen) mit optionaler Mindestdicke je Klasse.
+# None bedeutet: die allgemeine Mindestdicke (min_proxy_thickness_param) gilt.
+DEFAULT_ELEMENT_CLASSES = {"IfcBuildingElementProxy": None}
+
+# Gruppierungsverfahren für group_stacks_by_xy_midpoint:
+#   "grid"    – Mittelpunkt auf ein Raster der Weite xy_tolerance runden (ursprüngliches Verfahren)
+#   "cluster" – Radius-Clustering: Elemente mit XY-Abstand <= xy_tolerance gehören zusammen
+GROUPING_METHODS = ("grid", "cluster")
+DEFAULT_GROUPING_METHOD = "grid"
+
+
+# Spaltenlayout der BBox-Tabelle (eine Zeile pro Element), Grundlage für Gruppierung und Cache
+BBOX_TABLE_COLUMNS = ("guid", "name", "ifc_class", "min_x", "max_x", "min_y", "max_y", "min_z", "max_z")
+BBOX_TABLE_DTYPE = np.dtype([
+    ('guid', object), ('name', object), ('ifc_class', object),
+    ('min_x', np.float64), ('max_x', np.float64),
+    ('min_y', np.float64), ('max_y', np.float64),
+    ('min_z', np.float64), ('max_z', np.float64),
+])
 
 # IFC_FILE_PATH und OUTPUT_JSON_FILE werden hier nicht mehr benötigt.
+
+
+class AnalysisCancelled(Exception):
+    """Wird vom Abbruch-Hook (check_cancelled) ausgelöst, wenn der Nutzer die Analyse abbricht."""
+
+# Abbruch-Hook: Die Funktionen unten akzeptieren optional check_cancelled, ein Callable ohne
+# Argumente, das in den Schleifen regelmäßig aufgerufen wird und bei Abbruch AnalysisCancelled
+# auslöst. Das Öffnen des Modells durch ifcopenshell.open selbst ist nicht unterbrechbar.
 # ——————————————————————————————————————————————————————————————————————————————————————
 
-def load_model_from_path(path: str, message_callback=None) -> ifcopenshell.file | None:
+def load_model_from_path(
+        path: str,
+        message_callback=None,
+        prefilter_types=None,
+        check_cancelled=None
+) -> ifcopenshell.file | None:
     """
     Lädt ein IFC-Modell vom gegebenen Pfad.
+    Mit prefilter_types (z.B. ["IfcBuildingElementProxy"]) wird die Datei zuerst gestreamt
+    und nur das von diesen Elementen erreichbare Teilmodell geladen (siehe step_prefilter),
+    was den Speicherbedarf bei sehr großen Dateien drastisch senkt.
     Gibt das ifcopenshell.file Objekt zurück oder None bei Fehlern.
     """
     if message_callback:
@@ -52,20 +88,133 @@ def load_model_from_path(path: str, message_callback=None) -> ifcopenshell.file
         # raise FileNotFoundError(f"Datei nicht gefunden: {path}") # Besser None zurückgeben für GUI
         return None
     try:
-        model = ifcopenshell.open(path)
+        if prefilter_types:
+            if message_callback:
+                message_callback(f"  Streaming-Modus: lade nur {', '.join(prefilter_types)} und Abhängigkeiten.")
+            fd, subset_path = tempfile.mkstemp(suffix=".ifc")
+            os.close(fd)
+            try:
+                write_filtered_step(path, subset_path, prefilter_types,
+                                    message_callback=message_callback, check_cancelled=check_cancelled)
+                model = ifcopenshell.open(subset_path)
+            finally:
+                os.remove(subset_path)
+        else:
+            model = ifcopenshell.open(path)
         if message_callback:
             message_callback("IFC-Modell erfolgreich geladen.")
+            peak_mb = peak_memory_mb()
+            if peak_mb is not None:
+                message_callback(f"  Spitzen-Speicherbedarf bisher: {peak_mb:.0f} MB")
         return model
+    except AnalysisCancelled:
+        raise
     except Exception as e:
         if message_callback:
             message_callback(f"FEHLER beim Öffnen der IFC-Datei: {e}")
         return None
 
 
+def _bbox_details_from_verts(element, verts: np.ndarray):
+    """
+    Baut das Bounding-Box-Dict eines Elements aus einem (n, 3)-Vertex-Array.
+    Wird von der seriellen und der parallelen Extraktion gemeinsam genutzt,
+    damit beide Pfade identische Dicts liefern.
+    """
+    if verts.size == 0 or np.isnan(verts).any():
+        return None
+
+    min_coords = np.min(verts, axis=0)
+    max_coords = np.max(verts, axis=0)
+    min_x, min_y, min_z = min_coords[0], min_coords[1], min_coords[2]
+    max_x, max_y, max_z = max_coords[0], max_coords[1], max_coords[2]
+
+    if not (max_x >= min_x and max_y >= min_y and max_z >= min_z): return None
+
+    thickness_global_bbox = max_z - min_z
+    name = element.ObjectType or element.Name or element.LongName or "<kein Name>"
+
+    return {
+        'guid': element.GlobalId, 'name': name, 'ifc_class': element.is_a(),
+        'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y,
+        'min_z': min_z, 'max_z': max_z, 'thickness_global_bbox': thickness_global_bbox,
+        'mid_x': (min_x + max_x) / 2.0, 'mid_y': (min_y + max_y) / 2.0
+    }
+
+
+def _set_geom_setting(settings, constant_name: str, option_name: str, value) -> bool:
+    """
+    Setzt eine Geometrie-Option sowohl für IfcOpenShell 0.7 (Konstanten wie settings.NO_NORMALS)
+    als auch für 0.8 (Options-Strings wie "no-normals"). Unbekannte Optionen werden ignoriert.
+    """
+    constant = getattr(settings, constant_name, None)
+    try:
+        settings.set(constant if constant is not None else option_name, value)
+        return True
+    except Exception:
+        return False
+
+
+def create_bbox_settings(use_world_coords: bool = False):
+    """
+    Erzeugt Geometrie-Settings, die nur für Bounding-Boxen ausgelegt sind:
+    keine Normalen, keine UVs, kein Vertex-Welding und keine Öffnungs-Booleans
+    (Öffnungen können die Hülle eines Elements praktisch nie vergrößern).
+    Die Settings werden einmal pro Lauf erzeugt und für alle Elemente wiederverwendet.
+    Mit use_world_coords=True liefert IfcOpenShell die Vertices direkt in Weltkoordinaten.
+    """
+    settings = ifcopenshell.geom.settings()
+    _set_geom_setting(settings, "NO_NORMALS", "no-normals", True)
+    _set_geom_setting(settings, "GENERATE_UVS", "generate-uvs", False)
+    _set_geom_setting(settings, "WELD_VERTICES", "weld-vertices", False)
+    _set_geom_setting(settings, "DISABLE_OPENING_SUBTRACTIONS", "disable-opening-subtractions", True)
+    if use_world_coords:
+        _set_geom_setting(settings, "USE_WORLD_COORDS", "use-world-coords", True)
+    return settings
+
+
+def bbox_settings_key(use_world_coords: bool = False) -> str:
+    """
+    Kennung der Geometrie-Settings aus create_bbox_settings(). Fließt in den Schlüssel
+    des BBox-Caches ein, damit zwischengespeicherte BBoxen bei geänderten Settings verfallen.
+    """
+    version = getattr(ifcopenshell, "version", "unknown")
+    return f"bbox-v1;ios={version};world={int(use_world_coords)}"
+
+
+def _verts_view(geometry) -> np.ndarray:
+    """
+    Liefert die Vertices einer Triangulation als (n, 3)-Array.
+    Ab IfcOpenShell 0.8 wird der native Puffer (verts_buffer) ohne Kopie als NumPy-View gelesen,
+    ältere Versionen liefern ein Tupel, das einmalig konvertiert wird.
+    """
+    buffer = getattr(geometry, "verts_buffer", None)
+    if buffer is not None:
+        return np.frombuffer(buffer, dtype=np.float64).reshape(-1, 3)
+    return np.asarray(geometry.verts, dtype=np.float64).reshape(-1, 3)
+
+
+def get_element_bbox(element, settings):
+    """
+    Schneller BBox-Pfad: nutzt gemeinsame Settings aus create_bbox_settings()
+    und liest die Vertices ohne Umweg über Python-Listen.
+    Liefert dasselbe Dict wie get_element_bbox_details oder None.
+    """
+    try:
+        shape_result = ifcopenshell.geom.create_shape(settings, element)
+        geometry = getattr(shape_result, 'geometry', None)
+        if geometry is None:
+            return None
+        return _bbox_details_from_verts(element, _verts_view(geometry))
+    except Exception:
+        return None
+
+
 def get_element_bbox_details(proxy_element):
     """
     Ermittelt Bounding-Box-Details für ein gegebenes IfcBuildingElementProxy.
-    Unverändert von Ihrer Version.
+    Referenzimplementierung (eigene Settings pro Aufruf, Vertex-Kopie als Liste);
+    die Analyse selbst verwendet get_element_bbox. Bleibt für Vergleichsmessungen erhalten.
     """
     settings = ifcopenshell.geom.settings()
     try:
@@ -82,90 +231,404 @@ def get_element_bbox_details(proxy_element):
             return None
 
         verts = np.array(verts_data, dtype=float).reshape(-1, 3)
-        if np.isnan(verts).any(): return None
+        return _bbox_details_from_verts(proxy_element, verts)
+    except Exception:
+        # Im Modulbetrieb ist es oft besser, hier keinen print zu haben,
+        # sondern den Fehler ggf. weiter oben zu behandeln oder None zurückzugeben.
+        return None
 
-        min_coords = np.min(verts, axis=0)
-        max_coords = np.max(verts, axis=0)
-        min_x, min_y, min_z = min_coords[0], min_coords[1], min_coords[2]
-        max_x, max_y, max_z = max_coords[0], max_coords[1], max_coords[2]
 
-        if not (max_x >= min_x and max_y >= min_y and max_z >= min_z): return None
+# Schemata, in denen Klassennamen nachgeschlagen werden (neueste zuerst, IfcCourse etc. gibt es erst in IFC4X3)
+_SCHEMA_CANDIDATES = ("IFC4X3_ADD2", "IFC4X3", "IFC4", "IFC2X3")
 
-        thickness_global_bbox = max_z - min_z
-        name = proxy_element.ObjectType or proxy_element.Name or proxy_element.LongName or "<kein Name>"
 
-        return {
-            'guid': proxy_element.GlobalId, 'name': name, 'ifc_class': proxy_element.is_a(),
-            'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y,
-            'min_z': min_z, 'max_z': max_z, 'thickness_global_bbox': thickness_global_bbox,
-            'mid_x': (min_x + max_x) / 2.0, 'mid_y': (min_y + max_y) / 2.0
-        }
+def _schema_declaration(schema_name: str, class_name: str):
+    try:
+        return ifcopenshell.ifcopenshell_wrapper.schema_by_name(schema_name).declaration_by_name(class_name)
     except Exception:
-        # Im Modulbetrieb ist es oft besser, hier keinen print zu haben,
-        # sondern den Fehler ggf. weiter oben zu behandeln oder None zurückzugeben.
         return None
 
 
-def find_stacked_elements_by_xy_midpoint(
+@lru_cache(maxsize=None)
+def _class_lineage(class_name: str) -> tuple:
+    """Klasse und alle ihre Oberklassen (klein geschrieben) laut dem ersten Schema, das sie kennt."""
+    for schema_name in _SCHEMA_CANDIDATES:
+        declaration = _schema_declaration(schema_name, class_name)
+        if declaration is None:
+            continue
+        lineage = []
+        while declaration is not None:
+            lineage.append(declaration.name().lower())
+            declaration = declaration.supertype()
+        return tuple(lineage)
+    return (class_name.lower(),)
+
+
+def resolve_class_rule(class_name: str, rule_classes) -> str | None:
+    """
+    Liefert die speziellste Klasse aus rule_classes, von der class_name erbt (oder sie selbst),
+    z.B. IfcSlabStandardCase -> IfcSlab. None, wenn keine Regel greift.
+    """
+    by_lower = {c.lower(): c for c in rule_classes}
+    for ancestor in _class_lineage(class_name):
+        if ancestor in by_lower:
+            return by_lower[ancestor]
+    return None
+
+
+def expand_with_subtypes(class_names) -> set:
+    """
+    Klassennamen samt aller Unterklassen über alle bekannten Schemata (z.B. für den Streaming-Vorfilter,
+    der nur exakte Typnamen vergleicht). Eine Obermenge ist unkritisch.
+    """
+    expanded = set()
+    pending = list(class_names)
+    while pending:
+        class_name = pending.pop()
+        if class_name.lower() in {c.lower() for c in expanded}:
+            continue
+        expanded.add(class_name)
+        for schema_name in _SCHEMA_CANDIDATES:
+            declaration = _schema_declaration(schema_name, class_name)
+            if declaration is not None and hasattr(declaration, "subtypes"):
+                pending.extend(sub_decl.name() for sub_decl in declaration.subtypes())
+    return expanded
+
+
+def _elements_of_classes(model: ifcopenshell.file, element_classes) -> list:
+    """
+    Sammelt alle Elemente der gewünschten Klassen (inkl. Unterklassen) in einem einzigen Durchlauf
+    über die IfcProduct-Instanzen des Modells, statt das Modell je Klasse erneut zu durchsuchen.
+    """
+    rule_for_type = {}
+    elements = []
+    for element in model.by_type("IfcProduct"):
+        entity_type = element.is_a()
+        if entity_type not in rule_for_type:
+            rule_for_type[entity_type] = resolve_class_rule(entity_type, element_classes)
+        if rule_for_type[entity_type] is not None:
+            elements.append(element)
+    return elements
+
+
+def bbox_table_from_rows(rows) -> np.ndarray:
+    """Baut die BBox-Tabelle aus Tupeln in der Spaltenreihenfolge BBOX_TABLE_COLUMNS."""
+    return np.array([tuple(r) for r in rows], dtype=BBOX_TABLE_DTYPE)
+
+
+def bbox_table_from_details(details_list: list) -> np.ndarray:
+    """Baut die BBox-Tabelle aus BBox-Dicts (wie von get_element_bbox geliefert)."""
+    return bbox_table_from_rows(tuple(d[c] for c in BBOX_TABLE_COLUMNS) for d in details_list)
+
+
+def _collect_bbox_details_serial(elements: list, progress_callback=None, check_cancelled=None) -> list:
+    """
+    Ermittelt die BBox-Details nacheinander über create_shape (ein Element pro Aufruf).
+    Gibt die Dicts in der Reihenfolge von `elements` zurück; Elemente ohne Geometrie fehlen.
+    """
+    total = len(elements)
+    settings = create_bbox_settings()
+    details_list = []
+    for processed_count, element in enumerate(elements, 1):
+        if check_cancelled:
+            check_cancelled()
+        if progress_callback and (processed_count % 20 == 0 or processed_count == total):
+            # Fortschritt an die GUI melden
+            progress_callback(processed_count, total,
+                              f"Verarbeite Element {processed_count}/{total} (BBox)")
+
+        details = get_element_bbox(element, settings)
+        if details:
+            details_list.append(details)
+    return details_list
+
+
+def _collect_bbox_details_parallel(
         model: ifcopenshell.file,
-        min_proxy_thickness_param: float,
-        xy_tolerance_param: float,
-        min_elements_in_stack_param: int,
+        elements: list,
+        num_workers: int,
         message_callback=None,
-        progress_callback=None
+        progress_callback=None,
+        check_cancelled=None
 ) -> list:
     """
-    Analysiert das IFC-Modell und findet gestapelte IfcBuildingElementProxy-Elemente.
-    Verwendet übergebene Parameter für die Konfiguration.
+    Ermittelt die BBox-Details mit dem Geometrie-Iterator von IfcOpenShell,
+    der die Tessellierung auf `num_workers` Threads im C++-Kern verteilt.
+    Liefert dieselben Dicts wie der serielle Pfad, in der Reihenfolge von `elements`,
+    damit die anschließende Gruppierung identische Ergebnisse ergibt.
     """
-    if message_callback:
-        message_callback("1. Sammle Bounding-Box Details aller IfcBuildingElementProxy-Elemente...")
+    total = len(elements)
+    settings = create_bbox_settings()
+    iterator = ifcopenshell.geom.iterator(settings, model, num_workers, include=elements)
 
-    element_data_list = []
+    details_by_id = {}
     processed_count = 0
-    # Es ist effizienter, by_type einmal aufzurufen und dann zu iterieren.
-    all_proxies = list(model.by_type("IfcBuildingElementProxy"))
+    if iterator.initialize():
+        while True:
+            if check_cancelled:
+                check_cancelled()
+            shape = iterator.get()
+            processed_count += 1
+            if progress_callback and (processed_count % 20 == 0 or processed_count == total):
+                progress_callback(processed_count, total,
+                                  f"Verarbeite Element {processed_count}/{total} (BBox, {num_workers} Threads)")
+            try:
+                verts = _verts_view(shape.geometry)
+                element = model.by_id(shape.id)
+                details = _bbox_details_from_verts(element, verts)
+                if details:
+                    details_by_id[shape.id] = details
+            except Exception:
+                pass  # Wie im seriellen Pfad: fehlerhafte Geometrie überspringen
+            if not iterator.next():
+                break
+    elif message_callback:
+        message_callback("  Geometrie-Iterator lieferte keine Geometrie.")
+
+    # Elemente ohne Geometrie überspringt der Iterator; Fortschritt trotzdem abschließen
+    if progress_callback and processed_count < total:
+        progress_callback(total, total, f"Verarbeite Element {total}/{total} (BBox)")
+
+    return [details_by_id[e.id()] for e in elements if e.id() in details_by_id]
+
+
+def collect_element_bbox_details(
+        model: ifcopenshell.file,
+        message_callback=None,
+        progress_callback=None,
+        num_workers: int = 1,
+        element_classes=DEFAULT_ELEMENT_CLASSES,
+        check_cancelled=None
+) -> np.ndarray:
+    """
+    Schritt 1 der Analyse: ermittelt die BBox-Details aller Elemente der element_classes
+    (inkl. Unterklassen, ohne Dickenfilter) als BBox-Tabelle (BBOX_TABLE_DTYPE).
+    Das Ergebnis hängt nur vom Modell, den Klassen und den Geometrie-Settings ab
+    und kann daher zwischengespeichert und mit anderen Gruppierungsparametern wiederverwendet werden.
+    """
+    class_list_text = ", ".join(element_classes)
+    if message_callback:
+        message_callback(f"1. Sammle Bounding-Box Details aller Elemente ({class_list_text})...")
+
+    all_proxies = _elements_of_classes(model, element_classes)
     total_proxies = len(all_proxies)
 
     if total_proxies == 0:
         if message_callback:
-            message_callback("  Keine IfcBuildingElementProxy-Elemente im Modell gefunden.")
-        return []
+            message_callback(f"  Keine Elemente der Klassen {class_list_text} im Modell gefunden.")
+        return bbox_table_from_rows([])
+    if message_callback:
+        per_class = {}
+        for element in all_proxies:
+            rule_class = resolve_class_rule(element.is_a(), element_classes)
+            per_class[rule_class] = per_class.get(rule_class, 0) + 1
+        message_callback("  " + ", ".join(f"{c}: {per_class.get(c, 0)}" for c in element_classes))
 
     if progress_callback:  # Initialer Fortschritt
         progress_callback(0, total_proxies, f"Sammle BBox (0/{total_proxies})")
 
-    for i, proxy in enumerate(all_proxies):
-        processed_count += 1
-        if progress_callback and (processed_count % 20 == 0 or processed_count == total_proxies):
-            # Fortschritt an die GUI melden
-            progress_callback(processed_count, total_proxies,
-                              f"Verarbeite Proxy {processed_count}/{total_proxies} (BBox)")
+    if num_workers and num_workers > 1:
+        if message_callback:
+            message_callback(f"  Parallele Geometrie-Extraktion mit {num_workers} Threads.")
+        details_list = _collect_bbox_details_parallel(
+            model, all_proxies, num_workers,
+            message_callback=message_callback, progress_callback=progress_callback,
+            check_cancelled=check_cancelled
+        )
+    else:
+        details_list = _collect_bbox_details_serial(
+            all_proxies, progress_callback=progress_callback, check_cancelled=check_cancelled
+        )
+    return bbox_table_from_details(details_list)
+
+
+def find_stacked_elements_by_xy_midpoint(
+        model: ifcopenshell.file,
+        min_proxy_thickness_param: float,
+        xy_tolerance_param: float,
+        min_elements_in_stack_param: int,
+        message_callback=None,
+        progress_callback=None,
+        num_workers: int = 1,
+        grouping_method: str = DEFAULT_GROUPING_METHOD,
+        element_classes=DEFAULT_ELEMENT_CLASSES,
+        check_cancelled=None
+) -> list:
+    """
+    Analysiert das IFC-Modell und findet gestapelte Elemente der element_classes
+    (Standard: IfcBuildingElementProxy). element_classes bildet Klassennamen auf eine
+    eigene Mindestdicke ab (None = min_proxy_thickness_param).
+    Verwendet übergebene Parameter für die Konfiguration.
+    Bei num_workers > 1 wird die Geometrie parallel über ifcopenshell.geom.iterator extrahiert.
+    """
+    bbox_table = collect_element_bbox_details(
+        model,
+        message_callback=message_callback,
+        progress_callback=progress_callback,
+        num_workers=num_workers,
+        element_classes=element_classes,
+        check_cancelled=check_cancelled
+    )
+    return group_stacks_by_xy_midpoint(
+        bbox_table,
+        min_proxy_thickness_param=min_proxy_thickness_param,
+        xy_tolerance_param=xy_tolerance_param,
+        min_elements_in_stack_param=min_elements_in_stack_param,
+        message_callback=message_callback,
+        progress_callback=progress_callback,
+        grouping_method=grouping_method,
+        min_thickness_by_class=element_classes
+    )
+
+
+def _min_thickness_per_row(ifc_classes: np.ndarray, default_min_thickness: float, min_thickness_by_class) -> np.ndarray:
+    """Mindestdicke je Tabellenzeile; Regeln werden nur einmal pro vorkommender Klasse aufgelöst."""
+    if not min_thickness_by_class:
+        return np.full(len(ifc_classes), default_min_thickness)
+    unique_classes, inverse = np.unique(ifc_classes.astype(str), return_inverse=True)
+    per_class = np.empty(len(unique_classes))
+    for i, class_name in enumerate(unique_classes):
+        rule_class = resolve_class_rule(class_name, min_thickness_by_class)
+        value = min_thickness_by_class.get(rule_class) if rule_class else None
+        per_class[i] = default_min_thickness if value is None else value
+    return per_class[inverse]
+
+
+def _find_root(parent: list, i: int) -> int:
+    """Union-Find: Wurzel von i mit Pfadhalbierung."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_xy_midpoints(mid_x: np.ndarray, mid_y: np.ndarray, radius: float) -> np.ndarray:
+    """
+    Radius-Clustering der XY-Mittelpunkte: zwei Elemente sind verbunden, wenn ihr Abstand
+    <= radius ist; ein Cluster ist eine Zusammenhangskomponente (Single-Linkage).
+    Die Punkte werden in Zellen der Kantenlänge radius einsortiert (lexsort, O(n log n)),
+    verglichen wird nur mit der eigenen und den vier "vorwärts" liegenden Nachbarzellen.
+    Dadurch werden Elemente, die knapp beiderseits einer Rastergrenze liegen, nicht getrennt.
+    Gibt pro Punkt ein Cluster-Label (kleinster Index im Cluster) zurück.
+    """
+    n = len(mid_x)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    parent = list(range(n))  # Python-Liste: Einzelzugriffe sind hier deutlich schneller als auf ein Array
+
+    cell_x = np.floor(mid_x / radius).astype(np.int64)
+    cell_y = np.floor(mid_y / radius).astype(np.int64)
+    order = np.lexsort((cell_y, cell_x))
+    sorted_cx = cell_x[order]
+    sorted_cy = cell_y[order]
+    is_cell_start = np.empty(n, dtype=bool)
+    is_cell_start[0] = True
+    is_cell_start[1:] = (sorted_cx[1:] != sorted_cx[:-1]) | (sorted_cy[1:] != sorted_cy[:-1])
+    cell_starts = np.flatnonzero(is_cell_start)
+    cell_ends = np.append(cell_starts[1:], n)
+    cells = {
+        (int(sorted_cx[start]), int(sorted_cy[start])): order[start:end]
+        for start, end in zip(cell_starts, cell_ends)
+    }
+
+    radius_sq = radius * radius
+    neighbour_offsets = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))  # jede Zellpaarung genau einmal
+    for (cx, cy), members in cells.items():
+        for dx, dy in neighbour_offsets:
+            others = cells.get((cx + dx, cy + dy))
+            if others is None:
+                continue
+            dist_sq = (mid_x[members, None] - mid_x[None, others]) ** 2 + \
+                      (mid_y[members, None] - mid_y[None, others]) ** 2
+            pairs_a, pairs_b = np.nonzero(dist_sq <= radius_sq)
+            for a, b in zip(members[pairs_a].tolist(), others[pairs_b].tolist()):
+                root_a, root_b = _find_root(parent, a), _find_root(parent, b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return np.array([_find_root(parent, i) for i in range(n)], dtype=np.int64)
+
+
+def group_stacks_by_xy_midpoint(
+        bbox_table: np.ndarray,
+        min_proxy_thickness_param: float,
+        xy_tolerance_param: float,
+        min_elements_in_stack_param: int,
+        message_callback=None,
+        progress_callback=None,
+        grouping_method: str = DEFAULT_GROUPING_METHOD,
+        min_thickness_by_class=None
+) -> list:
+    """
+    Schritte 2 und 3 der Analyse: Dickenfilter, Gruppierung nach XY-Mittelpunkt
+    und Auswahl der Stapel mit ausreichend Elementen. Arbeitet nur auf der BBox-Tabelle
+    (BBOX_TABLE_DTYPE), braucht also kein geladenes Modell.
+    grouping_method wählt zwischen Rasterrundung ("grid") und Radius-Clustering ("cluster"),
+    siehe GROUPING_METHODS. Beim Clustering ist approx_mid_x/y der Mittelwert der Elementmittelpunkte.
+    min_thickness_by_class überschreibt die Mindestdicke für einzelne Klassen (inkl. Unterklassen);
+    Klassen ohne Eintrag oder mit None verwenden min_proxy_thickness_param.
+    Jeder Stapel enthält unter 'ifc_classes' die sortierten Klassen seiner Elemente.
+
+    Filter, Quantisierung, Gruppierung (lexsort + Gruppengrenzen), Sortierung nach min_z
+    und Zählen laufen als Array-Operationen; Dicts werden nur für zurückgegebene Stapel gebaut.
+    Reihenfolge der Stapel und Elemente entspricht der früheren Dict-Implementierung:
+    Stapel absteigend nach Anzahl (bei Gleichstand in Reihenfolge des ersten Elements),
+    Elemente aufsteigend nach min_z (bei Gleichstand in Modellreihenfolge).
+    """
+    if grouping_method not in GROUPING_METHODS:
+        raise ValueError(f"Unbekanntes Gruppierungsverfahren: {grouping_method!r} (erlaubt: {GROUPING_METHODS})")
+    if bbox_table is None or len(bbox_table) == 0:
+        return []
 
-        details = get_element_bbox_details(proxy)  # Ihre bestehende Funktion
-        # Verwende die übergebenen Parameter
-        if details and details['thickness_global_bbox'] >= min_proxy_thickness_param:
-            element_data_list.append(details)
+    # Verwende die übergebenen Parameter
+    thickness = bbox_table['max_z'] - bbox_table['min_z']
+    min_thickness = _min_thickness_per_row(bbox_table['ifc_class'], min_proxy_thickness_param, min_thickness_by_class)
+    kept_idx = np.flatnonzero(thickness >= min_thickness)
 
     if message_callback:
+        class_rules = {c: v for c, v in (min_thickness_by_class or {}).items() if v is not None}
+        rules_text = "".join(f", {c} >= {v * 1000:.0f}mm" for c, v in class_rules.items())
         message_callback(
-            f"  {len(element_data_list)} Proxies nach Dickenfilter (>= {min_proxy_thickness_param * 1000:.0f}mm)."
+            f"  {len(kept_idx)} Elemente nach Dickenfilter (>= {min_proxy_thickness_param * 1000:.0f}mm{rules_text})."
         )
-    if not element_data_list:
+    if len(kept_idx) == 0:
         return []
 
     if message_callback:
+        method_text = "Radius-Clustering" if grouping_method == "cluster" else "Raster"
         message_callback(
-            f"\n2. Gruppiere Elemente nach XY-Mittelpunkt (Toleranz: {xy_tolerance_param * 1000:.0f}mm)...")
+            f"\n2. Gruppiere Elemente nach XY-Mittelpunkt "
+            f"(Toleranz: {xy_tolerance_param * 1000:.0f}mm, Verfahren: {method_text})...")
     if progress_callback:  # Fortschritt für Gruppierung
         progress_callback(0, 1, "Gruppiere Elemente...")  # Einfacher Fortschritt (1 Schritt)
 
-    grouped_by_xy_midpoint = defaultdict(list)
-    for data_item in element_data_list:  # data umbenannt zu data_item, um Konflikt mit Modul 'data' zu vermeiden
-        # Verwende die übergebenen Parameter
-        key_x = round(data_item['mid_x'] / xy_tolerance_param)
-        key_y = round(data_item['mid_y'] / xy_tolerance_param)
-        grouped_by_xy_midpoint[(key_x, key_y)].append(data_item)
+    rows = bbox_table[kept_idx]
+    mid_x = (rows['min_x'] + rows['max_x']) / 2.0
+    mid_y = (rows['min_y'] + rows['max_y']) / 2.0
+    if grouping_method == "cluster":
+        key_x = cluster_xy_midpoints(mid_x, mid_y, xy_tolerance_param)
+        key_y = np.zeros_like(key_x)
+    else:
+        # np.round rundet wie Pythons round() kaufmännisch auf die gerade Zahl (banker's rounding)
+        key_x = np.round(mid_x / xy_tolerance_param).astype(np.int64)
+        key_y = np.round(mid_y / xy_tolerance_param).astype(np.int64)
+
+    # Stabil sortiert nach (key_x, key_y, min_z); Gleichstände behalten die Modellreihenfolge
+    order = np.lexsort((rows['min_z'], key_y, key_x))
+    sorted_kx = key_x[order]
+    sorted_ky = key_y[order]
+    is_group_start = np.empty(len(order), dtype=bool)
+    is_group_start[0] = True
+    is_group_start[1:] = (sorted_kx[1:] != sorted_kx[:-1]) | (sorted_ky[1:] != sorted_ky[:-1])
+    group_starts = np.flatnonzero(is_group_start)
+    group_counts = np.diff(np.append(group_starts, len(order)))
+    group_first_seen = np.minimum.reduceat(order, group_starts)
+    if grouping_method == "cluster":
+        group_mid_x = np.add.reduceat(mid_x[order], group_starts) / group_counts
+        group_mid_y = np.add.reduceat(mid_y[order], group_starts) / group_counts
+    else:
+        group_mid_x = sorted_kx[group_starts] * xy_tolerance_param
+        group_mid_y = sorted_ky[group_starts] * xy_tolerance_param
 
     if progress_callback:  # Fortschritt für Gruppierung abgeschlossen
         progress_callback(1, 1, "Gruppierung abgeschlossen.")
@@ -175,38 +638,32 @@ def find_stacked_elements_by_xy_midpoint(
     if progress_callback:  # Fortschritt für Filterung
         progress_callback(0, 1, "Filtere Stapel...")
 
-    output_stacks_data = []  # Umbenannt von output_stacks_for_json, da wir hier nur Daten zurückgeben
+    selected = np.flatnonzero(group_counts >= min_elements_in_stack_param)
+    # Absteigend nach Anzahl, bei Gleichstand nach erstem Auftreten (wie die stabile Sortierung zuvor)
+    selected = selected[np.lexsort((group_first_seen[selected], -group_counts[selected]))]
 
-    sorted_group_keys = sorted(grouped_by_xy_midpoint.keys(),
-                               key=lambda k: len(grouped_by_xy_midpoint[k]),
-                               reverse=True)
-
-    for key_val in sorted_group_keys:  # key umbenannt zu key_val
-        elements_in_group_details = grouped_by_xy_midpoint[key_val]
-        # Verwende die übergebenen Parameter
-        if len(elements_in_group_details) >= min_elements_in_stack_param:
-            elements_in_group_details.sort(key=lambda d: d['min_z'])
-
-            approx_mid_x = key_val[0] * xy_tolerance_param
-            approx_mid_y = key_val[1] * xy_tolerance_param
-
-            serializable_elements = []
-            for elem_data in elements_in_group_details:
-                serializable_elements.append({
-                    'guid': elem_data['guid'],
-                    'name': elem_data['name'],
-                    'ifc_class': elem_data['ifc_class'],
-                    'min_z': elem_data['min_z'],
-                    'max_z': elem_data['max_z'],
-                    'thickness_global_bbox': elem_data['thickness_global_bbox']
-                })
-
-            output_stacks_data.append({
-                'approx_mid_x': approx_mid_x,
-                'approx_mid_y': approx_mid_y,
-                'elements': serializable_elements,
-                'count': len(serializable_elements)
-            })
+    output_stacks_data = []  # Umbenannt von output_stacks_for_json, da wir hier nur Daten zurückgeben
+    for group in selected:
+        start = group_starts[group]
+        member_rows = rows[order[start:start + group_counts[group]]]
+        serializable_elements = [
+            {
+                'guid': row['guid'],
+                'name': row['name'],
+                'ifc_class': row['ifc_class'],
+                'min_z': float(row['min_z']),
+                'max_z': float(row['max_z']),
+                'thickness_global_bbox': float(row['max_z'] - row['min_z'])
+            }
+            for row in member_rows
+        ]
+        output_stacks_data.append({
+            'approx_mid_x': float(group_mid_x[group]),
+            'approx_mid_y': float(group_mid_y[group]),
+            'elements': serializable_elements,
+            'count': len(serializable_elements),
+            'ifc_classes': sorted({e['ifc_class'] for e in serializable_elements})
+        })
 
     if progress_callback:  # Fortschritt für Filterung abgeschlossen
         progress_callback(1, 1, "Filterung abgeschlossen.")
@@ -216,62 +673,8 @@ def find_stacked_elements_by_xy_midpoint(
     return output_stacks_data
 
 
-# Der folgende Block wird nur ausgeführt, wenn das Skript direkt gestartet wird.
-# Für den Import als Modul wird er ignoriert. Sie können ihn für Tests belassen
-# oder entfernen/auskommentieren.
+# Direktstart leitet an die Batch-Analyse weiter (Pfade und Parameter per Kommandozeile).
 if __name__ == "__main__":
-    print("Starte bbox_xyz_detector.py als eigenständiges Skript für Tests...")
-
-
-    # Beispielhafte Test-Callbacks
-    def console_message_callback(message):
-        print(f"[MSG] {message}")
-
-
-    def console_progress_callback(current, total, status_text):
-        print(f"[PROG] {status_text} - {current}/{total}")
-
-
-    # Testpfad (bitte anpassen, falls notwendig für direkte Tests)
-    TEST_IFC_FILE_PATH = r"C:\Users\Arbeit\PycharmProjects\FullSusInfraEPDMatcher\ifcfile.ifc"  # Oder ein anderer Testpfad
-    TEST_OUTPUT_JSON_FILE = "test_candidate_stacks_direct.json"
-
-    console_message_callback(f"Lade IFC für Test: {TEST_IFC_FILE_PATH}")
-    model = load_model_from_path(TEST_IFC_FILE_PATH, message_callback=console_message_callback)
-
-    if model:
-        console_message_callback("Starte Stapel-Analyse mit Standardparametern für Test...")
-        candidate_stacks = find_stacked_elements_by_xy_midpoint(
-            model,
-            min_proxy_thickness_param=DEFAULT_MIN_PROXY_THICKNESS,
-            xy_tolerance_param=DEFAULT_XY_TOLERANCE,
-            min_elements_in_stack_param=DEFAULT_MIN_ELEMENTS_IN_STACK_COLUMN,
-            message_callback=console_message_callback,
-            progress_callback=console_progress_callback
-        )
-
-        if not candidate_stacks:
-            console_message_callback("\nKeine Stapel-Kandidaten im Test gefunden.")
-        else:
-            console_message_callback(
-                f"\n{len(candidate_stacks)} Stapel-Kandidaten im Test gefunden."
-            )
-            # Optionale Ausgabe der Stapel in der Konsole
-            for i, stack_info in enumerate(candidate_stacks, 1):
-                console_message_callback(
-                    f"\nStapel {i} (ca. X={stack_info['approx_mid_x']:.2f}, Y={stack_info['approx_mid_y']:.2f}; {stack_info['count']} Elemente):"
-                )
-                for elem_data in reversed(stack_info['elements']):
-                    console_message_callback(
-                        f"  - {elem_data['guid']} | {elem_data['name']:<50} | min_Z: {elem_data['min_z']:.3f}"
-                    )
-
-            # Optional: Testweise Speicherung in JSON
-            try:
-                with open(TEST_OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(candidate_stacks, f, indent=4, ensure_ascii=False)
-                console_message_callback(f"\nTest-Kandidaten-Stapel wurden in '{TEST_OUTPUT_JSON_FILE}' gespeichert.")
-            except Exception as e:
-                console_message_callback(f"\nFehler beim Speichern der Test-Kandidaten-Stapel: {e}")
-    else:
-        console_message_callback("Test-IFC-Modell konnte nicht geladen werden.")
+    # Kommandozeilen-Analyse (auch für mehrere Dateien/Verzeichnisse): python -m src.ifc_batch --help
+    from src.ifc_batch import main
+    sys.exit(main())
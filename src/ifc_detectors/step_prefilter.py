@@ -0,0 +1,216 @@
+# src/ifc_detectors/step_prefilter.py
+"""
+Streaming-Vorfilter für sehr große IFC-Dateien (STEP, ISO 10303-21).
+
+Statt das komplette Modell mit ifcopenshell.open() in den Speicher zu laden, wird die Datei
+zweimal gestreamt gelesen:
+  1. Index: für jede Instanz nur (#id, Byte-Offset) merken, Wurzel-Instanzen der gesuchten
+     Typen (z.B. IFCBUILDINGELEMENTPROXY) und IFCPROJECT (Einheiten) vormerken.
+  2. Hülle: ausgehend von den Wurzeln alle referenzierten Instanzen (#123) per Seek nachlesen
+     (Placements, Repräsentationen, Geometrie, Kontexte, OwnerHistory ...).
+Die erreichbaren Instanzen werden mit dem Original-Header in eine kleine STEP-Datei geschrieben,
+die anschließend normal geöffnet werden kann. Inverse Beziehungen (z.B. Spatial-Container)
+gehen dabei verloren; für die BBox-Analyse werden sie nicht benötigt.
+"""
+import os
+import re
+import sys
+from array import array
+
+import numpy as np
+
+_RECORD_HEAD = re.compile(rb"\s*#(\d+)\s*=\s*([A-Za-z0-9_]+)")
+_STRING_LITERAL = re.compile(rb"'(?:[^']|'')*'")
+_REFERENCE = re.compile(rb"#(\d+)")
+_DELIMITER = re.compile(rb"[';]")
+
+# Abstand (in Instanzen), in dem der Abbruch-Hook beim Indizieren aufgerufen wird
+_CANCEL_CHECK_INTERVAL = 50_000
+
+# Immer mitnehmen: IfcProject trägt die Einheiten, ohne die Geometrie falsch skaliert würde
+ALWAYS_INCLUDED_TYPES = ("IFCPROJECT",)
+
+
+def peak_memory_mb() -> float | None:
+    """
+    Maximaler Speicherbedarf (Resident Set) des Prozesses in MB oder None, falls nicht ermittelbar.
+    Linux/macOS über resource, Windows über psutil (optional).
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _statement_ends(line: bytes, in_string: bool) -> tuple[bool, list]:
+    """
+    Verfolgt den String-Zustand über eine Zeile und sucht die Anweisungsenden (';' außerhalb
+    von Strings). '' (maskiertes Apostroph) schaltet zweimal um und ändert den Zustand daher
+    korrekt nicht. Gibt (in_string, Positionen der beendenden ';' in line) zurück.
+    """
+    if not in_string and b"'" not in line:
+        ends = []
+        pos = line.find(b";")
+        while pos >= 0:
+            ends.append(pos)
+            pos = line.find(b";", pos + 1)
+        return False, ends
+    ends = []
+    for match in _DELIMITER.finditer(line):
+        if match.group() == b"'":
+            in_string = not in_string
+        elif not in_string:
+            ends.append(match.start())
+    return in_string, ends
+
+
+def _iter_data_records(f):
+    """
+    Liefert (offset, record) für jede Instanz im DATA-Abschnitt.
+    f muss binär geöffnet und auf den Beginn des DATA-Abschnitts positioniert sein.
+    Anweisungen werden am ';' außerhalb von Strings getrennt, nicht am Zeilenende: eine Zeile
+    darf mehrere Instanzen enthalten (#1=...;#2=...;), eine Instanz mehrere Zeilen.
+    """
+    offset = f.tell()
+    pending = []
+    pending_offset = 0
+    in_string = False
+    for line in f:
+        line_offset = offset
+        offset += len(line)
+        if not pending:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped == b"ENDSEC;":
+                return
+            # Schneller Pfad: genau eine einzeilige Anweisung ohne Strings
+            if b"'" not in stripped and stripped.endswith(b";") and stripped.count(b";") == 1:
+                yield line_offset, stripped
+                continue
+        in_string, ends = _statement_ends(line, in_string)
+        start = 0
+        for end in ends:
+            if pending:
+                pending.append(line[start:end + 1])
+                record_offset, record = pending_offset, b"".join(pending).strip()
+                pending = []
+            else:
+                record_offset, record = line_offset + start, line[start:end + 1].strip()
+            if record == b"ENDSEC;":
+                return
+            if record:
+                yield record_offset, record
+            start = end + 1
+        rest = line[start:]
+        if pending:
+            pending.append(rest)
+        elif rest.strip():
+            pending_offset = line_offset + start
+            pending.append(rest)
+
+
+def _read_record_at(f, offset: int) -> bytes:
+    """Liest die Anweisung ab offset bis zum ersten ';' außerhalb von Strings."""
+    f.seek(offset)
+    parts = []
+    in_string = False
+    for line in f:
+        in_string, ends = _statement_ends(line, in_string)
+        if ends:
+            parts.append(line[:ends[0] + 1])
+            break
+        parts.append(line)
+    return b"".join(parts).strip()
+
+
+def _read_header(f) -> bytes:
+    """Liest alles bis einschließlich 'DATA;' und positioniert f dahinter."""
+    header = []
+    for line in f:
+        header.append(line)
+        if line.strip().upper() == b"DATA;":
+            return b"".join(header)
+    raise ValueError("Kein DATA-Abschnitt in der STEP-Datei gefunden.")
+
+
+def write_filtered_step(
+        src_path: str,
+        dst_path: str,
+        root_types,
+        message_callback=None,
+        check_cancelled=None
+) -> int:
+    """
+    Schreibt nach dst_path eine STEP-Datei, die nur die Instanzen der root_types
+    (IFC-Klassennamen, exakte Typen) und alle von ihnen erreichbaren Instanzen enthält.
+    check_cancelled wird regelmäßig aufgerufen und darf zum Abbruch eine Exception auslösen.
+    Gibt die Anzahl geschriebener Instanzen zurück.
+    """
+    wanted = {t.upper().encode("ascii") for t in (*root_types, *ALWAYS_INCLUDED_TYPES)}
+
+    ids = array("q")
+    offsets = array("q")
+    roots = []
+    with open(src_path, "rb") as f:
+        header = _read_header(f)
+        if message_callback:
+            message_callback(f"  Streaming-Index: lese {os.path.getsize(src_path) / 2**20:.0f} MB...")
+        for offset, record in _iter_data_records(f):
+            head = _RECORD_HEAD.match(record)
+            if not head:
+                continue
+            entity_id = int(head.group(1))
+            if check_cancelled and len(ids) % _CANCEL_CHECK_INTERVAL == 0:
+                check_cancelled()
+            ids.append(entity_id)
+            offsets.append(offset)
+            if head.group(2).upper() in wanted:
+                roots.append(entity_id)
+
+        id_array = np.frombuffer(ids, dtype=np.int64)
+        sort_order = np.argsort(id_array, kind="stable")
+        sorted_ids = id_array[sort_order]
+        sorted_offsets = np.frombuffer(offsets, dtype=np.int64)[sort_order]
+        if message_callback:
+            message_callback(f"  {len(sorted_ids)} Instanzen indiziert, {len(roots)} Wurzel-Elemente.")
+
+        # Transitive Hülle über #-Referenzen (Strings werden vorher entfernt)
+        needed = set(roots)
+        queue = list(roots)
+        records = {}
+        while queue:
+            entity_id = queue.pop()
+            if check_cancelled and len(records) % _CANCEL_CHECK_INTERVAL == 0:
+                check_cancelled()
+            pos = np.searchsorted(sorted_ids, entity_id)
+            if pos >= len(sorted_ids) or sorted_ids[pos] != entity_id:
+                continue  # Verweis ins Leere, ifcopenshell meldet das beim Öffnen
+            record = _read_record_at(f, int(sorted_offsets[pos]))
+            records[entity_id] = (int(sorted_offsets[pos]), record)
+            body = _STRING_LITERAL.sub(b"", record.split(b"=", 1)[1])
+            for ref in _REFERENCE.findall(body):
+                ref_id = int(ref)
+                if ref_id not in needed:
+                    needed.add(ref_id)
+                    queue.append(ref_id)
+
+    with open(dst_path, "wb") as out:
+        out.write(header)
+        # In Dateireihenfolge schreiben, damit die Teil-Datei dem Original möglichst gleicht
+        for _, record in sorted(records.values()):
+            out.write(record)
+            out.write(b"\n")
+        out.write(b"ENDSEC;\nEND-ISO-10303-21;\n")
+
+    if message_callback:
+        message_callback(f"  Teilmodell mit {len(records)} Instanzen erzeugt.")
+    return len(records)
@@ -1,6 +1,7 @@
 # src/main.py
 import sys
 import os
+import multiprocessing
 from PyQt6.QtWidgets import QApplication, QMessageBox  # QMessageBox für kritische Fehler beim Start
 
 # Eigene Module
@@ -70,4 +71,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Worker-Prozesse der Fuzzy-Suche in der PyInstaller-Version
     main()
\ No newline at end of file
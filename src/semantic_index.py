@@ -0,0 +1,40 @@
+# src/semantic_index.py
+"""
+Baut den Vektorindex der semantischen Suche (gehashte TF-IDF-Vektoren) offline aus der
+Tabelle epds. Der Index liegt standardmäßig im CONFIG_DIR und wird von der Suchmethode
+"Semantische Suche (lokal)" per Memory-Mapping geladen; nach einem Import neu bauen
+(die Anwendung erkennt einen veralteten Index und baut ihn sonst vor der ersten Suche neu).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m src.semantic_index [--db pfad/zur/oekobaudat_epds.db] [--out pfad/zum/index]
+                                 [--dimensions 2048]
+"""
+import argparse
+import os
+import sys
+
+from src.services.semantic_service import build_semantic_index
+from src.utils.constants import CONFIG_DIR, DB_FILE, SEMANTIC_INDEX_DIR, SEMANTIC_DIMENSIONS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(CONFIG_DIR, DB_FILE), help="EPD-Datenbank")
+    parser.add_argument("--out", default=os.path.join(CONFIG_DIR, SEMANTIC_INDEX_DIR), help="Zielverzeichnis des Index")
+    parser.add_argument("--dimensions", type=int, default=SEMANTIC_DIMENSIONS, help="Spalten der Vektormatrix")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"FEHLER: Datenbank nicht gefunden: {args.db}", file=sys.stderr)
+        return 1
+    build_semantic_index(
+        args.db,
+        args.out,
+        dimensions=args.dimensions,
+        message_callback=lambda msg: print(msg, file=sys.stderr)
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+# src/services/epd_import_service.py
+"""
+Offline-Import der ÖKOBAUDAT aus einem lokalen ILCD-Export (Zip-Datei oder entpacktes Verzeichnis).
+
+Ablauf (Delta-Abgleich):
+  1. Alle Prozessdatensätze (processes/*.xml) auflisten und je Datei den SHA-256 des Inhalts bilden.
+  2. Dateien, deren Hash bereits als epds.content_hash gespeichert ist, überspringen (unverändert
+     seit dem letzten Import). Ein abgebrochener Import setzt damit beim nächsten Lauf dort fort,
+     wo er aufgehört hat.
+  3. Die übrigen Datensätze im Prozess-Pool parsen (ilcd_parser) und blockweise in epds und
+     epd_environmental_indicators schreiben (neu oder geändert). content_hash und source_version
+     eines Blocks werden erst nach dessen Daten gesetzt.
+  4. Optional (delete_missing) EPDs löschen, die aus einem früheren Import stammen, im Export
+     aber nicht mehr enthalten sind.
+Das Ergebnis enthält die Änderungsliste (inserted/updated/deleted). Nur die betroffenen EPDs
+werden geschrieben: Volltextindex und Label-Zuordnung folgen zeilenweise über die Trigger,
+Anzeige-Cache-Einträge werden nur für diese UUIDs verworfen.
+"""
+import hashlib
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.core.db_setup import get_connection, migrate
+from src.services.epd_service import EPDService
+from src.services.ilcd_parser import parse_process_dataset, ILCDParseError
+
+# EPDs pro Schreibblock (je eine Transaktion für epds, Umweltdaten und Inhalts-Hashes)
+IMPORT_BATCH_SIZE = 500
+# Noch nicht abgeholte Parse-Aufträge pro Worker-Prozess (begrenzt den Speicherbedarf)
+_PENDING_PER_WORKER = 32
+# Maximal gesammelte Fehlermeldungen im Ergebnis
+_MAX_REPORTED_ERRORS = 50
+
+
+def _is_process_path(name: str) -> bool:
+    parts = Path(name.replace("\\", "/")).parts
+    return name.lower().endswith(".xml") and any(p.lower() == "processes" for p in parts[:-1])
+
+
+def list_process_files(source: str) -> List[str]:
+    """
+    Prozessdatensätze eines ILCD-Exports (Zip oder Verzeichnis), sortiert.
+    Bevorzugt Dateien in einem Ordner 'processes'; gibt es keinen, werden alle *.xml geliefert
+    (Nicht-Prozessdatensätze werden beim Parsen übersprungen).
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            names = [n for n in zf.namelist() if not n.endswith("/")]
+    elif os.path.isdir(source):
+        names = [str(p.relative_to(source)) for p in Path(source).rglob("*") if p.is_file()]
+    else:
+        raise FileNotFoundError(f"Kein ILCD-Export (Zip oder Verzeichnis): {source}")
+    processes = sorted(n for n in names if _is_process_path(n))
+    return processes or sorted(n for n in names if n.lower().endswith(".xml"))
+
+
+def _iter_file_contents(source: str, names: List[str]) -> Iterator[tuple[str, bytes]]:
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for name in names:
+                yield name, zf.read(name)
+    else:
+        for name in names:
+            with open(os.path.join(source, name), "rb") as f:
+                yield name, f.read()
+
+
+def _parse_entry(name: str, content_hash: str, data: bytes) -> tuple:
+    """Läuft im Worker-Prozess: (name, hash, Datensatz oder None, Fehlermeldung oder None)."""
+    try:
+        return name, content_hash, parse_process_dataset(data), None
+    except ILCDParseError as e:
+        return name, content_hash, None, str(e)
+    except Exception as e:  # ein defekter Datensatz soll den Import nicht abbrechen
+        return name, content_hash, None, f"{type(e).__name__}: {e}"
+
+
+class EPDImportService:
+    """Importiert ILCD-Prozessdatensätze über den EPDService in die EPD-Datenbank."""
+
+    def __init__(self, epd_service: EPDService, jobs: Optional[int] = None, batch_size: int = IMPORT_BATCH_SIZE):
+        self.epd_service = epd_service
+        self.jobs = jobs or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def import_export(
+            self,
+            source: str,
+            force: bool = False,
+            delete_missing: bool = False,
+            message_callback=None,
+            progress_callback=None,
+            check_cancelled=None
+    ) -> Dict[str, Any]:
+        """
+        Gleicht die EPD-Datenbank mit den Prozessdatensätzen aus source (Zip oder Verzeichnis) ab.
+        force=True importiert auch Dateien mit bekanntem Hash neu. delete_missing=True löscht
+        importierte EPDs (content_hash gesetzt), die im Export fehlen – nicht jedoch, wenn
+        Datensätze fehlerhaft waren, da deren UUID unbekannt ist.
+        check_cancelled wird regelmäßig aufgerufen und darf zum Abbruch eine Exception auslösen;
+        bereits geschriebene Blöcke bleiben erhalten und werden beim nächsten Lauf übersprungen.
+        Gibt {"files", "unchanged", "imported", "failed", "seconds", "errors", "changes"} zurück,
+        changes = {"inserted": [uuid, ...], "updated": [...], "deleted": [...]}.
+        """
+        start = time.perf_counter()
+        names = list_process_files(source)
+        changes = {"inserted": [], "updated": [], "deleted": []}
+        stats = {"files": len(names), "unchanged": 0, "imported": 0, "failed": 0, "seconds": 0.0,
+                 "errors": [], "changes": changes}
+        if message_callback:
+            message_callback(f"{len(names)} Prozessdatensätze in {os.path.basename(source)} gefunden.")
+
+        conn = get_connection(self.epd_service.db_path)
+        try:
+            migrate(conn)  # content_hash und Umweltdaten-Tabellen sicherstellen
+            stored = {row[0]: row[1] for row in conn.execute("SELECT uuid, content_hash FROM epds")}
+            known = {} if force else {content_hash: uuid for uuid, content_hash in stored.items() if content_hash}
+            seen = set()
+            done = 0
+
+            def changed_entries():
+                nonlocal done
+                for name, data in _iter_file_contents(source, names):
+                    content_hash = hashlib.sha256(data).hexdigest()
+                    if content_hash in known:
+                        seen.add(known[content_hash])
+                        stats["unchanged"] += 1
+                        done += 1
+                        continue
+                    yield name, content_hash, data
+
+            batch = []
+            for name, content_hash, parsed, error in self._parse_all(changed_entries(), check_cancelled):
+                done += 1
+                if error:
+                    stats["failed"] += 1
+                    if len(stats["errors"]) < _MAX_REPORTED_ERRORS:
+                        stats["errors"].append(f"{name}: {error}")
+                else:
+                    uuid = parsed["epd"]["uuid"]
+                    seen.add(uuid)
+                    changes["updated" if uuid in stored else "inserted"].append(uuid)
+                    batch.append((name, content_hash, parsed))
+                    if len(batch) >= self.batch_size:
+                        self._write_batch(conn, batch, stats)
+                        batch = []
+                if progress_callback:
+                    progress_callback(done, len(names), f"Import: {done}/{len(names)} Datensätze")
+            if batch:
+                self._write_batch(conn, batch, stats)
+        finally:
+            conn.close()
+
+        if delete_missing:
+            if stats["failed"]:
+                if message_callback:
+                    message_callback("WARNUNG: Fehlerhafte Datensätze – fehlende EPDs werden nicht gelöscht.")
+            else:
+                missing = [uuid for uuid, content_hash in stored.items() if content_hash and uuid not in seen]
+                self.epd_service.delete_epds(missing)
+                changes["deleted"] = missing
+        for key in ("inserted", "updated"):
+            changes[key] = list(dict.fromkeys(changes[key]))
+
+        stats["seconds"] = time.perf_counter() - start
+        if progress_callback:
+            progress_callback(len(names), len(names), "Import abgeschlossen")
+        if message_callback:
+            message_callback(
+                f"Import abgeschlossen in {stats['seconds']:.1f} s: {len(changes['inserted'])} neu, "
+                f"{len(changes['updated'])} geändert, {len(changes['deleted'])} gelöscht, "
+                f"{stats['unchanged']} unverändert, {stats['failed']} fehlerhaft."
+            )
+        return stats
+
+    def _parse_all(self, entries, check_cancelled=None):
+        """Parst die Einträge (bei jobs > 1 im Prozess-Pool) und liefert die Ergebnisse in Fertigstellungsreihenfolge."""
+        if self.jobs <= 1:
+            for entry in entries:
+                if check_cancelled:
+                    check_cancelled()
+                yield _parse_entry(*entry)
+            return
+
+        max_pending = self.jobs * _PENDING_PER_WORKER
+        pool = ProcessPoolExecutor(max_workers=self.jobs)
+        completed = False
+        try:
+            pending = set()
+            for entry in entries:
+                if check_cancelled:
+                    check_cancelled()
+                pending.add(pool.submit(_parse_entry, *entry))
+                if len(pending) >= max_pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield future.result()
+            while pending:
+                if check_cancelled:
+                    check_cancelled()
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+            completed = True
+        finally:
+            # Bei Abbruch (check_cancelled, Fehler, vorzeitig geschlossener Generator) wartende
+            # Aufträge verwerfen statt sie abzuarbeiten; laufende enden im Hintergrund
+            pool.shutdown(wait=completed, cancel_futures=not completed)
+
+    def _write_batch(self, conn, batch: list, stats: dict):
+        parsed = [p for _, _, p in batch]
+        self.epd_service.upsert_epds([p["epd"] for p in parsed])
+        self.epd_service.save_environmental_many(
+            (p["epd"]["uuid"], p["lcia"], p["key_flows"], p["biogenic"]) for p in parsed
+        )
+        # Hashes zuletzt setzen: bricht der Import vorher ab, wird der Block erneut importiert
+        with conn:
+            conn.executemany(
+                "UPDATE epds SET content_hash = ?, source_version = ? WHERE uuid = ?",
+                [(content_hash, p.get("version"), p["epd"]["uuid"]) for _, content_hash, p in batch]
+            )
+        stats["imported"] += len(batch)
@@ -1,102 +1,351 @@
 # src/services/epd_service.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from collections.abc import Mapping
 import json
-import datetime
+import re
+import sqlite3
+import time
+from datetime import datetime
+from collections import OrderedDict
+
+from src.core.db_setup import (
+    ConnectionPool, migrate, table_exists, create_fts_index, replace_indicator_values_many, FTS_COLUMNS,
+    bump_data_version
+)
+from src.utils.constants import (
+    DB_FILE, LABELS_COLUMN_NAME, LABELS_TABLE_NAME, FTS_TABLE_NAME, FTS_COLUMN_WEIGHTS,
+    INDICATOR_VALUES_TABLE_NAME
+)
+
+# Wörter der Suchanfrage für die Volltextsuche (Buchstaben/Ziffern inkl. Umlaute)
+_QUERY_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Felder für die Anzeige einer EPD in Trefferlisten und Obergrenze des zugehörigen LRU-Caches
+DISPLAY_INFO_COLUMNS = ("name", "ref_year", "valid_until", "owner")
+DISPLAY_CACHE_SIZE = 5000
+
+# Umweltdaten-Blöcke: Anzeigename -> Spalte in epd_environmental_indicators
+ENVIRONMENTAL_BLOCKS = {
+    "LCIA Results": "lcia_results_json",
+    "Key Flows": "key_flows_json",
+    "Biogenic Carbon": "biogenic_carbon_json",
+}
+# Obergrenze des Caches dekodierter Blöcke, gemessen an der Größe der JSON-Texte
+ENVIRONMENTAL_CACHE_BYTES = 32 * 1024 * 1024
+# EPDs pro Transaktion beim Massenspeichern der Umweltdaten (ein Commit je Block statt je EPD)
+ENVIRONMENTAL_BATCH_SIZE = 2000
+
+_ENVIRONMENTAL_UPSERT = """
+    INSERT INTO epd_environmental_indicators
+    (uuid, lcia_results_json, key_flows_json, biogenic_carbon_json, last_updated)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(uuid) DO UPDATE SET
+        lcia_results_json = excluded.lcia_results_json,
+        key_flows_json = excluded.key_flows_json,
+        biogenic_carbon_json = excluded.biogenic_carbon_json,
+        last_updated = excluded.last_updated
+"""
+_ENVIRONMENTAL_INSERT_NEW = """
+    INSERT OR IGNORE INTO epd_environmental_indicators
+    (uuid, lcia_results_json, key_flows_json, biogenic_carbon_json, last_updated)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+class DecodedBlockCache:
+    """
+    LRU-Cache dekodierter JSON-Blöcke, Schlüssel (uuid, last_updated, Block).
+    Da last_updated Teil des Schlüssels ist, werden geänderte Umweltdaten nie veraltet geliefert.
+    """
+
+    def __init__(self, max_bytes: int = ENVIRONMENTAL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+
+    def get_or_decode(self, key: tuple, raw: Optional[str]):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+        value = json.loads(raw) if raw else None
+        size = len(raw or "")
+        if size <= self.max_bytes:
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+
+class LazyEnvironmental(Mapping):
+    """
+    Umweltdaten einer EPD wie bisher als Mapping ("LCIA Results", "Key Flows", "Biogenic Carbon",
+    "last_updated"), die JSON-Blöcke werden aber erst beim ersten Zugriff dekodiert (über den
+    DecodedBlockCache des Services, wiederholte Detailansichten parsen also gar nicht mehr).
+    Die gelieferten Objekte sind zwischen Aufrufen geteilt und dürfen nicht verändert werden.
+    """
+
+    def __init__(self, uuid: str, last_updated: Optional[str], raw_blocks: Dict[str, Optional[str]],
+                 cache: DecodedBlockCache):
+        self._uuid = uuid
+        self._last_updated = last_updated
+        self._raw = raw_blocks
+        self._cache = cache
+        self._decoded: Dict[str, Any] = {}
+
+    def __getitem__(self, key):
+        if key == "last_updated":
+            return self._last_updated
+        if key not in self._decoded:
+            raw = self._raw[key]  # KeyError für unbekannte Blöcke
+            self._decoded[key] = self._cache.get_or_decode((self._uuid, self._last_updated, key), raw)
+        return self._decoded[key]
+
+    def __iter__(self):
+        yield from self._raw
+        yield "last_updated"
+
+    def __len__(self):
+        return len(self._raw) + 1
+
+    def raw_json(self, key: str) -> Optional[str]:
+        """Unveränderter JSON-Text eines Blocks (ohne Dekodieren)."""
+        return self._raw[key]
 
-from src.core.db_setup import get_connection
-from src.utils.constants import DB_FILE, LABELS_COLUMN_NAME
 
 class EPDService:
     def __init__(self, db_path: str = DB_FILE):
         self.db_path = db_path
+        self._pool = ConnectionPool(db_path)
+        # Spalten von epds, gecacht pro PRAGMA schema_version (ändert sich bei jeder Schemaänderung)
+        self._epds_columns_cache: tuple[int, frozenset] | None = None
+        self._display_cache: OrderedDict[str, dict] = OrderedDict()  # uuid -> Anzeigeinfos (LRU)
+        self._environmental_cache = DecodedBlockCache()
+        self._fts_tokenizer: Optional[str] = None  # None = noch nicht geprüft, "" = nicht verfügbar
+        self._labels_table_ready = False
+        self._indicator_values_ready = False
 
     def fetch_by_labels(
         self, labels: List[str], columns: List[str]
     ) -> List[Dict[str, Any]]:
         """
-        Liefert alle EPDs, deren application_labels eines der labels enthält.
+        Liefert alle EPDs, denen eines der labels zugeordnet ist (Index-Lookup über epd_labels).
         Gibt nur uuid, name und die explizit gewünschten Spalten zurück.
         """
-        with get_connection(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cur = conn.cursor()
 
             # valid columns prüfen
-            cur.execute("PRAGMA table_info(epds)")
-            valid = {r["name"] for r in cur.fetchall()}
+            valid = self._epds_columns(conn)
             cols = ["uuid", "name"] + [c for c in columns if c in valid]
             cols_sql = ", ".join(f'"{c}"' for c in cols)
 
             if not labels:
                 return []  # oder raise ValueError
 
-            where = " OR ".join(f'"{LABELS_COLUMN_NAME}" LIKE ?' for _ in labels)
-            params = [f"%{lbl}%" for lbl in labels]
+            where, params = self._labels_filter(labels)
 
             cur.execute(f"SELECT {cols_sql} FROM epds WHERE {where}", params)
             return [dict(r) for r in cur.fetchall()]
 
-    def get_display_info_for_uuids(self, uuids: list[str]) -> dict[str, dict]:
+    def close(self):
+        """Schließt alle Verbindungen des Pools (beim Beenden der Anwendung)."""
+        self._pool.close_all()
+
+    def _epds_columns(self, conn) -> frozenset:
+        """Spaltennamen von epds; PRAGMA table_info läuft nur nach einer Schemaänderung erneut."""
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        if self._epds_columns_cache is None or self._epds_columns_cache[0] != version:
+            columns = frozenset(r["name"] for r in conn.execute("PRAGMA table_info(epds)"))
+            self._epds_columns_cache = (version, columns)
+        return self._epds_columns_cache[1]
+
+    def _labels_filter(self, labels: List[str], table_alias: str = "epds") -> tuple[str, list]:
         """
-        Holt für eine Liste von UUIDs die Felder name, ref_year, valid_until, owner.
-        Gibt ein Dictionary zurück: {uuid: {name: ..., ref_year: ..., ...}}
+        WHERE-Teil (ohne 'WHERE') und Parameter für 'hat eines der labels'.
+        Nutzt die Zuordnungstabelle epd_labels (Primärschlüssel label, uuid); nur wenn sie
+        nicht angelegt werden kann (z.B. schreibgeschützte DB), die alte LIKE-Suche.
         """
-        if not uuids:
-            return {}
+        placeholders = ", ".join("?" for _ in labels)
+        if self._ensure_labels_table():
+            return (
+                f"{table_alias}.uuid IN (SELECT uuid FROM {LABELS_TABLE_NAME} WHERE label IN ({placeholders}))",
+                [lbl.upper() for lbl in labels]
+            )
+        where = " OR ".join(f'{table_alias}."{LABELS_COLUMN_NAME}" LIKE ?' for _ in labels)
+        return f"({where})", [f"%{lbl}%" for lbl in labels]
 
-        # Erzeuge Platzhalter für die SQL IN-Klausel
-        placeholders = ', '.join('?' for _ in uuids)
-        query = f"""
-            SELECT uuid, name, ref_year, valid_until, owner
-            FROM epds
-            WHERE uuid IN ({placeholders})
+    def _ensure_schema(self):
         """
-        results_dict = {}
-        with self.get_connection() as conn:
+        Bringt die Datenbank einmal pro Service per Migration auf den aktuellen Stand
+        (die App-Datenbank liegt nicht zwingend dort, wo init_db beim Start migriert) und
+        merkt sich, welche optionalen Strukturen verfügbar sind. Bei schreibgeschützter
+        Datenbank wird mit dem vorhandenen Stand gearbeitet.
+        """
+        if self._fts_tokenizer is not None:
+            return
+        with self._pool.connection() as conn:
+            try:
+                migrate(conn)
+            except sqlite3.Error as e:
+                print(f"WARNUNG: Datenbank-Migration nicht möglich, nutze vorhandenes Schema: {e}")
+            if not table_exists(conn, FTS_TABLE_NAME):
+                # Migration 3 ist ohne FTS5 als erledigt vermerkt; nach einem SQLite-Update nachholen
+                try:
+                    create_fts_index(conn)
+                except sqlite3.Error as e:
+                    print(f"WARNUNG: Volltextindex konnte nicht angelegt werden: {e}")
+            self._labels_table_ready = table_exists(conn, LABELS_TABLE_NAME)
+            self._indicator_values_ready = table_exists(conn, INDICATOR_VALUES_TABLE_NAME)
+            fts = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (FTS_TABLE_NAME,)).fetchone()
+            self._fts_tokenizer = ("trigram" if "trigram" in fts["sql"] else "unicode61") if fts else ""
+
+    def _ensure_labels_table(self) -> bool:
+        self._ensure_schema()
+        return self._labels_table_ready
+
+    def _ensure_indicator_values(self) -> bool:
+        self._ensure_schema()
+        return self._indicator_values_ready
+
+    def _ensure_search_index(self) -> str:
+        """Verwendeter FTS5-Tokenizer bzw. "" ohne Volltextindex."""
+        self._ensure_schema()
+        return self._fts_tokenizer
+
+    @staticmethod
+    def _build_fts_query(text: str, tokenizer: str, search_columns: List[str]) -> str:
+        """
+        Baut den MATCH-Ausdruck: Wörter ODER-verknüpft (bm25 bewertet Dokumente mit mehr
+        Treffern höher). trigram findet Teilwörter ab 3 Zeichen, unicode61 sucht mit Präfix.
+        """
+        terms = []
+        for token in _QUERY_TOKEN.findall(text.lower()):
+            if tokenizer == "trigram":
+                if len(token) >= 3:
+                    terms.append(f'"{token}"')
+            elif len(token) >= 2:
+                terms.append(f'"{token}"*')
+        if not terms:
+            return ""
+        query = " OR ".join(dict.fromkeys(terms))
+        if search_columns:
+            query = "{" + " ".join(search_columns) + "} : (" + query + ")"
+        return query
+
+    def search_text(
+        self,
+        text: str,
+        labels: Optional[List[str]] = None,
+        columns: Optional[List[str]] = None,
+        search_columns: Optional[List[str]] = None,
+        limit: int = 50
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Rangierte Volltextsuche (FTS5, bm25) über die Textspalten der EPDs.
+        labels schränkt wie fetch_by_labels ein, search_columns begrenzt die durchsuchten
+        Spalten (Standard: alle FTS_COLUMNS). Liefert uuid, name, die gewünschten columns
+        und 'score' (höher = besser) absteigend sortiert.
+        Gibt None zurück, wenn kein Volltextindex verfügbar ist (Aufrufer nutzt dann fuzzy_search).
+        """
+        tokenizer = self._ensure_search_index()
+        if not tokenizer:
+            return None
+        search_columns = [c for c in (search_columns or []) if c in FTS_COLUMNS]
+        match = self._build_fts_query(text or "", tokenizer, search_columns)
+        if not match:
+            return []
+
+        weights = ", ".join(["0.0"] + [str(FTS_COLUMN_WEIGHTS.get(c, 1.0)) for c in FTS_COLUMNS])
+        with self._pool.connection() as conn:
             cur = conn.cursor()
-            cur.execute(query, uuids)
-            for row in cur.fetchall():
-                results_dict[row['uuid']] = {
-                    'name': row['name'],  # Name auch hier holen für Konsistenz
-                    'ref_year': row['ref_year'],
-                    'valid_until': row['valid_until'],
-                    'owner': row['owner']
-                }
-        return results_dict
+            valid = self._epds_columns(conn)
+            cols = ["uuid", "name"] + [c for c in (columns or []) if c in valid and c not in ("uuid", "name")]
+            cols_sql = ", ".join(f'e."{c}"' for c in cols)
+
+            where = f"{FTS_TABLE_NAME} MATCH ?"
+            params: list = [match]
+            if labels:
+                labels_sql, label_params = self._labels_filter(labels, table_alias="e")
+                where += f" AND {labels_sql}"
+                params += label_params
+            cur.execute(
+                f"SELECT {cols_sql}, -bm25({FTS_TABLE_NAME}, {weights}) AS score "
+                f"FROM {FTS_TABLE_NAME} JOIN epds e ON e.uuid = {FTS_TABLE_NAME}.uuid "
+                f"WHERE {where} ORDER BY score DESC LIMIT ?",
+                params + [limit]
+            )
+            return [dict(r) for r in cur.fetchall()]
 
     def get_display_info_for_uuids(self, uuids: list[str]) -> dict[str, dict]:
         """
         Holt für eine Liste von UUIDs die Felder name, ref_year, valid_until, owner.
         Gibt ein Dictionary zurück: {uuid: {name: ..., ref_year: ..., ...}}
+        Bereits bekannte Einträge kommen aus einem LRU-Cache, der Rest wird in IN-Abfragen
+        unterhalb des SQLite-Variablenlimits nachgeladen. Unbekannte UUIDs fehlen im Ergebnis.
         """
         if not uuids:
             return {}
 
-        placeholders = ', '.join('?' for _ in uuids)
-        query = f"""
-            SELECT uuid, name, ref_year, valid_until, owner
-            FROM epds
-            WHERE uuid IN ({placeholders})
-        """
         results_dict = {}
-        with self.get_connection() as conn:
-            cur = conn.cursor()
-            # print(f"DEBUG EPDService Query: {query} with UUIDs: {uuids}") # Für Debugging
-            cur.execute(query, uuids)
-            for row in cur.fetchall():
-                results_dict[row['uuid']] = {
-                    'name': row['name'],
-                    'ref_year': row['ref_year'],
-                    'valid_until': row['valid_until'],
-                    'owner': row['owner']
-                }
+        missing = []
+        for uuid in dict.fromkeys(uuids):  # Reihenfolge behalten, Duplikate entfernen
+            cached = self._display_cache.get(uuid)
+            if cached is not None:
+                self._display_cache.move_to_end(uuid)
+                results_dict[uuid] = dict(cached)
+            else:
+                missing.append(uuid)
+
+        if missing:
+            with self._pool.connection() as conn:
+                chunk_size = self._max_variables(conn)
+                for start in range(0, len(missing), chunk_size):
+                    chunk = missing[start:start + chunk_size]
+                    placeholders = ', '.join('?' for _ in chunk)
+                    rows = conn.execute(
+                        f"SELECT uuid, {', '.join(DISPLAY_INFO_COLUMNS)} FROM epds WHERE uuid IN ({placeholders})",
+                        chunk
+                    ).fetchall()
+                    for row in rows:
+                        info = {col: row[col] for col in DISPLAY_INFO_COLUMNS}
+                        results_dict[row['uuid']] = info
+                        self._display_cache[row['uuid']] = dict(info)
+
+            while len(self._display_cache) > DISPLAY_CACHE_SIZE:
+                self._display_cache.popitem(last=False)
         return results_dict
 
+    def invalidate_display_cache(self, uuids: Optional[List[str]] = None):
+        """Verwirft gecachte Anzeigeinfos (alle oder nur die der angegebenen UUIDs)."""
+        if uuids is None:
+            self._display_cache.clear()
+        else:
+            for uuid in uuids:
+                self._display_cache.pop(uuid, None)
+
+    @staticmethod
+    def _max_variables(conn) -> int:
+        """Maximale Anzahl gebundener Parameter pro Anweisung (ältere SQLite-Versionen: 999)."""
+        try:
+            return conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:  # Python < 3.11
+            return 999
+
     def get_details(self, uuid: str) -> Dict[str, Any]:
         """
         Lädt ein EPD komplett plus evtl. zugehörige Umwelt-JSON.
+        epd["environmental"] ist ein LazyEnvironmental: die JSON-Blöcke werden erst beim
+        Zugriff dekodiert und über uuid + last_updated gecacht.
         """
-        with get_connection(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cur = conn.cursor()
             cur.execute("SELECT * FROM epds WHERE uuid = ?", (uuid,))
             row = cur.fetchone()
@@ -111,14 +360,58 @@ class EPDService:
             )
             env = cur.fetchone()
             if env:
-                epd["environmental"] = {
-                    "LCIA Results": json.loads(env["lcia_results_json"]),
-                    "Key Flows":   json.loads(env["key_flows_json"]),
-                    "Biogenic Carbon": json.loads(env["biogenic_carbon_json"]),
-                    "last_updated": env["last_updated"],
-                }
+                epd["environmental"] = LazyEnvironmental(
+                    uuid,
+                    env["last_updated"],
+                    {block: env[column] for block, column in ENVIRONMENTAL_BLOCKS.items()},
+                    self._environmental_cache
+                )
             return epd
 
+    def upsert_epds(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Legt EPDs an oder aktualisiert sie per executemany in einer Transaktion.
+        Geschrieben werden nur die in rows vorhandenen Spalten von epds, andere Spalten
+        (z.B. application_labels) bleiben bei bestehenden EPDs erhalten.
+        Volltextindex und Label-Zuordnung folgen über die Trigger; gecachte Anzeigeinfos
+        der betroffenen UUIDs werden verworfen, der Änderungszähler (epd_data_version) erhöht.
+        Gibt die Anzahl geschriebener EPDs zurück.
+        """
+        if not rows:
+            return 0
+        self._ensure_schema()
+        with self._pool.connection() as conn:
+            valid = self._epds_columns(conn)
+            cols = ["uuid"] + [c for c in dict.fromkeys(k for row in rows for k in row) if c in valid and c != "uuid"]
+            cols_sql = ", ".join(f'"{c}"' for c in cols)
+            updates = ", ".join(f'"{c}" = excluded."{c}"' for c in cols[1:])
+            conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            conn.executemany(
+                f"INSERT INTO epds ({cols_sql}) VALUES ({', '.join('?' for _ in cols)}) "
+                f"ON CONFLICT(uuid) {conflict}",
+                [tuple(row.get(c) for c in cols) for row in rows]
+            )
+            bump_data_version(conn)  # z.B. Vektorindex der semantischen Suche veraltet
+        self.invalidate_display_cache([row["uuid"] for row in rows])
+        return len(rows)
+
+    def delete_epds(self, uuids: List[str]) -> int:
+        """
+        Löscht EPDs samt Umweltdaten, Indikatorwerten und Label-Zuordnung (ON DELETE CASCADE,
+        Volltextindex per Trigger) und verwirft deren gecachte Anzeigeinfos.
+        Gibt die Anzahl gelöschter EPDs zurück.
+        """
+        if not uuids:
+            return 0
+        self._ensure_schema()
+        with self._pool.connection() as conn:
+            # rowcount zählt nur die direkt gelöschten EPDs, nicht die kaskadierten Zeilen
+            deleted = conn.executemany("DELETE FROM epds WHERE uuid = ?", [(uuid,) for uuid in uuids]).rowcount
+            if deleted:
+                bump_data_version(conn)
+        self.invalidate_display_cache(list(uuids))
+        return deleted
+
     def save_environmental(
             self,
             uuid: str,
@@ -127,21 +420,207 @@ class EPDService:
             biogenic: dict
     ) -> None:
         """
-        Legt die Umweltdaten für ein EPD an oder ersetzt sie (INSERT OR REPLACE).
+        Legt die Umweltdaten für ein EPD an oder ersetzt sie.
+        Für viele EPDs save_environmental_many verwenden (ein Commit je Block statt je EPD).
+        """
+        self.save_environmental_many([(uuid, lcia, key_flows, biogenic)])
+
+    def save_environmental_many(
+            self,
+            records,
+            upsert: bool = True,
+            batch_size: int = ENVIRONMENTAL_BATCH_SIZE,
+            message_callback=None,
+            progress_callback=None
+    ) -> Dict[str, Any]:
+        """
+        Speichert Umweltdaten vieler EPDs in großen Transaktionen per executemany.
+
+        records: beliebiges Iterable (auch Generator) aus Tupeln (uuid, lcia, key_flows, biogenic)
+        oder Mappings mit diesen Schlüsseln; es wird blockweise gelesen, nie komplett im Speicher.
+        upsert=True ersetzt vorhandene Daten, upsert=False legt nur neue EPDs an und lässt
+        vorhandene unverändert. Kommt eine UUID mehrfach in einem Block vor, gilt bei upsert
+        der letzte, sonst der erste Eintrag. Die spaltenweisen Indikatorwerte werden im selben
+        Block mitgeschrieben.
+
+        Gibt {"records", "indicator_values", "seconds", "rows_per_s"} zurück; records zählt
+        die tatsächlich geschriebenen EPDs.
         """
+        with_values = self._ensure_indicator_values()
+        total = len(records) if hasattr(records, "__len__") else 0
+        now = datetime.now().isoformat()
+        stats = {"records": 0, "indicator_values": 0, "seconds": 0.0, "rows_per_s": 0.0}
+        start = time.perf_counter()
+        seen = 0
+
+        batch: Dict[str, tuple] = {}
+        for record in records:
+            row = self._environmental_row(record, now)
+            seen += 1
+            if upsert or row[0] not in batch:
+                batch[row[0]] = row
+            if len(batch) >= batch_size:
+                self._write_environmental_batch(list(batch.values()), upsert, with_values, stats)
+                batch = {}
+                if progress_callback:
+                    progress_callback(seen, total, f"Umweltdaten: {seen} EPDs gespeichert")
+        if batch:
+            self._write_environmental_batch(list(batch.values()), upsert, with_values, stats)
+
+        stats["seconds"] = time.perf_counter() - start
+        if stats["seconds"] > 0:
+            stats["rows_per_s"] = stats["records"] / stats["seconds"]
+        if progress_callback:
+            progress_callback(seen, total or seen, "Umweltdaten gespeichert")
+        if message_callback:
+            message_callback(
+                f"Umweltdaten: {stats['records']} EPDs, {stats['indicator_values']} Indikatorwerte "
+                f"in {stats['seconds']:.2f} s ({stats['rows_per_s']:.0f} EPDs/s)"
+            )
+        return stats
+
+    @staticmethod
+    def _environmental_row(record, now: str) -> tuple:
+        """(uuid, lcia_json, flows_json, bio_json, last_updated, lcia) aus Tupel oder Mapping."""
+        if isinstance(record, Mapping):
+            uuid = record.get("uuid")
+            lcia, key_flows, biogenic = (record.get(k) for k in ("lcia", "key_flows", "biogenic"))
+        else:
+            uuid, lcia, key_flows, biogenic = record
         if not uuid:
             raise ValueError("UUID darf nicht leer sein")
+        return (
+            uuid,
+            json.dumps(lcia, ensure_ascii=False),
+            json.dumps(key_flows, ensure_ascii=False),
+            json.dumps(biogenic, ensure_ascii=False),
+            now,
+            lcia
+        )
 
-        now = datetime.now().isoformat()
-        lcia_js = json.dumps(lcia, ensure_ascii=False)
-        flows_js = json.dumps(key_flows, ensure_ascii=False)
-        bio_js = json.dumps(biogenic, ensure_ascii=False)
+    def _write_environmental_batch(self, batch: List[tuple], upsert: bool, with_values: bool, stats: dict):
+        """Schreibt einen Block in einer Transaktion (Commit am Ende des with-Blocks)."""
+        with self._pool.connection() as conn:
+            if not upsert:
+                existing = set()
+                uuids = [row[0] for row in batch]
+                size = self._max_variables(conn)
+                for start in range(0, len(uuids), size):
+                    chunk = uuids[start:start + size]
+                    existing.update(r[0] for r in conn.execute(
+                        f"SELECT uuid FROM epd_environmental_indicators WHERE uuid IN ({', '.join('?' for _ in chunk)})",
+                        chunk
+                    ))
+                batch = [row for row in batch if row[0] not in existing]
+            conn.executemany(_ENVIRONMENTAL_UPSERT if upsert else _ENVIRONMENTAL_INSERT_NEW,
+                             [row[:5] for row in batch])
+            # Spaltenweise Werte in derselben Transaktion, damit JSON und Tabelle nie auseinanderlaufen
+            if with_values:
+                stats["indicator_values"] += replace_indicator_values_many(conn, [(row[0], row[5]) for row in batch])
+        stats["records"] += len(batch)
 
-        with get_connection(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT OR REPLACE INTO epd_environmental_indicators
-                (uuid, lcia_results_json, key_flows_json, biogenic_carbon_json, last_updated)
-                VALUES (?, ?, ?, ?, ?)
-            """, (uuid, lcia_js, flows_js, bio_js, now))
-            conn.commit()
+    def get_indicator_values(
+            self,
+            uuids: List[str],
+            indicators: Optional[List[str]] = None,
+            modules: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Liest LCIA-Werte vieler EPDs aus epd_indicator_values statt jedes JSON einzeln zu parsen.
+        Ergebnis: {uuid: {indicator: {module: value}}}; EPDs ohne Werte fehlen.
+        indicators/modules schränken auf die angegebenen Indikatoren bzw. Module ein.
+        """
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for row in self._query_indicator_values(uuids, indicators, modules):
+            result.setdefault(row["uuid"], {}).setdefault(row["indicator"], {})[row["module"]] = row["value"]
+        return result
+
+    def get_indicator_vectors(
+            self,
+            uuids: List[str],
+            indicator: str,
+            modules: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Werte eines Indikators (z.B. GWP-total) je Modul für viele EPDs in einer Abfrage:
+        {uuid: {module: value}}. Grundlage für Ranking und Summen von Treffern nach Umweltwirkung.
+        """
+        result: Dict[str, Dict[str, float]] = {}
+        for row in self._query_indicator_values(uuids, [indicator], modules):
+            result.setdefault(row["uuid"], {})[row["module"]] = row["value"]
+        return result
+
+    def aggregate_indicator(
+            self,
+            indicator: str,
+            uuids: Optional[List[str]] = None,
+            modules: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregiert einen Indikator je Modul in SQL (über alle EPDs oder nur über uuids):
+        {module: {"count", "min", "max", "avg", "sum", "unit"}}.
+        """
+        if not self._ensure_indicator_values() or (uuids is not None and not uuids):
+            return {}
+        where = "indicator = ?"
+        params: list = [indicator]
+        if modules:
+            where += f" AND module IN ({', '.join('?' for _ in modules)})"
+            params += list(modules)
+
+        sums: Dict[str, Dict[str, Any]] = {}
+        with self._pool.connection() as conn:
+            # Ohne uuids eine Abfrage über den Index (indicator, module, value, uuid),
+            # sonst in Blöcken unterhalb des Variablenlimits und hier zusammengeführt
+            chunks = [None]
+            if uuids is not None:
+                unique = list(dict.fromkeys(uuids))
+                size = max(1, self._max_variables(conn) - len(params))
+                chunks = [unique[i:i + size] for i in range(0, len(unique), size)]
+            for chunk in chunks:
+                chunk_where, chunk_params = where, params
+                if chunk is not None:
+                    chunk_where += f" AND uuid IN ({', '.join('?' for _ in chunk)})"
+                    chunk_params = params + chunk
+                rows = conn.execute(
+                    f"SELECT module, COUNT(value) AS count, MIN(value) AS min, MAX(value) AS max, "
+                    f"SUM(value) AS sum, MAX(unit) AS unit FROM {INDICATOR_VALUES_TABLE_NAME} "
+                    f"WHERE {chunk_where} GROUP BY module",
+                    chunk_params
+                ).fetchall()
+                for row in rows:
+                    entry = sums.setdefault(row["module"], {"count": 0, "min": None, "max": None, "sum": 0.0,
+                                                            "unit": row["unit"]})
+                    entry["count"] += row["count"]
+                    entry["sum"] += row["sum"] or 0.0
+                    entry["min"] = row["min"] if entry["min"] is None else min(entry["min"], row["min"])
+                    entry["max"] = row["max"] if entry["max"] is None else max(entry["max"], row["max"])
+        for entry in sums.values():
+            entry["avg"] = entry["sum"] / entry["count"] if entry["count"] else None
+        return sums
+
+    def _query_indicator_values(self, uuids, indicators, modules) -> list:
+        """Zeilen (uuid, indicator, module, value) für uuids, blockweise per Primärschlüssel-Lookup."""
+        if not uuids or not self._ensure_indicator_values():
+            return []
+        where = ""
+        params: list = []
+        if indicators:
+            where += f" AND indicator IN ({', '.join('?' for _ in indicators)})"
+            params += list(indicators)
+        if modules:
+            where += f" AND module IN ({', '.join('?' for _ in modules)})"
+            params += list(modules)
+
+        rows = []
+        unique = list(dict.fromkeys(uuids))
+        with self._pool.connection() as conn:
+            size = max(1, self._max_variables(conn) - len(params))
+            for start in range(0, len(unique), size):
+                chunk = unique[start:start + size]
+                rows += conn.execute(
+                    f"SELECT uuid, indicator, module, value FROM {INDICATOR_VALUES_TABLE_NAME} "
+                    f"WHERE uuid IN ({', '.join('?' for _ in chunk)}){where}",
+                    chunk + params
+                ).fetchall()
+        return rows
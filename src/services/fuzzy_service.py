@@ -1,7 +1,88 @@
 # src/services/fuzzy_service.py
 
+import heapq
+import math
+import multiprocessing
+import os
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
 from difflib import SequenceMatcher
-from typing import List, Dict, Any
+from multiprocessing import shared_memory
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Trenner zwischen den Spalten im Suchtext (kommt in Suchbegriffen praktisch nicht vor)
+TEXT_SEPARATOR = " ⎯ "
+# Länge der Zeichen-N-Gramme im invertierten Index
+NGRAM = 3
+# Anzahl gecachter FuzzyIndex-Objekte (je Label- und Spaltenauswahl)
+INDEX_CACHE_SIZE = 4
+
+# Bewertungsarten der Stichwortsuche
+SCORING_TOKEN = "token"          # TokenIndex: normalisierte Wortmengen mit Kompositazerlegung
+SCORING_SUBSTRING = "substring"  # FuzzyIndex: längster gemeinsamer Teilstring
+SCORING_METHODS = (SCORING_TOKEN, SCORING_SUBSTRING)
+
+# Umlaute und ß wie in der Umschrift "ae/oe/ue/ss", damit "Dämmung" und "Daemmung" gleich sind
+_TRANSLITERATION = (("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss"))
+# Kombinierende diakritische Zeichen (nach NFKD-Zerlegung entfernt: "é" -> "e")
+_COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+# Füllwörter ohne Aussagekraft für die Zuordnung (in normalisierter Schreibweise)
+STOPWORDS = frozenset("""
+    der die das den dem des ein eine einer eines einem einen und oder sowie bzw mit ohne fuer von
+    vom zum zur zu im in am an auf aus bei nach als ueber unter je pro ca inkl exkl etc usw nicht
+    the and or of for with without to in on at by from as per
+""".split())
+# Mindestlänge eines Wortes (sonst bei der Normalisierung verworfen)
+MIN_TOKEN_LENGTH = 2
+# Mindestlänge eines Kompositumbestandteils bzw. eines Präfixes bei der Suche
+COMPOUND_MIN_PART = 4
+# Fugenelemente zwischen Kompositumbestandteilen ("Arbeit-s-platte", "Sonne-n-schutz")
+LINKING_ELEMENTS = ("s", "es", "n", "en")
+# Gecachte Tokenlisten (je Suchtext) für normalize_tokens
+TOKEN_CACHE_SIZE = 200000
+
+
+def build_search_text(epd: Dict[str, Any], columns: List[str]) -> str:
+    """Suchtext einer EPD: name und columns, verbunden mit TEXT_SEPARATOR, kleingeschrieben."""
+    parts = [str(epd.get("name", "") or "")]
+    for col in columns:
+        parts.append(str(epd.get(col, "") or ""))
+    return TEXT_SEPARATOR.join(parts).lower()
+
+
+def min_match_length(query_length: int, cutoff: float) -> int:
+    """Kleinste Länge des längsten gemeinsamen Teilstrings, mit der score >= cutoff erreicht wird."""
+    needed = max(0, math.ceil(cutoff * query_length))
+    # Rundungsfehler (z.B. 0.7 * 10 = 7.000000000000001) nach unten korrigieren
+    while needed > 0 and (needed - 1) / query_length >= cutoff:
+        needed -= 1
+    return needed
+
+
+def longest_common_substring_length(query: str, text: str, upper: Optional[int] = None) -> int:
+    """
+    Länge des längsten gemeinsamen Teilstrings von query und text (= match.size von
+    SequenceMatcher(None, query, text, autojunk=False).find_longest_match ohne Junk).
+    Verlängert für jede Startposition den bisher besten Treffer per Teilstringsuche (in C),
+    statt wie SequenceMatcher Zeichen für Zeichen in Python zu vergleichen. upper ist eine
+    bekannte Obergrenze; ist sie erreicht, wird nicht weiter gesucht.
+    """
+    limit = len(query) if upper is None else min(upper, len(query))
+    best = 0
+    for start in range(len(query)):
+        if best >= limit or start + best >= len(query):
+            break
+        while best < limit and start + best < len(query) and query[start:start + best + 1] in text:
+            best += 1
+    return best
+
 
 def fuzzy_search(
     user_input: str,
@@ -14,6 +95,9 @@ def fuzzy_search(
     Sucht in `epds` (Liste von dicts) nach Strings, die `user_input` ähnlich sind.
     columns gibt zusätzliche Felder an, die in den Suchtext mit eingebunden werden.
     Liefert die besten `top_n` EPD-Dictionaries zurück, bei denen die Ähnlichkeit >= cutoff.
+
+    Referenzimplementierung (vollständiger Durchlauf); für wiederholte Suchen auf denselben
+    EPDs FuzzyIndex verwenden, der dieselbe Rangfolge liefert.
     """
     if not user_input or not isinstance(user_input, str):
         return []
@@ -23,10 +107,7 @@ def fuzzy_search(
 
     for epd in epds:
         # Baue den zu matchenden Text
-        parts = [str(epd.get("name", "") or "")]
-        for col in columns:
-            parts.append(str(epd.get(col, "") or ""))
-        text = " \u23AF ".join(parts).lower()
+        text = build_search_text(epd, columns)
 
         # Score berechnen
         try:
@@ -42,3 +123,562 @@ def fuzzy_search(
     # sortiere absteigend nach Score und gib nur das Dict zurück
     hits.sort(key=lambda x: x[0], reverse=True)
     return [epd for _, epd in hits[:top_n]]
+
+
+class FuzzyIndex:
+    """
+    Vorberechneter Suchkorpus für fuzzy_search: Suchtexte einmal gebaut und ein invertierter
+    Index Zeichen-Trigramm -> EPD-Positionen.
+
+    Suche:
+      1. Obergrenze je EPD aus dem Index: Ein gemeinsamer Teilstring der Länge L enthält L-2
+         aufeinanderfolgende Trigramme der Anfrage. Die längste Folge von Anfrage-Positionen,
+         deren Trigramm in der EPD vorkommt, begrenzt den Score also nach oben (vektorisiert
+         über alle EPDs). EPDs, deren Obergrenze unter dem cutoff liegt, werden nie bewertet.
+      2. Kandidaten absteigend nach Obergrenze exakt bewerten, die besten top_n in einem
+         begrenzten Heap halten und abbrechen, sobald keine Obergrenze den schlechtesten
+         Heap-Eintrag mehr schlagen kann.
+    Score und Rangfolge (bei Gleichstand Reihenfolge in epds) sind identisch zu fuzzy_search.
+    """
+
+    def __init__(self, epds: List[Dict[str, Any]], columns: List[str], texts: Optional[List[str]] = None):
+        self.epds = list(epds)
+        self.columns = list(columns)
+        self.uuids = tuple(epd.get("uuid") for epd in self.epds)
+        self.texts = texts if texts is not None else [build_search_text(epd, self.columns) for epd in self.epds]
+
+        postings: Dict[str, array] = {}
+        for i, text in enumerate(self.texts):
+            for gram in {text[k:k + NGRAM] for k in range(len(text) - NGRAM + 1)}:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("i")
+                posting.append(i)
+        # Als NumPy-Sichten (ohne Kopie) für das vektorisierte Markieren in upper_bounds
+        self.postings = {gram: np.frombuffer(posting, dtype=np.intc) for gram, posting in postings.items()}
+
+    @classmethod
+    def from_texts(cls, texts: List[str]) -> "FuzzyIndex":
+        """Index nur über fertige Suchtexte (Worker-Prozesse); search_positions liefert Positionen in texts."""
+        return cls([], [], texts=list(texts))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def matches(self, epds: List[Dict[str, Any]], columns: List[str]) -> bool:
+        """True, wenn der Index für genau diese EPDs (gleiche UUIDs, gleiche Reihenfolge) und Spalten gebaut wurde."""
+        return list(columns) == self.columns and tuple(epd.get("uuid") for epd in epds) == self.uuids
+
+    def close(self):
+        """Für die Schnittstelle von ParallelFuzzyIndex; der serielle Index hält keine Ressourcen."""
+
+    def upper_bounds(self, query: str) -> np.ndarray:
+        """
+        Obergrenze der Länge des längsten gemeinsamen Teilstrings von query mit jedem Suchtext:
+        längste Folge aufeinanderfolgender Anfrage-Trigramme, die im Text vorkommen, plus 2
+        (ohne gemeinsames Trigramm höchstens 2), nie mehr als len(query).
+        """
+        count = len(self.texts)
+        if len(query) < NGRAM:
+            return np.full(count, len(query), dtype=np.int32)
+        run = np.zeros(count, dtype=np.int32)
+        longest = np.zeros(count, dtype=np.int32)
+        present = np.zeros(count, dtype=bool)
+        for k in range(len(query) - NGRAM + 1):
+            present[:] = False
+            posting = self.postings.get(query[k:k + NGRAM])
+            if posting is not None:
+                present[posting] = True
+            run += 1
+            run *= present  # Folge endet, wo das Trigramm fehlt
+            np.maximum(longest, run, out=longest)
+        bounds = np.where(longest > 0, longest + NGRAM - 1, NGRAM - 1)
+        return np.minimum(bounds, len(query)).astype(np.int32)
+
+    def search(self, user_input: str, top_n: int = 10, cutoff: float = 0.5) -> List[Dict[str, Any]]:
+        """Wie fuzzy_search(user_input, epds, columns, top_n, cutoff) für die indizierten EPDs."""
+        return [self.epds[i] for _, i in self.search_positions(user_input, top_n, cutoff)]
+
+    def search_positions(self, user_input: str, top_n: int = 10, cutoff: float = 0.5) -> List[Tuple[float, int]]:
+        """Beste Treffer als (score, Position in epds), absteigend nach score."""
+        if not user_input or not isinstance(user_input, str) or top_n <= 0 or not self.texts:
+            return []
+        ui = user_input.lower()
+        query_length = len(ui)
+        bounds = self.upper_bounds(ui)
+        positions = np.flatnonzero(bounds >= min_match_length(query_length, cutoff))
+        # Höchste Obergrenze zuerst, bei Gleichstand Reihenfolge in epds
+        positions = positions[np.lexsort((positions, -bounds[positions]))]
+
+        heap: List[Tuple[float, int]] = []  # (score, -Position): kleinstes Element = schlechtester Treffer
+        for i, bound in zip(positions.tolist(), bounds[positions].tolist()):
+            if len(heap) == top_n and bound / query_length < heap[0][0]:
+                break  # alle weiteren Kandidaten haben höchstens diese Obergrenze
+            score = longest_common_substring_length(ui, self.texts[i], bound) / query_length
+            if score < cutoff:
+                continue
+            entry = (score, -i)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        return [(score, -neg_i) for score, neg_i in sorted(heap, reverse=True)]
+
+
+def normalize_text(text: str) -> str:
+    """Kleinschreibung (casefold), Umlaute/ß umschreiben, übrige Akzente entfernen."""
+    text = unicodedata.normalize("NFC", text).casefold()
+    for umlaut, replacement in _TRANSLITERATION:
+        text = text.replace(umlaut, replacement)
+    if text.isascii():
+        return text
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text))
+
+
+def tokenize_text(text: str) -> Tuple[str, ...]:
+    """Normalisierte Wörter von text ohne Stoppwörter und zu kurze Wörter."""
+    return tuple(
+        token for token in _TOKEN_PATTERN.findall(normalize_text(text))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    )
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def normalize_tokens(text: str) -> Tuple[str, ...]:
+    """Wie tokenize_text, gecacht je Text (Suchtexte werden für jeden Index erneut zerlegt)."""
+    return tokenize_text(text)
+
+
+class CompoundSplitter:
+    """
+    Zerlegt Komposita in Wörter eines Vokabulars (aus dem EPD-Korpus), z.B.
+    "asphaltbinderschicht" -> ("asphalt", "binderschicht"), wenn beide Wörter im Korpus
+    einzeln vorkommen. Gewählt wird die Zerlegung mit den wenigsten Bestandteilen
+    (Fugenelemente erlaubt); Wörter ohne Zerlegung liefern ().
+    """
+
+    def __init__(self, vocabulary, min_part: int = COMPOUND_MIN_PART):
+        self.min_part = min_part
+        self.vocabulary = frozenset(word for word in vocabulary if len(word) >= min_part)
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+
+    def split(self, token: str) -> Tuple[str, ...]:
+        parts = self._cache.get(token)
+        if parts is None:
+            parts = self._cache[token] = self._split(token)
+        return parts
+
+    def split_all(self, token: str) -> List[str]:
+        """Alle Bestandteile, rekursiv zerlegt ("binderschicht" -> "binder", "schicht")."""
+        result = []
+        for part in self.split(token):
+            result.append(part)
+            result.extend(self.split_all(part))
+        return result
+
+    def _split(self, token: str) -> Tuple[str, ...]:
+        n, vocabulary, min_part = len(token), self.vocabulary, self.min_part
+        if n < 2 * min_part:
+            return ()
+        # best[i] = (Anzahl Bestandteile, Bestandteile) für die beste Zerlegung von token[:i]
+        best: List[Optional[Tuple[int, Tuple[str, ...]]]] = [None] * (n + 1)
+        best[0] = (0, ())
+        for i in range(min_part, n + 1):
+            for j in range(0, i - min_part + 1):
+                if best[j] is None:
+                    continue
+                segment = token[j:i]
+                if segment == token:
+                    continue
+                word = segment if segment in vocabulary else None
+                if word is None and i < n:
+                    word = next((segment[:-len(e)] for e in LINKING_ELEMENTS
+                                 if segment.endswith(e) and len(segment) - len(e) >= min_part
+                                 and segment[:-len(e)] in vocabulary), None)
+                if word is not None and (best[i] is None or best[j][0] + 1 < best[i][0]):
+                    best[i] = (best[j][0] + 1, best[j][1] + (word,))
+        return best[n][1] if best[n] is not None else ()
+
+
+class TokenIndex:
+    """
+    Stichwortsuche über normalisierte Wortmengen (Alternative zu FuzzyIndex, gleiche Schnittstelle).
+
+    Aufbau: Jeder Suchtext (build_search_text) wird normalisiert (normalize_tokens); das Vokabular
+    des Korpus dient der Zerlegung von Komposita (CompoundSplitter). Je EPD wird ein sortiertes
+    Array der Wort-IDs (eigene Wörter plus alle Bestandteile) vorberechnet, daraus ein invertierter
+    Index Wort-ID -> EPD-Positionen.
+    Score: Anteil der Anfragewörter, die in der EPD vorkommen. Ein Anfragewort zählt voll, wenn es
+    selbst vorkommt, sonst anteilig nach seinen Bestandteilen; ein unbekanntes Wort ohne Zerlegung
+    zählt als Präfix aller Wörter, die damit beginnen. "Asphaltbinderschicht" findet damit
+    "Binderschicht Asphalt" und umgekehrt. Die Bewertung läuft vektorisiert über alle EPDs;
+    bei gleichem Score zuerst die EPD mit dem kürzeren Suchtext, dann Reihenfolge in epds.
+    """
+
+    def __init__(self, epds: List[Dict[str, Any]], columns: List[str]):
+        self.epds = list(epds)
+        self.columns = list(columns)
+        self.uuids = tuple(epd.get("uuid") for epd in self.epds)
+        base_tokens = [normalize_tokens(build_search_text(epd, self.columns)) for epd in self.epds]
+        self.splitter = CompoundSplitter({token for tokens in base_tokens for token in tokens})
+
+        self.vocabulary: Dict[str, int] = {}
+        expanded: Dict[str, Tuple[int, ...]] = {}  # Wort -> IDs des Wortes und seiner Bestandteile
+        self.token_ids: List[np.ndarray] = []
+        for tokens in base_tokens:
+            ids = set()
+            for token in tokens:
+                token_ids = expanded.get(token)
+                if token_ids is None:
+                    token_ids = expanded[token] = tuple(
+                        self.vocabulary.setdefault(word, len(self.vocabulary))
+                        for word in (token, *self.splitter.split_all(token))
+                    )
+                ids.update(token_ids)
+            self.token_ids.append(np.array(sorted(ids), dtype=np.int32))
+        self.text_lengths = np.array([len(tokens) for tokens in base_tokens], dtype=np.int32)
+        self._sorted_words = sorted(self.vocabulary)
+
+        # Invertierter Index: alle (Wort-ID, Position)-Paare nach Wort-ID gruppieren
+        counts = np.array([len(ids) for ids in self.token_ids], dtype=np.int64)
+        all_ids = np.concatenate(self.token_ids) if self.token_ids else np.zeros(0, dtype=np.int32)
+        positions = np.repeat(np.arange(len(self.epds), dtype=np.int32), counts)
+        order = np.argsort(all_ids, kind="stable")
+        boundaries = np.searchsorted(all_ids[order], np.arange(len(self.vocabulary) + 1))
+        sorted_positions = positions[order]
+        self.postings = [sorted_positions[boundaries[k]:boundaries[k + 1]] for k in range(len(self.vocabulary))]
+
+    def __len__(self):
+        return len(self.epds)
+
+    def matches(self, epds: List[Dict[str, Any]], columns: List[str]) -> bool:
+        return list(columns) == self.columns and tuple(epd.get("uuid") for epd in epds) == self.uuids
+
+    def close(self):
+        """Für die Schnittstelle von ParallelFuzzyIndex; der Index hält keine Ressourcen."""
+
+    def _posting(self, word: str) -> Optional[np.ndarray]:
+        word_id = self.vocabulary.get(word)
+        return self.postings[word_id] if word_id is not None else None
+
+    def _prefix_words(self, prefix: str) -> List[str]:
+        start = bisect_left(self._sorted_words, prefix)
+        end = bisect_left(self._sorted_words, prefix + "\uffff")
+        return self._sorted_words[start:end]
+
+    def token_scores(self, token: str) -> np.ndarray:
+        """Beitrag eines normalisierten Anfragewortes je EPD (0..1)."""
+        scores = np.zeros(len(self.epds), dtype=np.float64)
+        parts = self.splitter.split(token)
+        for part in parts:
+            posting = self._posting(part)
+            if posting is not None:
+                scores[posting] += 1.0 / len(parts)
+        posting = self._posting(token)
+        if posting is not None:
+            scores[posting] = 1.0
+        elif not parts and len(token) >= COMPOUND_MIN_PART:
+            for word in self._prefix_words(token):
+                scores[self.postings[self.vocabulary[word]]] = 1.0
+        return scores
+
+    def scores(self, user_input: str) -> np.ndarray:
+        """
+        Score (0..1) jeder EPD für user_input. Anfragewörter, die in keiner EPD vorkommen
+        (z.B. Maße wie "12,5 mm"), unterscheiden nicht zwischen EPDs und zählen nicht mit.
+        """
+        total = np.zeros(len(self.epds), dtype=np.float64)
+        known = 0
+        for token in dict.fromkeys(normalize_tokens(user_input)):
+            token_scores = self.token_scores(token)
+            if token_scores.any():
+                total += token_scores
+                known += 1
+        return total / known if known else total
+
+    def search(self, user_input: str, top_n: int = 10, cutoff: float = 0.5) -> List[Dict[str, Any]]:
+        return [self.epds[i] for _, i in self.search_positions(user_input, top_n, cutoff)]
+
+    def search_positions(self, user_input: str, top_n: int = 10, cutoff: float = 0.5) -> List[Tuple[float, int]]:
+        """Beste Treffer als (score, Position in epds), absteigend nach score."""
+        if not user_input or not isinstance(user_input, str) or top_n <= 0 or not self.epds:
+            return []
+        scores = self.scores(user_input)
+        candidates = np.flatnonzero((scores > 0) & (scores >= cutoff - 1e-9))
+        if len(candidates) > top_n:
+            # Nur Kandidaten ab dem top_n-besten Score sortieren (Gleichstände bleiben erhalten)
+            threshold = np.partition(scores[candidates], -top_n)[-top_n]
+            candidates = candidates[scores[candidates] >= threshold]
+        order = np.lexsort((candidates, self.text_lengths[candidates], -scores[candidates]))
+        best = candidates[order[:top_n]]
+        return list(zip(scores[best].tolist(), best.tolist()))
+
+
+def resolve_num_workers(num_workers: int) -> int:
+    """Anzahl Worker-Prozesse; 0 = automatisch (CPU-Kerne - 1, der GUI-Prozess behält einen Kern)."""
+    return num_workers if num_workers > 0 else max(1, (os.cpu_count() or 2) - 1)
+
+
+def _fuzzy_worker_main(conn):
+    """
+    Hauptschleife eines Worker-Prozesses des FuzzyWorkerPool. Nachrichten:
+      ("load", corpus_id, shm_name, count, start, end) -> Texte start..end aus dem Shared Memory
+                                                         kopieren und indizieren, Antwort "ok"
+      ("search", corpus_id, query, top_n, cutoff)       -> [(score, globale Position), ...]
+      ("drop", corpus_id)                               -> Index verwerfen (ohne Antwort)
+      None                                              -> Ende
+    """
+    indexes: Dict[int, Tuple[int, FuzzyIndex]] = {}
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        command, corpus_id = message[0], message[1]
+        try:
+            if command == "load":
+                _, _, shm_name, count, start, end = message
+                indexes[corpus_id] = (start, FuzzyIndex.from_texts(_read_shared_texts(shm_name, count, start, end)))
+                conn.send("ok")
+            elif command == "search":
+                _, _, query, top_n, cutoff = message
+                start, index = indexes[corpus_id]
+                conn.send([(score, start + i) for score, i in index.search_positions(query, top_n, cutoff)])
+            elif command == "drop":
+                indexes.pop(corpus_id, None)
+        except Exception as e:  # Fehler an den Aufrufer melden statt den Worker zu beenden
+            if command != "drop":
+                conn.send(e)
+
+
+def _write_shared_texts(texts: List[str]) -> shared_memory.SharedMemory:
+    """Legt texts als [Offsets (int64, count + 1)][UTF-8-Daten] in einem neuen Shared-Memory-Block ab."""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    header = offsets.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(1, header + int(offsets[-1])))
+    shm.buf[:header] = offsets.tobytes()
+    shm.buf[header:header + int(offsets[-1])] = b"".join(encoded)
+    return shm
+
+
+def _read_shared_texts(shm_name: str, count: int, start: int, end: int) -> List[str]:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        header = (count + 1) * 8
+        offsets = np.frombuffer(shm.buf[:header], dtype=np.int64).tolist()
+        return [bytes(shm.buf[header + offsets[i]:header + offsets[i + 1]]).decode("utf-8")
+                for i in range(start, end)]
+    finally:
+        shm.close()
+
+
+class FuzzyWorkerPool:
+    """
+    Dauerhafte Worker-Prozesse für die parallele Fuzzy-Suche. Jeder Worker hält einen Abschnitt
+    (Shard) jedes geladenen Korpus als eigenen FuzzyIndex. Der Korpus wird einmal über Shared
+    Memory verteilt (nicht pro Anfrage gepickelt); pro Anfrage gehen nur Suchtext und Parameter
+    an alle Worker, deren top_n-Listen anschließend zusammengeführt werden.
+    Die Prozesse werden beim ersten load() gestartet (spawn, auch unter Windows und neben Qt sicher).
+    """
+
+    def __init__(self, num_workers: int = 0):
+        self.num_workers = resolve_num_workers(num_workers)
+        self._connections = []
+        self._processes = []
+        self._next_corpus_id = 0
+
+    def _start(self):
+        if self._processes:
+            return
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.num_workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_fuzzy_worker_main, args=(child_conn,), daemon=True)
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def _request_all(self, messages: list) -> list:
+        """Sendet je Worker eine Nachricht und sammelt die Antworten (die Worker arbeiten parallel)."""
+        try:
+            for conn, message in zip(self._connections, messages):
+                conn.send(message)
+            replies = [conn.recv() for conn in self._connections[:len(messages)]]
+        except (OSError, EOFError):
+            # Worker abgestürzt: Antworten der übrigen wären nicht mehr zuzuordnen, Pool neu starten lassen
+            self.close()
+            raise
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def load(self, texts: List[str]) -> int:
+        """Verteilt texts auf die Worker und gibt die Korpus-ID für search()/drop() zurück."""
+        self._start()
+        corpus_id = self._next_corpus_id
+        self._next_corpus_id += 1
+        bounds = np.linspace(0, len(texts), len(self._connections) + 1).astype(int).tolist()
+        shm = _write_shared_texts(texts)
+        try:
+            self._request_all([
+                ("load", corpus_id, shm.name, len(texts), bounds[k], bounds[k + 1])
+                for k in range(len(self._connections))
+            ])
+        finally:
+            # Die Worker haben ihre Abschnitte kopiert; der Block wird nicht mehr gebraucht
+            shm.close()
+            shm.unlink()
+        return corpus_id
+
+    def search(self, corpus_id: int, query: str, top_n: int, cutoff: float) -> List[Tuple[float, int]]:
+        """Beste top_n als (score, Position), zusammengeführt aus den Shards; Gleichstand nach Position."""
+        replies = self._request_all([("search", corpus_id, query, top_n, cutoff)] * len(self._connections))
+        merged = [hit for reply in replies for hit in reply]
+        return heapq.nsmallest(top_n, merged, key=lambda hit: (-hit[0], hit[1]))
+
+    def drop(self, corpus_id: int):
+        for conn in self._connections:
+            try:
+                conn.send(("drop", corpus_id))
+            except OSError:
+                pass
+
+    def close(self):
+        """Beendet alle Worker-Prozesse."""
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._connections:
+            conn.close()
+        self._connections, self._processes = [], []
+
+
+class ParallelFuzzyIndex:
+    """
+    Wie FuzzyIndex, die Bewertung läuft aber verteilt im FuzzyWorkerPool (auch der Indexaufbau
+    erfolgt parallel in den Workern). Fällt der Pool aus, wird auf einen seriellen FuzzyIndex
+    gewechselt. Gleiche Ergebnisse wie FuzzyIndex und fuzzy_search.
+    """
+
+    def __init__(self, epds: List[Dict[str, Any]], columns: List[str], pool: FuzzyWorkerPool):
+        self.epds = list(epds)
+        self.columns = list(columns)
+        self.uuids = tuple(epd.get("uuid") for epd in self.epds)
+        self.texts = [build_search_text(epd, self.columns) for epd in self.epds]
+        self.pool = pool
+        self._serial: Optional[FuzzyIndex] = None
+        try:
+            self._corpus_id: Optional[int] = pool.load(self.texts)
+        except (OSError, EOFError) as e:
+            print(f"WARNUNG: Parallele Fuzzy-Suche nicht verfügbar, nutze seriellen Index: {e}")
+            self._corpus_id = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def matches(self, epds: List[Dict[str, Any]], columns: List[str]) -> bool:
+        return list(columns) == self.columns and tuple(epd.get("uuid") for epd in epds) == self.uuids
+
+    def search(self, user_input: str, top_n: int = 10, cutoff: float = 0.5) -> List[Dict[str, Any]]:
+        return [self.epds[i] for _, i in self.search_positions(user_input, top_n, cutoff)]
+
+    def search_positions(self, user_input: str, top_n: int = 10, cutoff: float = 0.5) -> List[Tuple[float, int]]:
+        if not user_input or not isinstance(user_input, str) or top_n <= 0 or not self.texts:
+            return []
+        if self._corpus_id is not None:
+            try:
+                return self.pool.search(self._corpus_id, user_input, top_n, cutoff)
+            except (OSError, EOFError) as e:
+                print(f"WARNUNG: Fuzzy-Worker nicht erreichbar, nutze seriellen Index: {e}")
+                self._corpus_id = None
+        if self._serial is None:
+            self._serial = FuzzyIndex(self.epds, self.columns, texts=self.texts)
+        return self._serial.search_positions(user_input, top_n, cutoff)
+
+    def close(self):
+        """Gibt die Shards in den Workern frei (die Worker selbst laufen weiter)."""
+        if self._corpus_id is not None:
+            self.pool.drop(self._corpus_id)
+            self._corpus_id = None
+
+
+class FuzzyIndexCache:
+    """
+    Hält die zuletzt gebauten Suchindizes je (Label-Auswahl, Spalten) vor.
+    Ein Index wird wiederverwendet, solange die vorgefilterten EPDs dieselben UUIDs haben und
+    sich data_version (Datenbankstand, z.B. semantic_service.database_fingerprint) nicht
+    geändert hat; so werden nach einem Delta-Import geänderte Texte neu indiziert.
+    scoring wählt die Bewertung: SCORING_TOKEN -> TokenIndex (immer seriell, parallel_threshold
+    und num_workers bleiben unberücksichtigt), SCORING_SUBSTRING -> FuzzyIndex, ab
+    parallel_threshold EPDs (0 = nie) als ParallelFuzzyIndex im gemeinsamen FuzzyWorkerPool;
+    der Pool startet erst bei Bedarf.
+    """
+
+    def __init__(self, max_entries: int = INDEX_CACHE_SIZE, parallel_threshold: int = 0, num_workers: int = 0,
+                 scoring: str = SCORING_TOKEN):
+        self.max_entries = max_entries
+        self.parallel_threshold = parallel_threshold
+        self.num_workers = num_workers
+        self.scoring = scoring
+        self._pool: Optional[FuzzyWorkerPool] = None
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+
+    def _use_parallel(self, corpus_size: int) -> bool:
+        if not self.parallel_threshold or corpus_size < self.parallel_threshold:
+            return False
+        workers = resolve_num_workers(self.num_workers)
+        if workers <= 1:
+            return False
+        if self._pool is not None and self._pool.num_workers != workers:
+            self.clear()
+            self._pool.close()
+            self._pool = None
+        if self._pool is None:
+            self._pool = FuzzyWorkerPool(workers)
+        return True
+
+    def _index_type(self, corpus_size: int) -> type:
+        if self.scoring == SCORING_TOKEN:
+            # Vektorisierte Bewertung (wenige ms bei 100k EPDs): Worker-Prozesse lohnen nicht
+            return TokenIndex
+        return ParallelFuzzyIndex if self._use_parallel(corpus_size) else FuzzyIndex
+
+    def get(self, labels: List[str], epds: List[Dict[str, Any]], columns: List[str], data_version=None):
+        key = (frozenset(labels or []), tuple(columns))
+        cached_version, index = self._entries.get(key, (None, None))
+        index_type = self._index_type(len(epds))
+        if (index is None or type(index) is not index_type or cached_version != data_version
+                or not index.matches(epds, columns)):
+            if index is not None:
+                index.close()
+            if index_type is ParallelFuzzyIndex:
+                index = ParallelFuzzyIndex(epds, columns, self._pool)
+            else:
+                index = index_type(epds, columns)
+            self._entries[key] = (data_version, index)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            evicted.close()
+        return index
+
+    def clear(self):
+        for _, index in self._entries.values():
+            index.close()
+        self._entries.clear()
+
+    def shutdown(self):
+        """Verwirft alle Indizes und beendet den Worker-Pool (beim Schließen der Anwendung)."""
+        self.clear()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
@@ -1,8 +1,16 @@
 # src/services/ifc_service.py
-from typing import List, Dict, Any, Callable
+import os
+from typing import List, Dict, Any, Callable, Optional
+from src.core.bbox_cache import BBoxCache
 from src.ifc_detectors.bbox_xyz_detector import (
     load_model_from_path,
-    find_stacked_elements_by_xy_midpoint
+    collect_element_bbox_details,
+    group_stacks_by_xy_midpoint,
+    bbox_settings_key,
+    bbox_table_from_rows,
+    expand_with_subtypes,
+    DEFAULT_GROUPING_METHOD,
+    DEFAULT_ELEMENT_CLASSES
 )
 
 class IFCService:
@@ -10,36 +18,139 @@ class IFCService:
         self,
         min_proxy_thickness: float,
         xy_tolerance: float,
-        min_elements_in_stack: int
+        min_elements_in_stack: int,
+        num_workers: int = 1,
+        bbox_cache: Optional[BBoxCache] = None,
+        grouping_method: str = DEFAULT_GROUPING_METHOD,
+        streaming_threshold_mb: int = 0,
+        element_classes: Optional[Dict[str, Optional[float]]] = None
     ):
         self.min_proxy_thickness = min_proxy_thickness
         self.xy_tolerance = xy_tolerance
         self.min_elements_in_stack = min_elements_in_stack
+        self.num_workers = num_workers
+        self.bbox_cache = bbox_cache
+        self.grouping_method = grouping_method  # siehe GROUPING_METHODS im Detektor
+        # Dateien ab dieser Größe werden gestreamt und nur als Proxy-Teilmodell geladen (0 = nie)
+        self.streaming_threshold_mb = streaming_threshold_mb
+        # {IFC-Klasse: eigene Mindestdicke oder None (= min_proxy_thickness)}
+        self.element_classes = dict(element_classes or DEFAULT_ELEMENT_CLASSES)
+        # BBox-Tabelle (strukturiertes NumPy-Array) der zuletzt analysierten Datei, Grundlage für regroup()
+        self.last_bbox_table = None
+        self.last_ifc_path: Optional[str] = None
+
+    @property
+    def has_element_table(self) -> bool:
+        return self.last_bbox_table is not None
 
     def analyse(
         self,
         ifc_path: str,
         message_cb: Callable[[str], None] = lambda m: None,
-        progress_cb:  Callable[[int, int, str], None] = lambda c, t, s: None
+        progress_cb:  Callable[[int, int, str], None] = lambda c, t, s: None,
+        check_cancelled: Optional[Callable[[], None]] = None
     ) -> List[Dict[str, Any]]:
         """
-        Lädt das IFC, filtert BuildingElementProxy nach min_proxy_thickness,
-        gruppiert nach XY-Mittelpunkt mit xy_tolerance und min_elements_in_stack.
+        Lädt das IFC, filtert die Elemente der element_classes nach min_proxy_thickness
+        (bzw. der klassenspezifischen Mindestdicke),
+        gruppiert nach XY-Mittelpunkt mit xy_tolerance und min_elements_in_stack
+        (Rasterrundung oder Radius-Clustering je nach grouping_method).
+        Bei num_workers > 1 wird die Geometrie parallel extrahiert.
+        Ist ein BBox-Cache gesetzt und die Datei unverändert, entfallen Laden und Geometrie-Extraktion.
+        check_cancelled wird während Streaming und Geometrie-Extraktion regelmäßig aufgerufen
+        und bricht über AnalysisCancelled ab; der Zustand (last_bbox_table) bleibt dann unverändert.
         Gibt eine Liste von „Stacks“ zurück.
         """
         message_cb(f"Starte IFC-Analyse: {ifc_path}")
-        model = load_model_from_path(ifc_path, message_callback=message_cb)
-        if model is None:
-            message_cb("Fehler: IFC-Modell konnte nicht geladen werden.")
+
+        cache_key = None
+        bbox_table = None
+        if self.bbox_cache is not None:
+            settings_key = f"{bbox_settings_key()};classes={','.join(sorted(self.element_classes))}"
+            try:
+                cache_key = self.bbox_cache.key_for_file(ifc_path, settings_key)
+                cached_rows = self.bbox_cache.load(cache_key)
+            except Exception as e:
+                # z.B. "database is locked": ohne Cache weiterrechnen statt die Datei aufzugeben
+                message_cb(f"Warnung: BBox-Cache nicht lesbar, extrahiere ohne Cache: {e}")
+                cache_key, cached_rows = None, None
+            if cached_rows is not None:
+                bbox_table = bbox_table_from_rows(cached_rows)
+                message_cb(f"BBox-Daten aus Cache geladen ({len(bbox_table)} Elemente).")
+
+        if bbox_table is None:
+            model = load_model_from_path(
+                ifc_path,
+                message_callback=message_cb,
+                prefilter_types=sorted(expand_with_subtypes(self.element_classes))
+                if self._use_streaming(ifc_path) else None,
+                check_cancelled=check_cancelled
+            )
+            if model is None:
+                message_cb("Fehler: IFC-Modell konnte nicht geladen werden.")
+                return []
+
+            bbox_table = collect_element_bbox_details(
+                model,
+                message_callback=message_cb,
+                progress_callback=progress_cb,
+                num_workers=self.num_workers,
+                element_classes=self.element_classes,
+                check_cancelled=check_cancelled
+            )
+            if self.bbox_cache is not None:
+                try:
+                    self.bbox_cache.store(cache_key, bbox_table.tolist())
+                except Exception as e:
+                    message_cb(f"Warnung: BBox-Cache konnte nicht geschrieben werden: {e}")
+
+        self.last_bbox_table = bbox_table
+        self.last_ifc_path = ifc_path
+
+        stacks = self._group(message_cb, progress_cb)
+        message_cb(f"Analyse fertig: {len(stacks)} Stapel gefunden.")
+        return stacks
+
+    def _use_streaming(self, ifc_path: str) -> bool:
+        if not self.streaming_threshold_mb:
+            return False
+        try:
+            return os.path.getsize(ifc_path) >= self.streaming_threshold_mb * 1024 * 1024
+        except OSError:
+            return False
+
+    def regroup(
+        self,
+        xy_tolerance: float,
+        min_elements: int,
+        min_thickness: float,
+        message_cb: Callable[[str], None] = lambda m: None,
+        progress_cb:  Callable[[int, int, str], None] = lambda c, t, s: None
+    ) -> List[Dict[str, Any]]:
+        """
+        Übernimmt neue Gruppierungsparameter und wendet Dickenfilter und Gruppierung
+        erneut auf die BBox-Tabelle der zuletzt analysierten Datei an, ohne das IFC neu zu laden.
+        Geänderte Mindestdicken je Klasse wirken sofort, neu hinzugefügte Klassen erst nach erneuter Analyse.
+        Ohne vorherige Analyse werden nur die Parameter gesetzt und eine leere Liste geliefert.
+        """
+        self.xy_tolerance = xy_tolerance
+        self.min_elements_in_stack = min_elements
+        self.min_proxy_thickness = min_thickness
+        if self.last_bbox_table is None:
             return []
 
-        stacks = find_stacked_elements_by_xy_midpoint(
-            model,
+        stacks = self._group(message_cb, progress_cb)
+        message_cb(f"Neu gruppiert: {len(stacks)} Stapel gefunden.")
+        return stacks
+
+    def _group(self, message_cb, progress_cb) -> List[Dict[str, Any]]:
+        return group_stacks_by_xy_midpoint(
+            self.last_bbox_table,
             min_proxy_thickness_param=self.min_proxy_thickness,
             xy_tolerance_param=self.xy_tolerance,
             min_elements_in_stack_param=self.min_elements_in_stack,
             message_callback=message_cb,
-            progress_callback=progress_cb
+            progress_callback=progress_cb,
+            grouping_method=self.grouping_method,
+            min_thickness_by_class=self.element_classes
         )
-        message_cb(f"Analyse fertig: {len(stacks)} Stapel gefunden.")
-        return stacks
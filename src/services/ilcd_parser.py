@@ -0,0 +1,174 @@
+# src/services/ilcd_parser.py
+"""
+Parser für ILCD-Prozessdatensätze (ILCD+EPD-Format der ÖKOBAUDAT, processes/*.xml).
+
+Liefert pro Datensatz die Spalten der Tabelle epds sowie die Umweltdaten-Blöcke im Format,
+das EPDService.save_environmental_many erwartet:
+  lcia       {Indikator: {Modul: Wert, ..., "unit": Einheit}}  (LCIAResults)
+  key_flows  {Fluss: {Modul: Wert, ..., "unit": Einheit}}      (exchanges mit Modulwerten)
+  biogenic   wie key_flows, nur Flüsse mit biogenem Kohlenstoff
+Namensräume werden ignoriert (nur lokale Tag-Namen), da sich die EPD-Erweiterungen
+zwischen den ÖKOBAUDAT-Versionen (EPD/2013, EPD/2019) unterscheiden.
+"""
+import xml.etree.ElementTree as ET
+
+# Bevorzugte Sprachen für mehrsprachige Felder
+LANGUAGES = ("de", "en")
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+# Name eines Flusses -> Block "Biogenic Carbon" statt "Key Flows"
+_BIOGENIC_MARKERS = ("biogen",)
+
+
+class ILCDParseError(ValueError):
+    """Datensatz ist kein gültiger ILCD-Prozessdatensatz."""
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _children(elem, name: str) -> list:
+    return [child for child in elem if _local(child.tag) == name] if elem is not None else []
+
+
+def _child(elem, *path):
+    """Erstes Element entlang path (lokale Namen) oder None."""
+    for name in path:
+        if elem is None:
+            return None
+        elem = next((child for child in elem if _local(child.tag) == name), None)
+    return elem
+
+
+def _attr(elem, name: str):
+    """Attribut unabhängig vom Namensraum (z.B. module oder epd:module)."""
+    for key, value in elem.attrib.items():
+        if _local(key) == name:
+            return value
+    return None
+
+
+def _text(elem) -> str | None:
+    if elem is None or elem.text is None:
+        return None
+    return elem.text.strip() or None
+
+
+def _lang_text(elems) -> str | None:
+    """Text in der bevorzugten Sprache (LANGUAGES), sonst der erste vorhandene."""
+    by_lang = {}
+    for elem in elems:
+        text = _text(elem)
+        if text:
+            by_lang.setdefault(elem.get(_XML_LANG, ""), text)
+    for lang in LANGUAGES:
+        if lang in by_lang:
+            return by_lang[lang]
+    return next(iter(by_lang.values()), None)
+
+
+def _short_description(reference) -> str | None:
+    return _lang_text(_children(reference, "shortDescription"))
+
+
+def _to_int(text):
+    try:
+        return int(str(text).strip()[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+def _module_amounts(elem) -> dict:
+    """{Modul: Wert, "unit": Einheit} aus den epd:amount-Einträgen unter common:other."""
+    other = _child(elem, "other")
+    values = {}
+    if other is None:
+        return values
+    for amount in _children(other, "amount"):
+        module = _attr(amount, "module")
+        text = _text(amount)
+        if not module or text is None:
+            continue
+        scenario = _attr(amount, "scenario")
+        values[f"{module} ({scenario})" if scenario else module] = text
+    unit = _short_description(_child(other, "referenceToUnitGroupDataSet"))
+    if values and unit:
+        values["unit"] = unit
+    return values
+
+
+def parse_process_dataset(data: bytes) -> dict:
+    """
+    Zerlegt einen ILCD-Prozessdatensatz (XML-Bytes) in
+    {"epd": {Spalte: Wert}, "lcia": ..., "key_flows": ..., "biogenic": ...}.
+    Löst ILCDParseError aus, wenn XML oder UUID fehlen.
+    """
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ILCDParseError(f"Ungültiges XML: {e}") from e
+    if _local(root.tag) != "processDataSet":
+        raise ILCDParseError(f"Kein Prozessdatensatz (<{_local(root.tag)}>)")
+
+    info = _child(root, "processInformation")
+    ds_info = _child(info, "dataSetInformation")
+    uuid = _text(_child(ds_info, "UUID"))
+    if not uuid:
+        raise ILCDParseError("Prozessdatensatz ohne UUID")
+
+    classes = _children(_child(ds_info, "classificationInformation", "classification"), "class")
+    classes.sort(key=lambda c: _to_int(c.get("level")) or 0)
+    modelling = _child(root, "modellingAndValidation")
+    representativeness = _child(modelling, "dataSourcesTreatmentAndRepresentativeness")
+    publication = _child(root, "administrativeInformation", "publicationAndOwnership")
+    time_info = _child(info, "time")
+    technology = _child(info, "technology")
+
+    sub_type = _text(_child(modelling, "LCIMethodAndAllocation", "other", "subType")) \
+        or _text(_child(ds_info, "other", "subType"))
+    compliance = [
+        _short_description(_child(c, "referenceToComplianceSystem"))
+        for c in _children(_child(modelling, "complianceDeclarations"), "compliance")
+    ]
+    data_sources = [
+        _short_description(ref) for ref in _children(representativeness, "referenceToDataSource")
+    ]
+
+    epd = {
+        "uuid": uuid,
+        "name": _lang_text(_children(_child(ds_info, "name"), "baseName")),
+        "classification_path": " / ".join(t for t in (_text(c) for c in classes) if t) or None,
+        "owner": _short_description(_child(publication, "referenceToOwnershipOfDataSet")),
+        "compliance": "; ".join(c for c in compliance if c) or None,
+        "data_sources": "; ".join(d for d in data_sources if d) or None,
+        "sub_type": sub_type,
+        "general_comment_de": _lang_text(_children(ds_info, "generalComment")),
+        "tech_desc_de": _lang_text(_children(technology, "technologyDescriptionAndIncludedProcesses")),
+        "tech_app_de": _lang_text(_children(technology, "technologicalApplicability")),
+        "use_advice_de": _lang_text(_children(representativeness, "useAdviceForDataSet")),
+        "ref_year": _to_int(_text(_child(time_info, "referenceYear"))),
+        "valid_until": _text(_child(time_info, "dataSetValidUntil")),
+    }
+
+    lcia = {}
+    for result in _children(_child(root, "LCIAResults"), "LCIAResult"):
+        name = _short_description(_child(result, "referenceToLCIAMethodDataSet"))
+        values = _module_amounts(result)
+        if name and values:
+            lcia[name] = values
+
+    key_flows, biogenic = {}, {}
+    for exchange in _children(_child(root, "exchanges"), "exchange"):
+        name = _short_description(_child(exchange, "referenceToFlowDataSet"))
+        values = _module_amounts(exchange)
+        if name and values:
+            target = biogenic if any(m in name.lower() for m in _BIOGENIC_MARKERS) else key_flows
+            target[name] = values
+
+    return {
+        "epd": epd,
+        "version": _text(_child(publication, "dataSetVersion")),
+        "lcia": lcia,
+        "key_flows": key_flows,
+        "biogenic": biogenic,
+    }
@@ -0,0 +1,275 @@
+# src/services/semantic_service.py
+"""
+Semantische Suche ohne Netzwerk über gehashte TF-IDF-Vektoren.
+
+Jede EPD wird aus den Textspalten in SEMANTIC_COLUMN_WEIGHTS vektorisiert: normalisierte
+Wörter (fuzzy_service.tokenize_text: Umlaute, Stoppwörter) und deren Zeichen-Trigramme,
+per Feature-Hashing (CRC32, Vorzeichen-Bit gegen Kollisionsverzerrung) auf `dimensions`
+Spalten abgebildet, mit IDF gewichtet und L2-normiert. Die Trigramme machen Komposita und
+Wortvarianten ähnlich ("Asphaltbinderschicht" ~ "Binderschicht aus Asphalt").
+
+Der Index wird offline aus der Tabelle epds gebaut (build_semantic_index bzw.
+python -m src.semantic_index) und liegt als float32-Matrix (vectors.npy) mit IDF-Gewichten
+(idf.npy) und UUID-Liste (meta.json) im CONFIG_DIR. SemanticIndex öffnet die Matrix per
+Memory-Mapping; eine Anfrage ist ein Matrix-Vektor-Produkt plus argpartition.
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.db_setup import get_connection, migrate
+from src.services.fuzzy_service import tokenize_text
+from src.utils.constants import (
+    SEMANTIC_DIMENSIONS, SEMANTIC_COLUMN_WEIGHTS, SEMANTIC_MIN_SCORE, DATA_VERSION_TABLE_NAME
+)
+
+# Formatversion der Indexdateien (bei Änderung der Vektorisierung erhöhen)
+INDEX_FORMAT_VERSION = 1
+VECTORS_FILE = "vectors.npy"
+IDF_FILE = "idf.npy"
+META_FILE = "meta.json"
+# Gewicht eines Zeichen-Trigramms relativ zum ganzen Wort
+CHAR_NGRAM_WEIGHT = 0.25
+CHAR_NGRAM = 3
+# Zeilen pro Block beim Gewichten und Normieren der Matrix
+_NORMALIZE_CHUNK_ROWS = 4096
+
+
+class SemanticIndexError(RuntimeError):
+    """Index fehlt, ist unvollständig oder passt nicht zur Version."""
+
+
+class HashingVectorizer:
+    """Bildet Texte auf gehashte Featurevektoren ab (Wort + Zeichen-Trigramme je Wort)."""
+
+    def __init__(self, dimensions: int = SEMANTIC_DIMENSIONS):
+        self.dimensions = dimensions
+        self._token_features: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        h = zlib.crc32(feature.encode("utf-8"))
+        return h % self.dimensions, (-1.0 if h & 0x80000000 else 1.0)
+
+    def token_features(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(Spalten, vorzeichenbehaftete Gewichte) eines Wortes, gecacht je Wort."""
+        features = self._token_features.get(token)
+        if features is None:
+            padded = f"<{token}>"
+            hashed = [self._hash("w:" + token)]
+            weights = [1.0]
+            for k in range(len(padded) - CHAR_NGRAM + 1):
+                hashed.append(self._hash("c:" + padded[k:k + CHAR_NGRAM]))
+                weights.append(CHAR_NGRAM_WEIGHT)
+            columns = np.array([column for column, _ in hashed], dtype=np.int64)
+            values = np.array([sign * w for (_, sign), w in zip(hashed, weights)], dtype=np.float64)
+            features = self._token_features[token] = (columns, values)
+        return features
+
+    def term_frequencies(self, token_counts: Dict[str, float]) -> np.ndarray:
+        """Ungewichteter Vektor (Länge dimensions) aus {Wort: gewichtete Häufigkeit}, tf sublinear."""
+        if not token_counts:
+            return np.zeros(self.dimensions, dtype=np.float64)
+        columns, values = [], []
+        for token, count in token_counts.items():
+            token_columns, token_values = self.token_features(token)
+            columns.append(token_columns)
+            values.append(token_values * math.log1p(count))
+        return np.bincount(np.concatenate(columns), weights=np.concatenate(values), minlength=self.dimensions)
+
+    @staticmethod
+    def count_tokens(texts: Dict[str, Any], column_weights: Dict[str, float]) -> Dict[str, float]:
+        """{Wort: Summe der Spaltengewichte seiner Vorkommen} über die gewichteten Spalten."""
+        counts: Counter = Counter()
+        for column, weight in column_weights.items():
+            value = texts.get(column)
+            if value:
+                for token in tokenize_text(str(value)):
+                    counts[token] += weight
+        return counts
+
+
+def database_fingerprint(conn) -> str:
+    """
+    Stand der Tabelle epds: Datenbank-ID und Änderungszähler aus epd_data_version (eine Zeile,
+    von EPDService.upsert_epds/delete_epds erhöht), zusätzlich Anzahl und größte rowid der EPDs
+    (erkennt auch Einfügen/Löschen an EPDService vorbei). Ohne diese Tabelle (schreibgeschützte,
+    nicht migrierte Datenbank) Prüfsumme über UUIDs, Inhalts-Hashes und indizierte Textspalten.
+    """
+    try:
+        row = conn.execute(f"SELECT database_id, version FROM {DATA_VERSION_TABLE_NAME} WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row:
+        count, max_rowid = conn.execute("SELECT COUNT(*), MAX(rowid) FROM epds").fetchone()
+        return f"{row[0]}:{row[1]}:{count}:{max_rowid}"
+    available = {r[1] for r in conn.execute("PRAGMA table_info(epds)")}
+    columns = [c for c in ("uuid", "content_hash", *SEMANTIC_COLUMN_WEIGHTS) if c in available]
+    digest = hashlib.sha1()
+    for row in conn.execute(f"SELECT {', '.join(columns)} FROM epds ORDER BY uuid"):
+        digest.update("\0".join("" if v is None else str(v) for v in row).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def build_semantic_index(
+        db_path: str,
+        index_dir: str,
+        dimensions: int = SEMANTIC_DIMENSIONS,
+        column_weights: Optional[Dict[str, float]] = None,
+        message_callback=None,
+        progress_callback=None,
+        check_cancelled=None
+) -> Dict[str, Any]:
+    """
+    Baut den Vektorindex aus der Tabelle epds in index_dir (wird ersetzt).
+    Die Dateien entstehen zunächst in einem temporären Verzeichnis, ein bestehender Index
+    bleibt bis zum Austausch nutzbar. Gibt {"epds", "dimensions", "seconds", "bytes"} zurück.
+
+    check_cancelled wird alle 1000 EPDs aufgerufen; löst es eine Ausnahme aus, wird das
+    temporäre Verzeichnis entfernt und die Ausnahme weitergereicht (alter Index bleibt).
+    """
+    start = time.perf_counter()
+    column_weights = dict(column_weights or SEMANTIC_COLUMN_WEIGHTS)
+    vectorizer = HashingVectorizer(dimensions)
+
+    conn = get_connection(db_path)
+    try:
+        migrate(conn)  # content_hash für den Fingerabdruck sicherstellen
+        conn.execute("BEGIN")  # ein Lese-Snapshot für Fingerabdruck, Anzahl und Zeilen
+        available = {row[1] for row in conn.execute("PRAGMA table_info(epds)")}
+        column_weights = {c: w for c, w in column_weights.items() if c in available}
+        fingerprint = database_fingerprint(conn)
+        count = conn.execute("SELECT COUNT(*) FROM epds").fetchone()[0]
+        if message_callback:
+            message_callback(f"Vektorisiere {count} EPDs ({dimensions} Dimensionen)...")
+
+        tmp_dir = f"{index_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        vectors = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, VECTORS_FILE), mode="w+", dtype=np.float32, shape=(count, dimensions)
+        )
+        document_frequency = np.zeros(dimensions, dtype=np.int64)
+        uuids = []
+        cols_sql = ", ".join(f'"{c}"' for c in column_weights)
+        cursor = conn.execute(f"SELECT uuid{', ' + cols_sql if cols_sql else ''} FROM epds ORDER BY uuid")
+        for row_index, row in enumerate(cursor):
+            uuids.append(row["uuid"])
+            tf = vectorizer.term_frequencies(vectorizer.count_tokens(dict(row), column_weights))
+            vectors[row_index] = tf
+            document_frequency += tf != 0
+            if (row_index + 1) % 1000 == 0:
+                if check_cancelled:
+                    check_cancelled()
+                if progress_callback:
+                    progress_callback(row_index + 1, count, f"Vektorisiert: {row_index + 1}/{count}")
+        conn.rollback()
+    except BaseException:
+        vectors = None  # Memory-Mapping freigeben, bevor das Verzeichnis gelöscht wird
+        shutil.rmtree(f"{index_dir}.tmp", ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+
+    count = len(uuids)
+    idf = (np.log((1.0 + count) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+    for chunk_start in range(0, count, _NORMALIZE_CHUNK_ROWS):
+        chunk = vectors[chunk_start:chunk_start + _NORMALIZE_CHUNK_ROWS]
+        chunk *= idf
+        norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+        chunk /= np.where(norms > 0, norms, 1.0)
+    vectors.flush()
+    size = vectors.nbytes
+    del vectors
+    np.save(os.path.join(tmp_dir, IDF_FILE), idf)
+    meta = {
+        "version": INDEX_FORMAT_VERSION,
+        "dimensions": dimensions,
+        "column_weights": column_weights,
+        "fingerprint": fingerprint,
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "uuids": uuids,
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(tmp_dir, index_dir)
+
+    stats = {"epds": count, "dimensions": dimensions, "seconds": time.perf_counter() - start, "bytes": size}
+    if progress_callback:
+        progress_callback(count, count, "Vektorindex erstellt")
+    if message_callback:
+        message_callback(f"Vektorindex mit {count} EPDs in {stats['seconds']:.1f} s erstellt "
+                         f"({size / 1e6:.1f} MB): {index_dir}")
+    return stats
+
+
+class SemanticIndex:
+    """Geladener Vektorindex (Matrix per Memory-Mapping, nur lesend)."""
+
+    def __init__(self, index_dir: str):
+        meta_path = os.path.join(index_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            raise SemanticIndexError(f"Kein Vektorindex in {index_dir}")
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_FORMAT_VERSION:
+            raise SemanticIndexError(f"Vektorindex hat Version {meta.get('version')}, erwartet {INDEX_FORMAT_VERSION}")
+        self.index_dir = index_dir
+        self.fingerprint = meta["fingerprint"]
+        self.column_weights = meta["column_weights"]
+        self.uuids: List[str] = meta["uuids"]
+        self.rows = {uuid: i for i, uuid in enumerate(self.uuids)}
+        self.vectorizer = HashingVectorizer(meta["dimensions"])
+        self.idf = np.load(os.path.join(index_dir, IDF_FILE))
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+        if self.vectors.shape != (len(self.uuids), meta["dimensions"]):
+            raise SemanticIndexError(f"Vektorindex in {index_dir} ist unvollständig")
+
+    def __len__(self):
+        return len(self.uuids)
+
+    def close(self):
+        """Gibt das Memory-Mapping frei (vor dem Ersetzen der Indexdateien nötig unter Windows)."""
+        self.vectors = None
+
+    def query_vector(self, text: str) -> np.ndarray:
+        """Normierter Anfragevektor (float32); Nullvektor, wenn text keine Wörter enthält."""
+        counts = Counter(tokenize_text(text))
+        vector = (self.vectorizer.term_frequencies(counts) * self.idf).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def search_positions(
+            self, text: str, top_n: int = 10, rows: Optional[np.ndarray] = None, min_score: float = SEMANTIC_MIN_SCORE
+    ) -> List[Tuple[float, int]]:
+        """Beste top_n als (Kosinusähnlichkeit, Zeile), optional nur unter rows; absteigend."""
+        query = self.query_vector(text)
+        if top_n <= 0 or not query.any() or not len(self.uuids):
+            return []
+        scores = self.vectors @ query
+        candidates = np.arange(len(scores)) if rows is None else np.asarray(rows, dtype=np.int64)
+        candidates = candidates[scores[candidates] >= min_score]
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return list(zip(scores[candidates].tolist(), candidates.tolist()))
+
+    def search(
+            self, text: str, epds: List[Dict[str, Any]], top_n: int = 10, min_score: float = SEMANTIC_MIN_SCORE
+    ) -> List[Dict[str, Any]]:
+        """Ähnlichste EPDs aus epds (z.B. nach Labels vorgefiltert); EPDs ohne Indexzeile fehlen."""
+        by_row = {self.rows[epd["uuid"]]: epd for epd in epds if epd.get("uuid") in self.rows}
+        rows = np.fromiter(by_row.keys(), dtype=np.int64, count=len(by_row))
+        if not len(rows):
+            return []
+        return [by_row[row] for _, row in self.search_positions(text, top_n, rows, min_score)]
@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QIcon, QAction
 
 from src.core.config_manager import ConfigManager
+from src.core.bbox_cache import BBoxCache
 from src.services.epd_service import EPDService
 from src.services.ifc_service import IFCService
 from src.services.llm_service import LLMService
@@ -16,6 +17,8 @@ from src.ui.widgets.epd_matcher_tab import EpdMatcherTab
 from src.ui.widgets.ifc_analysis_tab import IfcAnalysisTab
 from src.ui.widgets.results_tab import ResultsTab
 from src.utils.constants import DB_FILE as DEFAULT_DB_FILENAME  # Für den Fall, dass base_path nicht funktioniert
+from src.utils.constants import CONFIG_DIR, BBOX_CACHE_FILE, BBOX_CACHE_MAX_ELEMENTS
+from src.utils.ifc_classes import format_element_classes, parse_element_classes
 
 
 class MainWindow(QMainWindow):
@@ -50,10 +53,17 @@ class MainWindow(QMainWindow):
 
         self.epd_svc = EPDService(db_path=db_actual_path)
         self.llm_svc = LLMService(api_key=self.cfg.api_key, model=self.cfg.model)
+        # BBox-Cache im Konfigurationsordner; wird auch von neu erzeugten IFCService-Instanzen genutzt
+        self.bbox_cache = BBoxCache(os.path.join(CONFIG_DIR, BBOX_CACHE_FILE), max_elements=BBOX_CACHE_MAX_ELEMENTS)
         self.ifc_svc = IFCService(
             min_proxy_thickness=self.cfg.ifc_min_proxy_thickness,
             xy_tolerance=self.cfg.ifc_xy_tolerance,
-            min_elements_in_stack=self.cfg.ifc_min_elements_in_stack
+            min_elements_in_stack=self.cfg.ifc_min_elements_in_stack,
+            num_workers=self.cfg.ifc_num_workers,
+            bbox_cache=self.bbox_cache,
+            grouping_method=self.cfg.ifc_grouping_method,
+            streaming_threshold_mb=self.cfg.ifc_streaming_threshold_mb,
+            element_classes=self.cfg.ifc_element_classes
         )
 
         # --- UI Setup ---
@@ -203,9 +213,23 @@ class MainWindow(QMainWindow):
     def open_ifc_settings_dialog(self):
         # Für jeden Parameter einzeln oder einen benutzerdefinierten Dialog erstellen
         # Hier Beispiel für min_proxy_thickness
+        current_classes_text = format_element_classes(self.cfg.ifc_element_classes)
+        val_classes_text, ok0 = QInputDialog.getText(
+            self, "IFC: Elementklassen",
+            "Zu analysierende IFC-Klassen, optional mit eigener Mindestdicke in Metern\n"
+            "(z.B. IfcBuildingElementProxy, IfcCourse:0.02, IfcSlab, IfcPavement, IfcEarthworksFill):",
+            QLineEdit.EchoMode.Normal, current_classes_text
+        )
+        if not ok0: return
+        try:
+            val_classes = parse_element_classes(val_classes_text, strict=True)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ungültige Elementklassen", f"{e}\nDie IFC-Einstellungen wurden nicht geändert.")
+            return
+
         val_thickness, ok1 = QInputDialog.getDouble(
-            self, "IFC: Minimale Proxy-Dicke",
-            "Minimale Dicke für IfcBuildingElementProxy (in Metern, z.B. 0.01 für 1cm):",
+            self, "IFC: Minimale Elementdicke",
+            "Minimale Dicke für Elemente ohne eigene Klassenregel (in Metern, z.B. 0.01 für 1cm):",
             value=self.cfg.ifc_min_proxy_thickness, decimals=3, min=0.001, max=10.0
         )
         if not ok1: return
@@ -224,25 +248,62 @@ class MainWindow(QMainWindow):
         )
         if not ok3: return
 
+        val_num_workers, ok4 = QInputDialog.getInt(
+            self, "IFC: Geometrie-Threads",
+            "Anzahl Threads für die Geometrie-Extraktion (1 = seriell):",
+            value=self.cfg.ifc_num_workers, min=1, max=max(1, os.cpu_count() or 1)
+        )
+        if not ok4: return
+
+        grouping_labels = {"grid": "Raster (Mittelpunkt runden)", "cluster": "Radius-Clustering (Nachbarzellen)"}
+        current_method = self.cfg.ifc_grouping_method
+        method_items = list(grouping_labels.values())
+        val_method_label, ok5 = QInputDialog.getItem(
+            self, "IFC: Gruppierungsverfahren",
+            "Verfahren für die Stapel-Gruppierung nach XY-Mittelpunkt:",
+            method_items,
+            current=method_items.index(grouping_labels.get(current_method, method_items[0])),
+            editable=False
+        )
+        if not ok5: return
+        val_method = next(key for key, label in grouping_labels.items() if label == val_method_label)
+
         # Werte im ConfigManager aktualisieren
+        previous_classes = self.cfg.ifc_element_classes
+        self.cfg.ifc_element_classes = val_classes
         self.cfg.ifc_min_proxy_thickness = val_thickness
         self.cfg.ifc_xy_tolerance = val_tolerance
         self.cfg.ifc_min_elements_in_stack = val_min_elements
+        self.cfg.ifc_num_workers = val_num_workers
+        self.cfg.ifc_grouping_method = val_method
 
         try:
-            # IFCService neu initialisieren oder aktualisieren
-            self.ifc_svc = IFCService(
-                min_proxy_thickness=self.cfg.ifc_min_proxy_thickness,
+            # IFCService behält die BBox-Tabelle der letzten Analyse im Speicher,
+            # daher nur die Parameter aktualisieren und die Stapel direkt neu gruppieren.
+            self.ifc_svc.num_workers = self.cfg.ifc_num_workers
+            self.ifc_svc.grouping_method = self.cfg.ifc_grouping_method
+            self.ifc_svc.element_classes = self.cfg.ifc_element_classes
+            self.ifc_tab.regroup_stacks(
                 xy_tolerance=self.cfg.ifc_xy_tolerance,
-                min_elements_in_stack=self.cfg.ifc_min_elements_in_stack
+                min_elements=self.cfg.ifc_min_elements_in_stack,
+                min_thickness=self.cfg.ifc_min_proxy_thickness
             )
-            # Den IfcAnalysisTab informieren, falls er eine eigene Referenz hält
-            if hasattr(self.ifc_tab, 'update_ifc_service'):
-                self.ifc_tab.update_ifc_service(self.ifc_svc)
-            QMessageBox.information(self, "Gespeichert", "Die Parameter für die IFC Analyse wurden aktualisiert.")
+            if set(previous_classes) != set(self.ifc_svc.element_classes):
+                QMessageBox.information(self, "Gespeichert",
+                                        "Die Parameter für die IFC Analyse wurden aktualisiert.\n"
+                                        "Geänderte Elementklassen werden bei der nächsten IFC-Analyse berücksichtigt.")
+            else:
+                QMessageBox.information(self, "Gespeichert", "Die Parameter für die IFC Analyse wurden aktualisiert.")
         except Exception as e:
             QMessageBox.critical(self, "Fehler", f"Fehler beim Aktualisieren des IFC Service:\n{e}")
 
+    def closeEvent(self, event):
+        # Laufende IFC-Analyse abbrechen, damit der Worker-Thread nicht beim Beenden zerstört wird
+        self.ifc_tab.shutdown()
+        self.epd_tab.shutdown()
+        self.epd_svc.close()
+        super().closeEvent(event)
+
     def show_about_dialog(self):
         QMessageBox.information(
             self, "Über EPD Matcher",
@@ -3,10 +3,15 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QGroupBox, QScrollArea,
                              QCheckBox, QPushButton, QRadioButton, QButtonGroup,
                              QTextEdit, QHBoxLayout, QApplication,  # QTextEdit für die manuelle Eingabe
                              QMessageBox, QProgressDialog, QTabWidget, QLabel)  # QTabWidget für Layer-Tabs, QLabel
-from PyQt6.QtCore import pyqtSignal, QTimer, Qt
-from src.services.fuzzy_service import fuzzy_search  # Importiere die Funktion direkt
+from PyQt6.QtCore import pyqtSignal, QTimer, Qt, QThread
+from src.services.fuzzy_service import FuzzyIndexCache
+from src.services.semantic_service import SemanticIndex, SemanticIndexError, database_fingerprint
+from src.ui.widgets.semantic_index_worker import SemanticIndexWorker
+from src.core.db_setup import get_connection
 import json
-from src.utils.constants import DB_FILE, LABELS_COLUMN_NAME
+import os
+from src.utils.constants import (DB_FILE, LABELS_COLUMN_NAME, CONFIG_DIR, SEMANTIC_INDEX_DIR,
+                                 SEMANTIC_MIN_SCORE)
 
 class EpdMatcherTab(QWidget):
     match_selected = pyqtSignal(str)  # Signal, das die UUID des ausgewählten EPDs sendet
@@ -16,8 +21,14 @@ class EpdMatcherTab(QWidget):
         self.epd_service = epd_service
         self.llm_service = llm_service
         self.config_manager = config_manager  # config_manager speichern
-        # fuzzy_search ist eine Funktion und wird direkt aufgerufen, nicht als Instanzvariable gespeichert,
-        # es sei denn, du möchtest die Möglichkeit haben, die Fuzzy-Search-Implementierung zur Laufzeit auszutauschen.
+        # Vorberechnete Suchkorpora der Fuzzy-Suche je Label-/Spaltenauswahl (Wort- bzw. Trigramm-Index)
+        self.fuzzy_index_cache = FuzzyIndexCache()
+        # Vektorindex der semantischen Suche (wird bei der ersten semantischen Suche geladen)
+        self.semantic_index = None
+        # Hintergrund-Aufbau des Vektorindex und die währenddessen zurückgestellte Suche
+        self.semantic_index_thread = None
+        self.semantic_index_worker = None
+        self._pending_semantic_search = None
 
         self.current_epd_search_context_title = "Manuelle Suche"  # Für Detail-Tab Kontext
         self.active_layer_search_widgets = []  # Für dynamische Layer-Tabs
@@ -28,6 +39,20 @@ class EpdMatcherTab(QWidget):
 
         self._build_ui()
 
+    def shutdown(self):
+        """
+        Beendet die Worker-Prozesse der parallelen Fuzzy-Suche und bricht einen laufenden
+        Aufbau des Vektorindex ab (beim Schließen der Anwendung).
+        """
+        self.fuzzy_index_cache.shutdown()
+        if self.semantic_index_thread is not None:
+            self.semantic_index_worker.cancel()
+            self.semantic_index_thread.quit()
+            self.semantic_index_thread.wait()
+        if self.semantic_index is not None:
+            self.semantic_index.close()
+            self.semantic_index = None
+
     def update_llm_service(self, llm_service):  # Methode zum Aktualisieren des LLM-Service von außen
         self.llm_service = llm_service
         print("EpdMatcherTab: LLM Service aktualisiert.")
@@ -61,9 +86,11 @@ class EpdMatcherTab(QWidget):
         method_layout_h = QHBoxLayout(method_group)
         self.rb_api = QRadioButton("API Matching (LLM)")
         self.rb_fuzzy = QRadioButton("Stichwortsuche (Fuzzy)")
+        self.rb_semantic = QRadioButton("Semantische Suche (lokal)")
         self.rb_api.setChecked(True)
         method_layout_h.addWidget(self.rb_api)
         method_layout_h.addWidget(self.rb_fuzzy)
+        method_layout_h.addWidget(self.rb_semantic)
         method_group.setLayout(method_layout_h)
         main_layout.addWidget(method_group)
 
@@ -165,7 +192,7 @@ class EpdMatcherTab(QWidget):
 
     def find_matches_controller(self):
         """
-        Sammelt Eingaben, filtert EPDs vor und startet entweder die LLM- oder Fuzzy-Suche.
+        Sammelt Eingaben, filtert EPDs vor und startet die LLM-, Fuzzy- oder semantische Suche.
         Stellt sicher, dass die für die Anzeige benötigten Daten effizient geladen werden.
         """
         self.clear_match_radio_buttons()  # Alte Ergebnisse aus der UI entfernen
@@ -241,7 +268,7 @@ class EpdMatcherTab(QWidget):
             self.loading_dialog.close()
             self.loading_dialog = None
 
-        search_type_text = 'LLM' if self.rb_api.isChecked() else 'Fuzzy'
+        search_type_text = 'LLM' if self.rb_api.isChecked() else 'Semantisch' if self.rb_semantic.isChecked() else 'Fuzzy'
         self.loading_dialog = QProgressDialog(
             f"Suche EPDs für '{user_input_text[:30]}...' ({search_type_text})...",
             None, 0, 0, self
@@ -261,6 +288,12 @@ class EpdMatcherTab(QWidget):
                 pre_filtered_epds,
                 selected_columns_for_llm_context
             ))
+        elif self.rb_semantic.isChecked():
+            # Der Vektorindex deckt alle EPDs ab; gesucht wird nur unter den vorgefilterten
+            QTimer.singleShot(50, lambda: self._execute_semantic_search(
+                user_input_text,
+                pre_filtered_epds
+            ))
         else:  # Fuzzy Search
             # `pre_filtered_epds` enthält bereits alle Display-Infos.
             # Für den Fuzzy-Suchtext (die `columns` in `fuzzy_search`)
@@ -271,7 +304,9 @@ class EpdMatcherTab(QWidget):
             QTimer.singleShot(50, lambda: self._execute_fuzzy_search(
                 user_input_text,
                 pre_filtered_epds,  # Enthält bereits alle Display-Infos
-                fuzzy_search_text_columns  # Spalten für den Bau des Fuzzy-Suchtextes
+                fuzzy_search_text_columns,  # Spalten für den Bau des Fuzzy-Suchtextes
+                selected_labels,
+                display_columns_needed
             ))
 
 
@@ -335,37 +370,171 @@ Bitte gib deine Antwort ausschließlich als JSON-Objekt zurück, das dem im Syst
 """
         return prompt
 
-    def _execute_fuzzy_search(self, user_input, all_epds, context_columns):
-        """Führt die Fuzzy-Suche aus."""
+    def _execute_fuzzy_search(self, user_input, all_epds, context_columns, labels=None, display_columns=None):
+        """
+        Führt die Stichwortsuche aus: über den vorberechneten Index der vorgefilterten EPDs
+        (fuzzy_index_cache, Bewertung je nach Einstellung search.fuzzy_scoring). Nur wenn er
+        keine Treffer liefert, wird der FTS5-Volltextindex der Datenbank (bm25) befragt.
+        """
         # context_columns werden für Fuzzy-Suche verwendet, um den Suchtext pro EPD zu bauen
+        search_cols_for_fuzzy = list(set(['name'] + context_columns))
         try:
-            # fuzzy_search(user_input, epds_list, columns_to_search_in, top_n_results, cutoff_score)
-            # top_n hier aus config_manager, cutoff kann fest sein oder auch konfigurierbar
-            # Die `context_columns` aus der UI sind die Spalten, die für den Suchtext relevant sind.
-            # `name` sollte immer dabei sein.
-            search_cols_for_fuzzy = list(set(['name'] + context_columns))
-
-            # Die fuzzy_search Funktion erwartet eine Liste von Dicts (EPDs)
-            # und eine Liste der Spaltennamen, die für den Suchtext pro EPD verwendet werden sollen.
-            fuzzy_results = fuzzy_search(
-                user_input=user_input,
-                epds=all_epds,  # Alle vor-gefilterten EPDs
-                columns=search_cols_for_fuzzy,  # Spalten für den Suchtext
+            # Index über alle vor-gefilterten EPDs; wird bei gleicher Auswahl wiederverwendet.
+            # Standard: Wortmengen-Bewertung (TokenIndex); bei Teilstring-Bewertung werden
+            # große Korpora auf Worker-Prozesse verteilt
+            self.fuzzy_index_cache.scoring = self.config_manager.fuzzy_scoring
+            self.fuzzy_index_cache.parallel_threshold = self.config_manager.fuzzy_parallel_threshold
+            self.fuzzy_index_cache.num_workers = self.config_manager.fuzzy_num_workers
+            # Der Datenbankstand verwirft Indizes, deren EPD-Texte sich seitdem geändert haben
+            fuzzy_index = self.fuzzy_index_cache.get(labels, all_epds, search_cols_for_fuzzy,
+                                                     data_version=self._database_fingerprint())
+            fuzzy_results = fuzzy_index.search(
+                user_input,
                 top_n=self.config_manager.top_n,  # Anzahl der gewünschten Top-Ergebnisse
                 cutoff=0.4  # Mindest-Score
             )
+        except Exception as e:
             if self.loading_dialog: self.loading_dialog.close()
+            QMessageBox.critical(self, "Fuzzy Search Fehler", f"Ein Fehler bei der Stichwortsuche ist aufgetreten: {e}")
+            return
 
-            if not fuzzy_results:
-                QMessageBox.information(self, "Keine Fuzzy-Treffer",
-                                        "Die Stichwortsuche hat keine passenden EPDs gefunden.")
-                return
+        if not fuzzy_results:
+            # Rückfall: Volltextsuche findet Teilwörter auch unterhalb des Mindest-Scores
+            try:
+                fuzzy_results = self.epd_service.search_text(
+                    user_input,
+                    labels=labels,
+                    columns=display_columns,
+                    search_columns=search_cols_for_fuzzy,
+                    limit=self.config_manager.top_n
+                )
+            except Exception as e:
+                print(f"INFO: Volltextsuche nicht verfügbar: {e}")
+                fuzzy_results = None
+
+        if self.loading_dialog: self.loading_dialog.close()
+        if not fuzzy_results:
+            QMessageBox.information(self, "Keine Fuzzy-Treffer",
+                                    "Die Stichwortsuche hat keine passenden EPDs gefunden.")
+            return
 
-            self._populate_match_results(fuzzy_results, is_llm=False)
+        self._populate_match_results(fuzzy_results, is_llm=False)
 
+    def _database_fingerprint(self) -> str:
+        """Aktueller Datenbankstand (Änderungszähler epd_data_version), ohne Tabellenscan."""
+        conn = get_connection(self.epd_service.db_path)
+        try:
+            return database_fingerprint(conn)
+        finally:
+            conn.close()
+
+    def _load_current_semantic_index(self):
+        """
+        Gibt den Vektorindex aus dem CONFIG_DIR zurück, wenn er zum aktuellen Datenbankstand
+        passt, sonst None (fehlt oder veraltet). Der Fingerabdruck liest nur den Änderungszähler.
+        """
+        fingerprint = self._database_fingerprint()
+        if self.semantic_index is None:
+            try:
+                self.semantic_index = SemanticIndex(os.path.join(CONFIG_DIR, SEMANTIC_INDEX_DIR))
+            except SemanticIndexError as e:
+                print(f"INFO: {e}")
+                return None
+        if self.semantic_index.fingerprint != fingerprint:
+            return None
+        return self.semantic_index
+
+    def _execute_semantic_search(self, user_input, all_epds):
+        """
+        Führt die semantische Suche über den lokalen Vektorindex (gehashte TF-IDF-Vektoren) aus.
+        Fehlt der Index oder ist er veraltet, wird er zuerst im Hintergrund-Thread neu gebaut.
+        """
+        try:
+            semantic_index = self._load_current_semantic_index()
         except Exception as e:
+            self._on_semantic_search_error(str(e))
+            return
+        if semantic_index is None:
+            self._start_semantic_index_build(user_input, all_epds)
+            return
+        self._run_semantic_search(semantic_index, user_input, all_epds)
+
+    def _run_semantic_search(self, semantic_index, user_input, all_epds):
+        try:
+            semantic_results = semantic_index.search(
+                user_input,
+                all_epds,
+                top_n=self.config_manager.top_n,
+                min_score=SEMANTIC_MIN_SCORE
+            )
             if self.loading_dialog: self.loading_dialog.close()
-            QMessageBox.critical(self, "Fuzzy Search Fehler", f"Ein Fehler bei der Stichwortsuche ist aufgetreten: {e}")
+
+            if not semantic_results:
+                QMessageBox.information(self, "Keine semantischen Treffer",
+                                        "Die semantische Suche hat keine passenden EPDs gefunden.")
+                return
+
+            self._populate_match_results(semantic_results, is_llm=False)
+
+        except Exception as e:
+            self._on_semantic_search_error(str(e))
+
+    def _on_semantic_search_error(self, error_text: str):
+        if self.loading_dialog: self.loading_dialog.close()
+        QMessageBox.critical(self, "Semantische Suche Fehler",
+                             f"Ein Fehler bei der semantischen Suche ist aufgetreten: {error_text}")
+
+    def _start_semantic_index_build(self, user_input, all_epds):
+        """Baut den Vektorindex im Hintergrund-Thread; die Suche läuft nach dem Aufbau weiter."""
+        self._pending_semantic_search = (user_input, all_epds)  # letzte Anfrage gewinnt
+        if self.semantic_index_thread is not None:
+            return  # Aufbau läuft bereits
+        if self.semantic_index is not None:
+            self.semantic_index.close()  # Memory-Mapping vor dem Ersetzen der Dateien freigeben
+            self.semantic_index = None
+        if self.loading_dialog:
+            self.loading_dialog.setLabelText("Erstelle Vektorindex für die semantische Suche...")
+
+        self.semantic_index_thread = QThread(self)
+        self.semantic_index_worker = SemanticIndexWorker(
+            self.epd_service.db_path, os.path.join(CONFIG_DIR, SEMANTIC_INDEX_DIR)
+        )
+        self.semantic_index_worker.moveToThread(self.semantic_index_thread)
+        self.semantic_index_thread.started.connect(self.semantic_index_worker.run)
+        self.semantic_index_worker.message.connect(print)
+        self.semantic_index_worker.progress.connect(self._on_semantic_index_progress)
+        self.semantic_index_worker.finished.connect(self._on_semantic_index_built)
+        self.semantic_index_worker.failed.connect(self._on_semantic_index_failed)
+        for signal in (self.semantic_index_worker.finished, self.semantic_index_worker.failed,
+                       self.semantic_index_worker.cancelled):
+            signal.connect(self.semantic_index_thread.quit)
+        self.semantic_index_thread.finished.connect(self._on_semantic_index_thread_finished)
+        self.semantic_index_thread.start()
+
+    def _on_semantic_index_progress(self, current: int, total: int, status_text: str):
+        # Nur der Text wird aktualisiert; der Dialog bleibt im Besetzt-Modus und schließt nicht bei 100%
+        if self.loading_dialog:
+            self.loading_dialog.setLabelText(f"Erstelle Vektorindex: {status_text}")
+
+    def _on_semantic_index_built(self, stats: dict):
+        pending, self._pending_semantic_search = self._pending_semantic_search, None
+        try:
+            self.semantic_index = SemanticIndex(os.path.join(CONFIG_DIR, SEMANTIC_INDEX_DIR))
+        except Exception as e:
+            self._on_semantic_search_error(str(e))
+            return
+        if pending is not None:
+            self._run_semantic_search(self.semantic_index, *pending)
+
+    def _on_semantic_index_failed(self, error_text: str):
+        self._pending_semantic_search = None
+        self._on_semantic_search_error(f"Vektorindex konnte nicht erstellt werden: {error_text}")
+
+    def _on_semantic_index_thread_finished(self):
+        self.semantic_index_worker.deleteLater()
+        self.semantic_index_thread.deleteLater()
+        self.semantic_index_worker = None
+        self.semantic_index_thread = None
 
     def _populate_match_results(self, results: list, is_llm: bool):
         """Füllt die RadioButton-Liste mit den Suchergebnissen."""
@@ -379,6 +548,18 @@ Bitte gib deine Antwort ausschließlich als JSON-Objekt zurück, das dem im Syst
             self.match_area_layout.addWidget(no_results_label)
             return
 
+        # Fehlende Anzeigeinfos (z.B. bei LLM-Treffern) für alle Zeilen in einer Abfrage nachladen
+        uuids_missing_info = [
+            item['uuid'] for item in results
+            if item.get('uuid') and any(item.get(col) in (None, 'N/A') for col in ('ref_year', 'valid_until', 'owner'))
+        ]
+        display_info = {}
+        if uuids_missing_info:
+            try:
+                display_info = self.epd_service.get_display_info_for_uuids(uuids_missing_info)
+            except Exception as db_err:
+                print(f"INFO: Konnte Zusatzinfos für Treffer nicht laden: {db_err}")
+
         for i, item in enumerate(results):
             uuid = item.get('uuid')
             name = item.get('name', 'N/A')
@@ -387,30 +568,10 @@ Bitte gib deine Antwort ausschließlich als JSON-Objekt zurück, das dem im Syst
                 print(f"WARNUNG: Ergebnis ohne UUID übersprungen: {item}")
                 continue
 
-            # Versuche, ref_year, valid_until, owner direkt aus dem 'item' zu bekommen.
-            # Dies setzt voraus, dass fetch_by_labels (für Fuzzy) oder die LLM-Datenaufbereitung (für LLM)
-            # diese Felder bereits im 'item' bereitstellt.
-            ref_year = item.get('ref_year', 'N/A')
-            valid_until = item.get('valid_until', 'N/A')  # Korrekter .get() Aufruf
-            owner = item.get('owner', 'N/A')
-
-            # Fallback: Wenn die Infos nicht im 'item' sind, versuche sie über den EPDService zu holen.
-            # Dies sollte nur geschehen, wenn die initiale Datenladung diese Infos nicht enthielt.
-            # Ideal wäre es, wenn 'results' bereits alle benötigten Infos enthält.
-            # Temporär lassen wir eine Abfrage über epd_service.get_details zu, aber es ist nicht optimal für die Performance hier.
-            # Besser: Stelle sicher, dass fetch_by_labels in EPDService diese Spalten immer mitlädt,
-            # wenn sie für die Anzeige benötigt werden.
-            if ref_year == 'N/A' or valid_until == 'N/A' or owner == 'N/A': # Nur wenn Infos fehlen
-                try:
-                    # get_details gibt ein dict zurück, nicht eine Connection
-                    details_dict = self.epd_service.get_details(uuid) # Holt alle Details
-                    if details_dict:
-                        ref_year = details_dict.get('ref_year', ref_year) # Behalte alten Wert, falls nicht in Details
-                        valid_until = details_dict.get('valid_until', valid_until)
-                        owner = details_dict.get('owner', owner)
-                except Exception as db_err:
-                    print(f"INFO: Konnte Zusatzinfos für {uuid} nicht via get_details laden: {db_err}")
-            #         # Die 'N/A'-Werte von oben bleiben dann bestehen.
+            info = display_info.get(uuid, {})
+            ref_year = item.get('ref_year') or info.get('ref_year') or 'N/A'
+            valid_until = item.get('valid_until') or info.get('valid_until') or 'N/A'
+            owner = item.get('owner') or info.get('owner') or 'N/A'
 
             display_text_parts = [
                 f"{i + 1}. {name} ({uuid[:8]}…)",
@@ -2,11 +2,12 @@
 import os  # Für os.path.basename
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QTextEdit,
                              QListWidget, QListWidgetItem, QProgressDialog,
-                             QMessageBox, QHBoxLayout, QLabel, QFileDialog, QApplication)  # QMessageBox, QHBoxLayout, QLabel hinzugefügt
-from PyQt6.QtCore import pyqtSignal, Qt
+                             QMessageBox, QHBoxLayout, QLabel, QFileDialog)  # QMessageBox, QHBoxLayout, QLabel hinzugefügt
+from PyQt6.QtCore import pyqtSignal, Qt, QThread
 
 # Importiere das neue StackItemWidget
 from .stack_item_widget import StackItemWidget
+from .ifc_analysis_worker import IfcAnalysisWorker
 
 
 class IfcAnalysisTab(QWidget):
@@ -22,6 +23,10 @@ class IfcAnalysisTab(QWidget):
         self.candidate_ifc_stacks_data = []  # Speichert die Rohdaten der Stapel
         self.stack_item_widgets_in_list = []  # Speichert Referenzen auf die StackItemWidgets in der Liste
         self.currently_selected_stack_item_widget = None  # Das StackItemWidget des angeklickten Listenelements
+        # Laufende Hintergrund-Analyse (None, wenn keine läuft)
+        self.analysis_thread = None
+        self.analysis_worker = None
+        self.progress_dialog = None
 
         self._build_ui()
 
@@ -63,6 +68,8 @@ class IfcAnalysisTab(QWidget):
         self.setLayout(main_layout)
 
     def on_select_and_analyze_ifc(self):
+        if self.is_analysis_running:
+            return
         # QFileDialog.getOpenFileName gibt ein Tupel (filePath, selectedFilter) zurück
         path, _ = QFileDialog.getOpenFileName(
             self,
@@ -82,34 +89,58 @@ class IfcAnalysisTab(QWidget):
         self.stack_item_widgets_in_list.clear()
         self.currently_selected_stack_item_widget = None
         self.confirm_layers_btn.setEnabled(False)
-        QApplication.processEvents()
-
-        progress = QProgressDialog("Analysiere IFC-Datei...", None, 0, 100, self)
-        progress.setWindowTitle("IFC Analyse Fortschritt")
-        progress.setWindowModality(Qt.WindowModality.ApplicationModal)  # Blockiert andere Interaktionen
-        progress.setCancelButton(None)  # Kein Abbrechen-Button
-        progress.setMinimumDuration(0)  # Sofort anzeigen
-        progress.setValue(0)
-        progress.show()
-        QApplication.processEvents()
-
-        try:
-            self.candidate_ifc_stacks_data = self.ifc_service.analyse(
-                ifc_path=self.current_ifc_path,
-                message_cb=lambda msg: (self.log_text_edit.append(msg), QApplication.processEvents()),
-                progress_cb=lambda current, total, status_text: (
-                    progress.setLabelText(status_text),
-                    progress.setValue(int(current / total * 100) if total > 0 else 0),
-                    QApplication.processEvents()
-                )
-            )
-        except Exception as e:
-            progress.close()
-            self.log_text_edit.append(f"Fehler während der IFC-Analyse: {e}")
-            QMessageBox.critical(self, "IFC Analyse Fehler", f"Ein Fehler ist aufgetreten:\n{e}")
+
+        self.progress_dialog = QProgressDialog("Analysiere IFC-Datei...", "Abbrechen", 0, 100, self)
+        self.progress_dialog.setWindowTitle("IFC Analyse Fortschritt")
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)  # Sofort anzeigen
+        # Jeder Analyseschritt meldet eigene 0..total-Werte; Dialog nicht bei 100% automatisch schließen
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.canceled.connect(self._on_cancel_requested)
+        self.progress_dialog.setValue(0)
+        self.upload_btn.setEnabled(False)
+
+        # Analyse im Hintergrund-Thread; Log und Fortschritt kommen per Signal (queued) zurück
+        self.analysis_thread = QThread(self)
+        self.analysis_worker = IfcAnalysisWorker(self.ifc_service, self.current_ifc_path)
+        self.analysis_worker.moveToThread(self.analysis_thread)
+        self.analysis_thread.started.connect(self.analysis_worker.run)
+        self.analysis_worker.message.connect(self.log_text_edit.append)
+        self.analysis_worker.progress.connect(self._on_analysis_progress)
+        self.analysis_worker.finished.connect(self._on_analysis_finished)
+        self.analysis_worker.failed.connect(self._on_analysis_failed)
+        self.analysis_worker.cancelled.connect(self._on_analysis_cancelled)
+        for signal in (self.analysis_worker.finished, self.analysis_worker.failed, self.analysis_worker.cancelled):
+            signal.connect(self.analysis_thread.quit)
+        self.analysis_thread.finished.connect(self._on_analysis_thread_finished)
+        self.analysis_thread.start()
+
+    @property
+    def is_analysis_running(self) -> bool:
+        return self.analysis_thread is not None
+
+    def _on_cancel_requested(self):
+        if self.analysis_worker is not None:
+            self.analysis_worker.cancel()
+            self.log_text_edit.append("Abbruch angefordert, warte auf Ende der laufenden Geometrie-Berechnung...")
+
+    def _on_analysis_progress(self, current: int, total: int, status_text: str):
+        if self.progress_dialog is None:
             return
+        self.progress_dialog.setLabelText(status_text)
+        self.progress_dialog.setValue(int(current / total * 100) if total > 0 else 0)
 
-        progress.close()
+    def _close_progress_dialog(self):
+        if self.progress_dialog is not None:
+            self.progress_dialog.canceled.disconnect(self._on_cancel_requested)
+            self.progress_dialog.close()
+            self.progress_dialog.deleteLater()
+            self.progress_dialog = None
+
+    def _on_analysis_finished(self, stacks: list):
+        self._close_progress_dialog()
+        self.candidate_ifc_stacks_data = stacks
 
         if not self.candidate_ifc_stacks_data:
             self.log_text_edit.append("Keine Stapel im IFC-Modell gefunden oder Filter zu streng.")
@@ -120,6 +151,53 @@ class IfcAnalysisTab(QWidget):
         self._display_candidate_stacks(self.candidate_ifc_stacks_data)
         # self.stacks_ready.emit(self.candidate_ifc_stacks_data) # Altes Signal, falls noch benötigt
 
+    def _on_analysis_failed(self, error_text: str):
+        self._close_progress_dialog()
+        self.log_text_edit.append(f"Fehler während der IFC-Analyse: {error_text}")
+        QMessageBox.critical(self, "IFC Analyse Fehler", f"Ein Fehler ist aufgetreten:\n{error_text}")
+
+    def _on_analysis_cancelled(self):
+        self._close_progress_dialog()
+        self.ifc_file_display_label.setText(f"Analyse abgebrochen: {os.path.basename(self.current_ifc_path)}")
+        self.log_text_edit.append("IFC-Analyse vom Benutzer abgebrochen.")
+
+    def _on_analysis_thread_finished(self):
+        self.analysis_worker.deleteLater()
+        self.analysis_thread.deleteLater()
+        self.analysis_worker = None
+        self.analysis_thread = None
+        self.upload_btn.setEnabled(True)
+
+    def shutdown(self):
+        """Bricht eine laufende Analyse ab und wartet auf das Thread-Ende (beim Schließen des Fensters)."""
+        if self.analysis_thread is not None:
+            self.analysis_worker.cancel()
+            self.analysis_thread.quit()
+            self.analysis_thread.wait()
+
+    def regroup_stacks(self, xy_tolerance: float, min_elements: int, min_thickness: float):
+        """
+        Übernimmt geänderte Analyse-Parameter und aktualisiert die Stapel-Liste sofort,
+        indem der IFCService die vorhandene BBox-Tabelle neu gruppiert (kein erneutes Laden des IFC).
+        Während einer laufenden Analyse werden die Parameter nur übernommen; sie gelten für deren Gruppierung.
+        """
+        if self.is_analysis_running:
+            self.ifc_service.xy_tolerance = xy_tolerance
+            self.ifc_service.min_elements_in_stack = min_elements
+            self.ifc_service.min_proxy_thickness = min_thickness
+            return
+        stacks = self.ifc_service.regroup(
+            xy_tolerance=xy_tolerance,
+            min_elements=min_elements,
+            min_thickness=min_thickness,
+            message_cb=self.log_text_edit.append
+        )
+        if not self.ifc_service.has_element_table:
+            return  # Noch keine Datei analysiert, Parameter gelten für die nächste Analyse
+
+        self.candidate_ifc_stacks_data = stacks
+        self._display_candidate_stacks(stacks)
+
     def _display_candidate_stacks(self, stacks_data: list):
         self.stacks_list_widget.clear()
         self.stack_item_widgets_in_list.clear()
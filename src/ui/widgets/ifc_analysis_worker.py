@@ -0,0 +1,68 @@
+# src/ui/widgets/ifc_analysis_worker.py
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from src.ifc_detectors.bbox_xyz_detector import AnalysisCancelled
+
+# Mindestabstand zwischen zwei Fortschrittssignalen, damit die GUI nicht mit Updates geflutet wird
+PROGRESS_INTERVAL_S = 0.1
+
+
+class IfcAnalysisWorker(QObject):
+    """
+    Führt IFCService.analyse in einem eigenen QThread aus und meldet Log-Zeilen,
+    Fortschritt und Ergebnis über Signale an den GUI-Thread.
+
+    Abbruch: cancel() setzt ein Event, das der Detektor über den check_cancelled-Hook
+    in seinen Schleifen prüft; die Analyse endet dann mit dem Signal `cancelled`.
+    """
+    message = pyqtSignal(str)
+    progress = pyqtSignal(int, int, str)  # current, total, status_text
+    finished = pyqtSignal(list)           # gefundene Stapel
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, ifc_service, ifc_path: str):
+        super().__init__()
+        self.ifc_service = ifc_service
+        self.ifc_path = ifc_path
+        self._cancel_event = threading.Event()
+        self._last_progress_emit = 0.0
+
+    def cancel(self):
+        """Fordert den Abbruch an (thread-sicher, kann direkt aus dem GUI-Thread aufgerufen werden)."""
+        self._cancel_event.set()
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise AnalysisCancelled()
+
+    def _on_progress(self, current: int, total: int, status_text: str):
+        # Gedrosselt; Start- und Endwerte eines Schritts werden immer weitergegeben
+        now = time.monotonic()
+        if current in (0, total) or now - self._last_progress_emit >= PROGRESS_INTERVAL_S:
+            self._last_progress_emit = now
+            self.progress.emit(current, total, status_text)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            stacks = self.ifc_service.analyse(
+                ifc_path=self.ifc_path,
+                message_cb=self.message.emit,
+                progress_cb=self._on_progress,
+                check_cancelled=self._check_cancelled
+            )
+        except AnalysisCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        # Abbruch nach der letzten Prüfung (z.B. während der Gruppierung): Ergebnis verwerfen
+        if self._cancel_event.is_set():
+            self.cancelled.emit()
+        else:
+            self.finished.emit(stacks)
@@ -2,6 +2,7 @@
 
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTabWidget, QPlainTextEdit, QTableWidget, QTableWidgetItem, QMessageBox
 import json
+from collections.abc import Mapping
 
 class ResultsTab(QWidget):
     def __init__(self, epd_service, parent=None):
@@ -65,7 +66,7 @@ class ResultsTab(QWidget):
         env_data = details.get('environmental')
         if env_data:
             self.text_edit.appendPlainText("\n-- Environmental --")
-            if isinstance(env_data, dict):
+            if isinstance(env_data, Mapping):  # dict oder LazyEnvironmental aus dem EPDService
                 if "error" in env_data:
                      self.text_edit.appendPlainText(f"Fehler bei Umweltdaten: {env_data['error']}")
                 else:
@@ -0,0 +1,68 @@
+# src/ui/widgets/semantic_index_worker.py
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from src.services.semantic_service import build_semantic_index
+
+# Mindestabstand zwischen zwei Fortschrittssignalen, damit die GUI nicht mit Updates geflutet wird
+PROGRESS_INTERVAL_S = 0.1
+
+
+class IndexBuildCancelled(Exception):
+    """Wird vom Abbruch-Hook ausgelöst, wenn der Aufbau des Vektorindex abgebrochen wird."""
+
+
+class SemanticIndexWorker(QObject):
+    """
+    Baut den semantischen Vektorindex (build_semantic_index) in einem eigenen QThread und
+    meldet Fortschritt und Ergebnis über Signale an den GUI-Thread.
+
+    Abbruch: cancel() setzt ein Event, das build_semantic_index über check_cancelled prüft;
+    der Aufbau endet dann mit dem Signal `cancelled`, ein bestehender Index bleibt erhalten.
+    """
+    message = pyqtSignal(str)
+    progress = pyqtSignal(int, int, str)  # current, total, status_text
+    finished = pyqtSignal(dict)           # Statistik aus build_semantic_index
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, db_path: str, index_dir: str):
+        super().__init__()
+        self.db_path = db_path
+        self.index_dir = index_dir
+        self._cancel_event = threading.Event()
+        self._last_progress_emit = 0.0
+
+    def cancel(self):
+        """Fordert den Abbruch an (thread-sicher, kann direkt aus dem GUI-Thread aufgerufen werden)."""
+        self._cancel_event.set()
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise IndexBuildCancelled()
+
+    def _on_progress(self, current: int, total: int, status_text: str):
+        now = time.monotonic()
+        if current in (0, total) or now - self._last_progress_emit >= PROGRESS_INTERVAL_S:
+            self._last_progress_emit = now
+            self.progress.emit(current, total, status_text)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            stats = build_semantic_index(
+                self.db_path,
+                self.index_dir,
+                message_callback=self.message.emit,
+                progress_callback=self._on_progress,
+                check_cancelled=self._check_cancelled
+            )
+        except IndexBuildCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(stats)
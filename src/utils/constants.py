@@ -10,6 +10,13 @@ CONFIG_PATH = CONFIG_DIR / "config.ini"
 DB_FILE = "oekobaudat_epds.db"
 LABELS_COLUMN_NAME = "application_labels"
 INDICATORS_TABLE_NAME = "epd_environmental_indicators"
+LABELS_TABLE_NAME = "epd_labels"  # normalisierte Zuordnung uuid -> Label (aus application_labels)
+INDICATOR_VALUES_TABLE_NAME = "epd_indicator_values"  # LCIA-Werte spaltenweise (uuid, indicator, module)
+DATA_VERSION_TABLE_NAME = "epd_data_version"  # Änderungszähler für epds (per Trigger, z.B. für den Vektorindex)
+
+# --- IFC-BBox-Cache (liegt im CONFIG_DIR) ---
+BBOX_CACHE_FILE = "bbox_cache.db"
+BBOX_CACHE_MAX_ELEMENTS = 2_000_000  # Obergrenze über alle Projektdateien, danach LRU-Verdrängung
 
 # --- EPD-Filter ---
 POSSIBLE_LABELS = [
@@ -23,10 +30,33 @@ RELEVANT_COLUMNS_FOR_LLM_CONTEXT = [
     "general_comment_de", "tech_desc_de", "tech_app_de", "use_advice_de"
 ]
 
+# --- Volltextsuche (SQLite FTS5) ---
+FTS_TABLE_NAME = "epds_fts"
+# Spaltengewichte für bm25 (nicht aufgeführte Spalten: 1.0)
+FTS_COLUMN_WEIGHTS = {"name": 10.0, "classification_path": 4.0, "sub_type": 2.0}
+
+# --- Semantische Suche (gehashte TF-IDF-Vektoren, Index liegt im CONFIG_DIR) ---
+SEMANTIC_INDEX_DIR = "semantic_index"
+SEMANTIC_DIMENSIONS = 2048  # Spalten der Vektormatrix (float32: 8 KB je EPD)
+# Gewichte der Textspalten beim Vektorisieren (nicht aufgeführte Spalten fließen nicht ein)
+SEMANTIC_COLUMN_WEIGHTS = {"name": 3.0, "classification_path": 2.0, "sub_type": 1.0,
+                           "tech_app_de": 1.0, "tech_desc_de": 0.5}
+SEMANTIC_MIN_SCORE = 0.05  # Mindest-Kosinusähnlichkeit eines Treffers
+
 
 # --- Default-Konfiguration für ConfigManager ---
 DEFAULT_TOP_N = 70
 DEFAULT_IFC_MIN_PROXY_THICKNESS = 0.01
 DEFAULT_IFC_XY_TOLERANCE = 0.5
 DEFAULT_IFC_MIN_ELEMENTS_IN_STACK = 4
-
+DEFAULT_IFC_NUM_WORKERS = 1  # > 1: parallele Geometrie-Extraktion über ifcopenshell.geom.iterator
+DEFAULT_IFC_GROUPING_METHOD = "grid"  # "grid" (Rasterrundung) oder "cluster" (Radius-Clustering)
+# Analysierte IFC-Klassen, optional mit eigener Mindestdicke in Metern ("Klasse" oder "Klasse:Dicke")
+DEFAULT_IFC_ELEMENT_CLASSES = "IfcBuildingElementProxy"
+DEFAULT_IFC_STREAMING_THRESHOLD_MB = 0  # Ab dieser Dateigröße (MB) nur das Proxy-Teilmodell laden (0 = nie, opt-in)
+# Fuzzy-Suche mit fuzzy_scoring = "substring": ab dieser Anzahl vorgefilterter EPDs parallel in
+# Worker-Prozessen (0 = nie). Die Wortmengen-Bewertung ("token", Standard) läuft immer seriell.
+DEFAULT_FUZZY_PARALLEL_THRESHOLD = 20000
+DEFAULT_FUZZY_NUM_WORKERS = 0  # Worker-Prozesse der parallelen Teilstring-Suche (0 = CPU-Kerne - 1)
+# Bewertung der Stichwortsuche: "token" (Wortmengen, Kompositazerlegung) oder "substring" (Teilstring)
+DEFAULT_FUZZY_SCORING = "token"
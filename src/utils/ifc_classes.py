@@ -0,0 +1,33 @@
+# src/utils/ifc_classes.py
+from src.utils.constants import DEFAULT_IFC_ELEMENT_CLASSES
+
+
+def parse_element_classes(raw: str, strict: bool = False) -> dict:
+    """
+    Wandelt eine Klassenliste wie "IfcBuildingElementProxy, IfcCourse:0.02, IfcSlab:0.05"
+    in {Klasse: Mindestdicke oder None} um. Leere Eingabe ergibt die Standardklasse.
+    strict=True (Benutzereingabe) löst stattdessen ValueError aus, wenn eine Dicke keine
+    positive Zahl ist oder keine Klasse angegeben wurde.
+    """
+    classes = {}
+    for part in raw.split(","):
+        name, _, thickness = part.strip().partition(":")
+        if not name.strip():
+            continue
+        try:
+            value = float(thickness) if thickness.strip() else None
+        except ValueError:
+            if strict:
+                raise ValueError(f"Ungültige Mindestdicke für {name.strip()}: '{thickness.strip()}'")
+            value = None
+        if strict and value is not None and value <= 0:
+            raise ValueError(f"Mindestdicke für {name.strip()} muss größer als 0 sein: {value}")
+        classes[name.strip()] = value
+    if strict and not classes:
+        raise ValueError("Keine IFC-Klasse angegeben.")
+    return classes or {DEFAULT_IFC_ELEMENT_CLASSES: None}
+
+
+def format_element_classes(classes: dict) -> str:
+    """Gegenstück zu parse_element_classes (für INI-Datei und Eingabedialog)."""
+    return ", ".join(name if thickness is None else f"{name}:{thickness}" for name, thickness in classes.items())